@@ -1,12 +1,22 @@
 import streamlit as st
-import subprocess
 import os
-import sys
+
+from mfds_job_queue import get_job_queue
+from mfds_master_review_assembler import SECTION_KEYS
 
 st.set_page_config(page_title="Regulatory Procurement Review", layout="centered")
 
 st.title("Regulatory Procurement Review Tool")
 
+# Reviews run on a background job queue; the job ID is kept in the URL
+# (?job=...) so a refresh or a shared link finds the same job again.
+# Report sections are rendered as soon as the job has produced them.
+# A failed job can be retried under the same ID; the retry resumes from
+# the stages the failed attempt completed.
+POLL_SECONDS = 0.5
+
+job_queue = get_job_queue()
+
 # --- Inputs ---
 country = st.selectbox(
     "Select Country",
@@ -20,64 +30,115 @@ product = st.text_input(
 
 run = st.button("Generate Review")
 
-OUTPUT_DIR = "output"
+
+def queue_caption():
+    from mfds_single_flight import get_single_flight
+    stats = job_queue.stats()
+    flight_stats = get_single_flight().stats()
+    st.caption(
+        f"Queue: {stats['queue_depth']} waiting, {stats['running']} running "
+        f"on {stats['workers']} workers · "
+        f"wait mean {stats['wait_mean_s']:.1f}s / p95 {stats['wait_p95_s']:.1f}s · "
+        f"{flight_stats['executions_saved']} duplicate lookups coalesced"
+    )
+
+
+def render_sections(sections):
+    # One placeholder per section, in document order, filled when available
+    placeholders = {key: st.empty() for key in SECTION_KEYS}
+    for key, markdown in sections.items():
+        if key in placeholders:
+            placeholders[key].markdown(markdown)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_progress(job_id):
+    job = job_queue.get(job_id)
+
+    if job["status"] == "queued":
+        st.info(f"Review for '{job['product_name']}' is queued ({job['stage']}).")
+    elif job["status"] == "running":
+        st.info(f"Generating review for '{job['product_name']}': {job['stage']}...")
+    else:
+        # Finished: rerun the whole page once to show the result and stop polling
+        st.rerun()
+
+    queue_caption()
+    render_sections(job["sections"])
+
+
+def retry_button(job):
+    if st.button("Retry review"):
+        job_queue.retry(job["job_id"])
+        st.rerun()
+
+
+def job_result(job):
+    if job["status"] == "failed":
+        if (job["error"] or "").startswith("EmediUnavailable"):
+            st.error("MFDS e-Medi is not responding right now and no earlier capture is cached. "
+                     "Please try again later.")
+            st.caption(job["error"])
+            retry_button(job)
+            return
+        st.error("Error during review generation")
+        retry_button(job)
+        st.subheader("Pipeline error")
+        st.code(job.get("traceback") or job["error"])
+        return
+
+    result = job["result"]
+    st.success("Regulatory review generated successfully")
+    st.caption(
+        f"Run ID: {result['run_id']} · waited {job['wait_seconds']:.1f}s, "
+        f"first section after {job['first_section_seconds'] or 0:.1f}s, "
+        f"ran {job['elapsed_seconds']:.1f}s"
+    )
+
+    from mfds_evidence_cache import get_evidence_cache
+    from mfds_evidence_reducer import reduction_stats
+    from mfds_step3_to_step4_poc import get_default_browser_pool
+    pool_stats = get_default_browser_pool().stats()
+    cache_stats = get_evidence_cache().stats()
+    reduction = reduction_stats()
+    st.caption(
+        f"Browser pool: {pool_stats['hits']} warm / {pool_stats['misses']} cold lookups, "
+        f"max concurrency {pool_stats['max_concurrency']} · "
+        f"Evidence cache hit rate: {cache_stats['hit_rate']:.0%} · "
+        f"LLM evidence trimmed by {reduction['chars_saved_ratio']:.0%} (~{reduction['tokens_saved_est']} tokens saved)"
+    )
+
+    file_path = result["output_file"]
+
+    if not os.path.exists(file_path):
+        st.warning("Review document not found.")
+    else:
+        with open(file_path, "rb") as f:
+            st.download_button(
+                label="Download Review Document",
+                data=f.read(),
+                file_name=os.path.basename(file_path),
+                mime="text/markdown"
+            )
+
+    render_sections(job["sections"])
+
 
 # --- Action ---
 if run:
     if not product.strip():
         st.error("Please enter a product name.")
     else:
-        with st.spinner("Generating regulatory review..."):
-            cmd = [
-                sys.executable,
-                "run_mfds_review_poc.py",
-                "--product",
-                product
-            ]
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
+        st.query_params["job"] = job_queue.submit(product.strip(), country=country)
+
+job_id = st.query_params.get("job")
 
-        if result.returncode != 0:
-            st.error("Error during review generation")
-
-            if result.stderr:
-                st.subheader("Pipeline error (stderr)")
-                st.code(result.stderr)
-
-            if result.stdout:
-                st.subheader("Pipeline output (stdout)")
-                st.code(result.stdout)
-
-        else:
-            st.success("Regulatory review generated successfully")
-
-            # --- Robust file discovery (DO NOT GUESS FILE NAME) ---
-            if not os.path.exists(OUTPUT_DIR):
-                st.warning("Output directory not found.")
-            else:
-                generated_files = [
-                    f for f in os.listdir(OUTPUT_DIR)
-                    if f.lower().startswith("mfds_procurement_review")
-                ]
-
-                if not generated_files:
-                    st.warning("Review document not found.")
-                else:
-                    latest_file = max(
-                        generated_files,
-                        key=lambda f: os.path.getmtime(os.path.join(OUTPUT_DIR, f))
-                    )
-
-                    file_path = os.path.join(OUTPUT_DIR, latest_file)
-
-                    st.download_button(
-                        label="Download Review Document",
-                        data=open(file_path, "rb"),
-                        file_name=latest_file,
-                        mime="text/markdown"
-                    )
+if job_id:
+    job = job_queue.get(job_id)
+
+    if job is None:
+        st.warning(f"Review job {job_id} was not found.")
+    elif job["status"] in ("queued", "running"):
+        job_progress(job_id)
+    else:
+        job_result(job)
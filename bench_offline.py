@@ -0,0 +1,272 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mfds_mock_emedi import load_products, start_mock_emedi
+from mfds_mock_openai import start_mock_openai
+
+# ==============================
+# OFFLINE PIPELINE BENCHMARK
+# ==============================
+# Runs the real pipeline code against local stand-ins. e-Medi pages come
+# from mfds_mock_emedi, which renders the fixture catalogue or serves
+# recorded pages from --pages-dir. OpenAI
+# answers come from mfds_mock_openai. Both take a configurable latency.
+# The default http fetch backend needs no network access, browser or API
+# key, so it runs on a bare Linux box and in CI. Caches, run workspaces
+# and batch output go to a temporary directory that is removed afterwards
+# (--keep-work-dir keeps it for inspection).
+#
+#   single     : reviews one after another (latency per review)
+#   concurrent : --requests reviews on --concurrency threads
+#   batch      : mfds_batch_review.run_batch over --batch-size products
+#
+# Latency is reported as p50/p95/p99, with throughput in reviews/minute
+# and the process peak RSS after each scenario. --max-p95 makes the run
+# exit non-zero when single or concurrent p95 is slower than the budget,
+# or when any review fails.
+#
+#   python bench_offline.py --llm-latency 0.8 --emedi-latency 0.15 --max-p95 5
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies, elapsed):
+    return {
+        "reviews": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "max_s": round(max(latencies), 3) if latencies else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(len(latencies) / elapsed * 60, 2) if elapsed else 0.0
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def start_stand_ins(args, work_dir):
+    emedi = start_mock_emedi(latency=args.emedi_latency, pages_dir=args.pages_dir)
+    openai = start_mock_openai(latency=args.llm_latency, fail_first=args.llm_fail_first)
+
+    # Must be set before the pipeline modules are imported
+    os.environ.update({
+        "MFDS_BASE_URL": emedi.base_url,
+        "OPENAI_BASE_URL": openai.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "offline-benchmark",
+        "MFDS_FETCH_BACKEND": args.fetch_backend,
+        "MFDS_EVIDENCE_CACHE_PATH": os.path.join(work_dir, "cache", "evidence_cache.sqlite3"),
+        "MFDS_LLM_CACHE_PATH": os.path.join(work_dir, "cache", "llm_cache.sqlite3"),
+        "MFDS_CATALOG_PATH": os.path.join(work_dir, "cache", "catalog.sqlite3"),
+        "MFDS_NAME_RESOLVER_PATH": os.path.join(work_dir, "cache", "name_resolver.sqlite3"),
+        "MFDS_EVIDENCE_ARCHIVE_PATH": os.path.join(work_dir, "archive", "evidence_archive.sqlite3"),
+        "MFDS_RUNS_DIR": os.path.join(work_dir, "runs"),
+        "MFDS_JOBS_DIR": os.path.join(work_dir, "jobs")
+    })
+    return emedi, openai
+
+
+def reset_caches():
+    from mfds_catalog import get_catalog
+    from mfds_evidence_cache import get_evidence_cache
+    from mfds_llm_cache import get_llm_cache
+
+    get_evidence_cache().clear()
+    get_llm_cache().clear()
+    get_catalog().clear()
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ==============================
+# SCENARIOS
+# ==============================
+def timed_review(product_name, fetch_backend):
+    from mfds_review_pipeline import run_review
+
+    started = time.perf_counter()
+    try:
+        run_review(product_name, fetch_backend=fetch_backend)
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+
+def scenario_single(products, args):
+    latencies, errors = [], []
+    started = time.perf_counter()
+
+    for i in range(args.runs):
+        if args.cache == "cold":
+            reset_caches()
+        latency, error = timed_review(products[i % len(products)], args.fetch_backend)
+        latencies.append(latency)
+        if error:
+            errors.append(error)
+
+    return {**latency_summary(latencies, time.perf_counter() - started), "errors": errors}
+
+
+def scenario_concurrent(products, args):
+    if args.cache == "cold":
+        reset_caches()
+
+    names = [products[i % len(products)] for i in range(args.requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(lambda name: timed_review(name, args.fetch_backend), names))
+
+    return {
+        **latency_summary([latency for latency, _ in outcomes], time.perf_counter() - started),
+        "concurrency": args.concurrency,
+        "errors": [error for _, error in outcomes if error]
+    }
+
+
+def scenario_batch(products, args, work_dir):
+    from mfds_batch_review import run_batch
+
+    if args.cache == "cold":
+        reset_caches()
+
+    names = [products[i % len(products)] for i in range(args.batch_size)]
+    summary = run_batch(
+        names,
+        workers=args.workers,
+        llm_workers=args.llm_workers,
+        output_dir=os.path.join(work_dir, "batch"),
+        fetch_backend=args.fetch_backend,
+        llm_batch_size=args.llm_batch_size
+    )
+
+    scrape_latencies = [row["scrape_seconds"] for row in summary["items"] if row["scrape_seconds"] is not None]
+    return {
+        **latency_summary(scrape_latencies, summary["elapsed_seconds"]),
+        "latency_measures": "scrape stage per item",
+        "workers": args.workers,
+        "llm_workers": args.llm_workers,
+        "llm_batching": summary["llm_batching"],
+        "status_counts": summary["status_counts"],
+        "errors": [row["error"] for row in summary["items"] if row["error"]]
+    }
+
+
+# ==============================
+# MAIN
+# ==============================
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=["single", "concurrent", "batch"],
+        default=["single", "concurrent", "batch"]
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Reviews in the single scenario")
+    parser.add_argument("--requests", type=int, default=20, help="Reviews in the concurrent scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2, help="Batch scrape workers")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Batch LLM workers")
+    parser.add_argument("--llm-batch-size", type=int, default=0, help="Batch: products per packed LLM request")
+    parser.add_argument("--emedi-latency", type=float, default=0.1, help="Seconds per mock e-Medi response")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per mock OpenAI response")
+    parser.add_argument("--pages-dir", default=None, help="Recorded e-Medi pages to serve (see mfds_mock_emedi)")
+    parser.add_argument("--llm-fail-first", type=int, default=0, help="Fail the first N OpenAI calls with 429")
+    parser.add_argument(
+        "--cache",
+        choices=["cold", "warm"],
+        default="cold",
+        help="cold clears the evidence and LLM caches before each review / scenario"
+    )
+    parser.add_argument("--fetch-backend", choices=["http", "auto", "playwright"], default="http")
+    parser.add_argument("--max-p95", type=float, default=None, help="Fail if single/concurrent p95 exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    parser.add_argument("--keep-work-dir", action="store_true", help="Keep caches, reports and traces")
+    parser.add_argument("--json", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="mfds_bench_")
+    emedi, openai = start_stand_ins(args, work_dir)
+    products = [p["item_name"] for p in load_products()]
+
+    print(f"[INFO] Stand-ins: e-Medi {emedi.base_url} ({args.emedi_latency}s), "
+          f"OpenAI {openai.base_url} ({args.llm_latency}s); work dir {work_dir}")
+
+    results = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "verbose", "keep_work_dir")},
+        "scenarios": {}
+    }
+
+    for name in args.scenarios:
+        print(f"[INFO] Running {name} scenario...")
+        with quiet(not args.verbose):
+            if name == "single":
+                result = scenario_single(products, args)
+            elif name == "concurrent":
+                result = scenario_concurrent(products, args)
+            else:
+                result = scenario_batch(products, args, work_dir)
+        result["peak_rss_mb"] = peak_rss_mb()
+        results["scenarios"][name] = result
+
+    results["requests_served"] = {"emedi": emedi.request_count, "openai": openai.request_count}
+    emedi.shutdown()
+    openai.shutdown()
+    if not args.keep_work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\nscenario     reviews    p50      p95      p99   throughput/min  peak RSS  errors")
+    for name, r in results["scenarios"].items():
+        print(
+            f"{name:<11} {r['reviews']:>8} {r['p50_s']:>7.3f}s {r['p95_s']:>7.3f}s {r['p99_s']:>7.3f}s "
+            f"{r['throughput_per_min']:>14.1f} {r['peak_rss_mb']:>7.1f}MB {len(r['errors']):>7}"
+        )
+    if "batch" in results["scenarios"]:
+        print("(batch latency is the scrape stage per item; throughput is whole products)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    failures = []
+    for name, r in results["scenarios"].items():
+        if r["errors"]:
+            failures.append(f"{name}: {len(r['errors'])} failed reviews ({r['errors'][0]})")
+        if args.max_p95 is not None and name != "batch" and r["p95_s"] > args.max_p95:
+            failures.append(f"{name}: p95 {r['p95_s']:.3f}s exceeds budget {args.max_p95:.3f}s")
+
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
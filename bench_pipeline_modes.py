@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# ==============================
+# PIPELINE MODE BENCHMARK
+# ==============================
+# Compares the legacy one-subprocess-per-script chain against the
+# in-process engine. Wall time and CPU (user+sys, including every child
+# interpreter) are measured per review.
+#
+#   subprocess : python run_mfds_review_poc.py --mode subprocess
+#   inprocess  : python run_mfds_review_poc.py --mode inprocess  (cold start)
+#   warm       : run_review() called repeatedly in this interpreter
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def self_cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_cold(mode, product_name):
+    cpu_before = children_cpu()
+    started = time.perf_counter()
+
+    result = subprocess.run(
+        [sys.executable, "run_mfds_review_poc.py", "--product", product_name, "--mode", mode],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd()
+    )
+
+    wall = time.perf_counter() - started
+    cpu = children_cpu() - cpu_before
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{result.stdout}\n{result.stderr}")
+
+    return wall, cpu
+
+
+def run_warm(product_name):
+    from mfds_review_pipeline import run_review
+
+    cpu_before = self_cpu()
+    started = time.perf_counter()
+
+    run_review(product_name)
+
+    return time.perf_counter() - started, self_cpu() - cpu_before
+
+
+def summarize(samples):
+    walls = [s[0] for s in samples]
+    cpus = [s[1] for s in samples]
+    return {
+        "runs": len(samples),
+        "wall_median_s": round(statistics.median(walls), 3),
+        "wall_min_s": round(min(walls), 3),
+        "cpu_median_s": round(statistics.median(cpus), 3)
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--product", default="oximeter")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["subprocess", "inprocess", "warm"],
+        default=["subprocess", "inprocess", "warm"]
+    )
+    parser.add_argument("--json", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+
+    for mode in args.modes:
+        samples = []
+        for i in range(args.runs):
+            if mode == "warm":
+                samples.append(run_warm(args.product))
+            else:
+                samples.append(run_cold(mode, args.product))
+            print(f"[INFO] {mode} run {i + 1}/{args.runs}: wall={samples[-1][0]:.2f}s cpu={samples[-1][1]:.2f}s")
+        results[mode] = summarize(samples)
+
+    print("\nmode        runs  wall_median  wall_min  cpu_median")
+    for mode, r in results.items():
+        print(
+            f"{mode:<11} {r['runs']:>4}  {r['wall_median_s']:>10.3f}s "
+            f"{r['wall_min_s']:>8.3f}s {r['cpu_median_s']:>10.3f}s"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,67 @@
+import argparse
+import json
+import statistics
+import time
+
+import mfds_step3_to_step4_poc as step3_to_step4
+
+# ==============================
+# SCRAPE PROFILE BENCHMARK
+# ==============================
+# Runs the Playwright lookup (fresh browser, no cache, no pool) with each
+# scrape profile and reports the median of every recorded phase:
+# goto, search, result_wait, detail_load, extract.
+# Point MFDS_BASE_URL at mfds_mock_emedi.py to measure offline.
+
+PHASES = ["goto", "search", "result_wait", "detail_load", "extract"]
+
+
+def run_profile(profile_name, product_name, runs):
+    samples = []
+    for i in range(runs):
+        started = time.perf_counter()
+        evidence = step3_to_step4.capture_with_playwright(product_name, profile_name=profile_name)
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if not evidence:
+            raise RuntimeError(f"No MFDS product found for '{product_name}' ({profile_name})")
+
+        timings = dict(evidence["scrape_timings_ms"], total=total_ms)
+        timings["text_chars"] = len(evidence["visible_text"])
+        samples.append(timings)
+        print(f"[INFO] {profile_name} run {i + 1}/{runs}: total={total_ms:.0f}ms")
+
+    return {
+        key: round(statistics.median(s.get(key, 0) for s in samples), 1)
+        for key in PHASES + ["total", "text_chars"]
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--product", default="oximeter")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(step3_to_step4.SCRAPE_PROFILES),
+        default=list(step3_to_step4.SCRAPE_PROFILES)
+    )
+    parser.add_argument("--json", help="Optional path to write the medians as JSON")
+    args, _ = parser.parse_known_args()
+
+    results = {p: run_profile(p, args.product, args.runs) for p in args.profiles}
+
+    columns = PHASES + ["total", "text_chars"]
+    print("\nprofile   " + "".join(f"{c:>13}" for c in columns))
+    for profile_name, medians in results.items():
+        print(f"{profile_name:<10}" + "".join(f"{medians[c]:>13.1f}" for c in columns))
+    print("(median milliseconds per phase; text_chars = characters extracted)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
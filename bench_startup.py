@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# ==============================
+# STARTUP BENCHMARK
+# ==============================
+# Measures what importing each entry point costs in a fresh interpreter,
+# using python -X importtime. Per entry point it reports:
+#   import_ms : cumulative import time of the entry module(s) (median of
+#               --runs fresh interpreters)
+#   wall_ms   : interpreter start to exit, for reference
+#   heaviest  : the modules the entry point imports directly that
+#               account for most of it
+#   heavy     : HEAVY_MODULES that got imported (Playwright, requests, ...
+#               should only load when a lookup or LLM call needs them)
+# --max-ms makes the run exit non-zero when an entry point is slower, and
+# --forbid-heavy when one of them imports a heavy module.
+#
+#   python bench_startup.py --runs 5 --max-ms 150 --forbid-heavy
+
+ENTRY_POINTS = {
+    "step3_to_step4": "import mfds_step3_to_step4_poc",
+    "step5_to_step8": "import mfds_step5_to_step8_assembler_poc",
+    "step9_conclusion": "import mfds_step9_conclusion_assembler_poc",
+    "master_assembler": "import mfds_master_review_assembler",
+    "review_pipeline": "import mfds_review_pipeline",
+    "batch_review": "import mfds_batch_review",
+    "job_queue": "import mfds_job_queue",
+    "incremental": "import mfds_incremental",
+    "catalog": "import mfds_catalog",
+    "name_resolver": "import mfds_name_resolver",
+    "run_review_cli": "import run_mfds_review_poc",
+    # app.py is a Streamlit script (importing it renders the page); its
+    # import cost is Streamlit plus the modules it pulls in
+    "app": "import streamlit, mfds_job_queue, mfds_master_review_assembler"
+}
+HEAVY_MODULES = ["playwright", "requests", "urllib3", "streamlit", "greenlet"]
+# Entry points that are expected to load a heavy module
+ALLOWED_HEAVY = {"app": ["streamlit"]}
+TOP_IMPORTS = 5
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_part, cumulative_part, name = line.split("|", 2)
+        self_us = int(self_part.split(":")[1])
+        cumulative_us = int(cumulative_part)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append({"name": name.strip(), "depth": depth, "self_us": self_us, "cumulative_us": cumulative_us})
+    return entries
+
+
+def measure(code):
+    # Loaded modules are written to stdout after the import under test
+    probe = f"{code}\nimport sys\nprint(','.join(sorted(sys.modules)))"
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    entries = parse_importtime(result.stderr)
+    # Everything the -c code imported is a top-level entry after site
+    site_index = max((i for i, e in enumerate(entries) if e["name"] == "site" and e["depth"] == 0), default=-1)
+    top_level = [e for e in entries[site_index + 1:] if e["depth"] == 0]
+    children = [e for e in entries[site_index + 1:] if e["depth"] == 1]
+    loaded = set(result.stdout.strip().split(","))
+
+    return {
+        "import_ms": sum(e["cumulative_us"] for e in top_level) / 1000,
+        "wall_ms": wall_ms,
+        "children": children,
+        "heavy": [m for m in HEAVY_MODULES if m in loaded]
+    }
+
+
+def bench_entry(name, code, runs):
+    samples = [measure(code) for _ in range(runs)]
+    last = samples[-1]
+    heaviest = sorted(last["children"], key=lambda e: e["cumulative_us"], reverse=True)[:TOP_IMPORTS]
+    return {
+        "entry_point": name,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "wall_ms": round(statistics.median(s["wall_ms"] for s in samples), 1),
+        "heaviest": [{"module": e["name"], "ms": round(e["cumulative_us"] / 1000, 1)} for e in heaviest],
+        "heavy": last["heavy"]
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per entry point")
+    parser.add_argument("--entry", nargs="+", choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if an entry point imports slower")
+    parser.add_argument("--forbid-heavy", action="store_true", help="Fail if an entry point loads a heavy module")
+    parser.add_argument("--json", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results, failures = [], []
+    for name in args.entry:
+        try:
+            result = bench_entry(name, ENTRY_POINTS[name], max(1, args.runs))
+        except RuntimeError as e:
+            print(f"[ERROR] {name}: {e}")
+            failures.append(name)
+            continue
+        results.append(result)
+
+        heavy = [m for m in result["heavy"] if m not in ALLOWED_HEAVY.get(name, [])]
+        heaviest = ", ".join(f"{h['module']} {h['ms']:.0f}ms" for h in result["heaviest"][:3])
+        print(f"{name:<18} import {result['import_ms']:>7.1f} ms   wall {result['wall_ms']:>7.1f} ms   "
+              f"heaviest: {heaviest}" + (f"   [heavy: {', '.join(heavy)}]" if heavy else ""))
+
+        if args.max_ms is not None and result["import_ms"] > args.max_ms:
+            failures.append(name)
+        elif args.forbid_heavy and heavy:
+            failures.append(name)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+        print(f"[OK] Results written to {args.json}")
+
+    if failures:
+        print(f"[ERROR] Over budget or failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
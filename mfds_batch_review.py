@@ -0,0 +1,424 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_catalog import get_catalog
+from mfds_emedi_guard import EmediUnavailable, get_emedi_guard
+from mfds_evidence_cache import get_evidence_cache
+from mfds_evidence_archive import ARCHIVE_ENABLED, get_evidence_archive
+from mfds_evidence_reducer import reduction_stats
+from mfds_incremental import ReviewCheckpoint, stage_code_versions
+from mfds_llm_cache import get_llm_cache
+from mfds_name_resolver import get_name_resolver
+from mfds_openai_client import get_openai_client
+from mfds_review_pipeline import assemble_review
+from mfds_single_flight import flight_key, get_single_flight, review_key
+from mfds_tracing import bind, find_trace_files, summarize_traces, trace_review, traced, write_trace
+from mfds_workspace import new_run_id
+
+# ==============================
+# BATCH REVIEW
+# ==============================
+# Reviews every product name in a CSV / JSONL / plain-text list.
+# MFDS lookups run on --workers threads (sharing a browser pool of the
+# same size when Playwright is needed) and each captured page is handed
+# straight to a separate LLM worker pool (--llm-workers), so extraction
+# for one product overlaps the scrape of the next. Each item writes a
+# trace to traces/<index>.trace.json; summarize them with
+#   python mfds_tracing.py output/batch_<id>/traces
+#
+# --llm-batch-size N packs up to N products' LLM requests into one chat
+# completion (mfds_llm_batcher). The instruction prompt is then sent once
+# per pack instead of once per product. Each answer is validated and
+# mapped back by item ID, and any item without a valid answer is sent on
+# its own. The LLM pool is widened to at least N workers so a pack can
+# fill while workers wait for it.
+#
+# e-Medi outages (mfds_emedi_guard) are not reported as "no product
+# found": the item is marked "emedi_unavailable", or is built from the
+# last cached capture ("evidence_stale") when there is one.
+#
+# Batches are resumable. The product list is saved as products.json and
+# every finished item is appended to items.jsonl. Each item checkpoints
+# its evidence and Step-4 interpretation under checkpoints/<index>/
+# (mfds_incremental.ReviewCheckpoint). After a crash,
+#   python mfds_batch_review.py --resume <batch_id>
+# re-runs only the items that did not finish, and those skip any stage
+# they already completed. The checkpointed evidence is archived as
+# "<batch_id>/<index>" (mfds_evidence_archive).
+
+OUTPUT_DIR = "output"
+PRODUCT_COLUMNS = ["product", "product_name", "name", "device", "device_name"]
+TRACES_DIR_NAME = "traces"
+CHECKPOINTS_DIR_NAME = "checkpoints"
+PRODUCTS_FILE = "products.json"
+ITEMS_LOG = "items.jsonl"
+FINISHED_STATUSES = ("ok", "fallback")
+
+_items_log_lock = threading.Lock()
+
+
+# ==============================
+# INPUT
+# ==============================
+def read_product_names(path):
+    names = []
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, str):
+                    names.append(record)
+                else:
+                    names.append(next(
+                        (record[c] for c in PRODUCT_COLUMNS if record.get(c)),
+                        ""
+                    ))
+
+        elif path.lower().endswith(".csv"):
+            rows = list(csv.reader(f))
+            if not rows:
+                return []
+            header = [h.strip().lower().replace(" ", "_") for h in rows[0]]
+            column = next((header.index(c) for c in PRODUCT_COLUMNS if c in header), None)
+            if column is None:
+                # No recognised header: first column, first row included
+                names = [row[0] for row in rows if row]
+            else:
+                names = [row[column] for row in rows[1:] if len(row) > column]
+
+        else:
+            names = [line for line in f]
+
+    return [n.strip() for n in names if n and n.strip()]
+
+
+def report_file_name(index, product_name):
+    slug = re.sub(r"[^\w\-]+", "_", product_name, flags=re.UNICODE).strip("_") or "product"
+    return f"{index:04d}_MFDS_Procurement_Review_{slug[:80]}.md"
+
+
+# ==============================
+# STAGES
+# ==============================
+# Duplicate names in one batch that are looked up or interpreted at the
+# same time share a single execution (mfds_single_flight).
+@traced("scrape_stage")
+def scrape_stage(product_name, browser_pool, refresh=False, fetch_backend=None, checkpoint=None):
+    started = time.perf_counter()
+    if checkpoint is not None and not refresh:
+        raw_evidence = checkpoint.load("step3_evidence")
+        if raw_evidence is not None:
+            return raw_evidence, time.perf_counter() - started
+
+    raw_evidence = get_single_flight().do(
+        "evidence|" + flight_key(review_key(product_name), refresh, fetch_backend),
+        lambda: step3_to_step4.collect_raw_evidence(
+            product_name,
+            write_output=False,
+            browser_pool=browser_pool,
+            evidence_cache=get_evidence_cache(),
+            refresh=refresh,
+            fetch_backend=fetch_backend,
+            catalog=get_catalog(),
+            name_resolver=get_name_resolver()
+        )
+    )
+    if checkpoint is not None:
+        checkpoint.save("step3_evidence", raw_evidence)
+    return raw_evidence, time.perf_counter() - started
+
+
+@traced("interpret_stage")
+def interpret_stage(index, product_name, raw_evidence, batch_dir, llm_batcher=None, checkpoint=None):
+    step4 = checkpoint.load("step4_understanding") if checkpoint is not None else None
+    if step4 is None:
+        step4 = get_single_flight().do(
+            "step4|" + review_key(product_name),
+            lambda: step3_to_step4.build_step4(product_name, raw_evidence, llm_batcher=llm_batcher)
+        )
+        if checkpoint is not None:
+            checkpoint.save("step4_understanding", step4)
+    output_file = os.path.join(batch_dir, report_file_name(index, product_name))
+    return assemble_review(step4, output_file=output_file, output_dir=batch_dir)
+
+
+def review_item(index, product_name, browser_pool, llm_executor, batch_dir, refresh=False,
+                fetch_backend=None, llm_batcher=None, versions=None):
+    row = {
+        "index": index,
+        "product": product_name,
+        "status": "ok",
+        "report_file": None,
+        "risk_class": None,
+        "approval_number": None,
+        "evidence_found": False,
+        "evidence_stale": False,
+        "scrape_seconds": None,
+        "error": None
+    }
+
+    # One trace per item; the LLM stage keeps it through bind()
+    with trace_review(f"{index:04d} {product_name}") as tracer:
+        try:
+            checkpoint_dir = os.path.join(batch_dir, CHECKPOINTS_DIR_NAME, f"{index:04d}")
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            checkpoint = ReviewCheckpoint(checkpoint_dir, review_key(product_name), versions)
+
+            raw_evidence, scrape_seconds = scrape_stage(
+                product_name, browser_pool, refresh=refresh, fetch_backend=fetch_backend, checkpoint=checkpoint
+            )
+            row["scrape_seconds"] = round(scrape_seconds, 3)
+            row["evidence_found"] = bool(raw_evidence)
+            row["evidence_stale"] = bool(raw_evidence and raw_evidence.get("emedi_unavailable"))
+
+            # Hand off to the LLM pool; this scrape worker is free immediately
+            return row, llm_executor.submit(
+                bind(interpret_stage), index, product_name, raw_evidence, batch_dir, llm_batcher, checkpoint
+            ), tracer
+
+        except EmediUnavailable as e:
+            # The site is down; a fallback report would say "not listed"
+            row["status"] = "emedi_unavailable"
+            row["error"] = str(e)
+            return row, None, tracer
+        except Exception as e:
+            row["status"] = "error"
+            row["error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+            return row, None, tracer
+
+
+def finish_item(row, llm_future, tracer, batch_dir):
+    try:
+        row = _finish_item(row, llm_future)
+        append_item_log(batch_dir, row)
+        return row
+    finally:
+        write_trace(tracer, os.path.join(batch_dir, TRACES_DIR_NAME, f"{row['index']:04d}.trace.json"))
+
+
+# ==============================
+# RESUME
+# ==============================
+def append_item_log(batch_dir, row):
+    line = json.dumps(row, ensure_ascii=False)
+    with _items_log_lock:
+        with open(os.path.join(batch_dir, ITEMS_LOG), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_finished_items(batch_dir):
+    # Last logged row per item; finished only if its report is on disk
+    rows = {}
+    path = os.path.join(batch_dir, ITEMS_LOG)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Line cut short by the crash
+                    continue
+                rows[row["index"]] = row
+
+    return {
+        index: row for index, row in rows.items()
+        if row["status"] in FINISHED_STATUSES
+        and row.get("report_file") and os.path.exists(os.path.join(batch_dir, row["report_file"]))
+    }
+
+
+def _finish_item(row, llm_future):
+    if llm_future is None:
+        return row
+
+    try:
+        result = llm_future.result()
+        classification = result["step4"]["classification"]
+        row["report_file"] = os.path.basename(result["output_file"])
+        row["risk_class"] = classification["risk_class"]
+        row["approval_number"] = classification["approval_number"]
+        if not row["evidence_found"]:
+            row["status"] = "fallback"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+
+    return row
+
+
+# ==============================
+# MAIN
+# ==============================
+def run_batch(product_names=None, workers=2, llm_workers=4, output_dir=OUTPUT_DIR, refresh=False,
+              fetch_backend=None, llm_batch_size=0, resume_batch_id=None):
+    if resume_batch_id:
+        batch_id = resume_batch_id
+        batch_dir = os.path.join(output_dir, batch_id)
+        with open(os.path.join(batch_dir, PRODUCTS_FILE), "r", encoding="utf-8") as f:
+            product_names = json.load(f)
+        finished = load_finished_items(batch_dir)
+    else:
+        batch_id = f"batch_{new_run_id()}"
+        batch_dir = os.path.join(output_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        with open(os.path.join(batch_dir, PRODUCTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(product_names, f, indent=2, ensure_ascii=False)
+        finished = {}
+
+    pending = [(i, name) for i, name in enumerate(product_names, start=1) if i not in finished]
+    versions = stage_code_versions()
+
+    llm_batcher = None
+    if llm_batch_size > 1:
+        llm_batcher = step3_to_step4.make_llm_batcher(max_items=llm_batch_size)
+        llm_workers = max(llm_workers, llm_batch_size)
+
+    print(f"[INFO] Batch {batch_id}: {len(product_names)} products, "
+          f"{workers} scrape workers, {llm_workers} LLM workers"
+          + (f", up to {llm_batch_size} products per LLM request" if llm_batcher else ""))
+    if resume_batch_id:
+        print(f"[INFO] Resuming: {len(finished)} products already finished, {len(pending)} to run")
+
+    started = time.perf_counter()
+    # Chromium is only launched if a lookup actually needs the Playwright backend
+    browser_pool = step3_to_step4.make_browser_pool(max_concurrency=workers)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as scrape_executor, \
+                ThreadPoolExecutor(max_workers=llm_workers) as llm_executor:
+            scrape_futures = [
+                scrape_executor.submit(
+                    review_item, i, name, browser_pool, llm_executor, batch_dir,
+                    refresh=refresh, fetch_backend=fetch_backend, llm_batcher=llm_batcher, versions=versions
+                )
+                for i, name in pending
+            ]
+            rows = [finish_item(*f.result(), batch_dir) for f in scrape_futures]
+    finally:
+        browser_pool.close()
+
+    rows = sorted(list(finished.values()) + rows, key=lambda row: row["index"])
+
+    elapsed = time.perf_counter() - started
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+
+    summary = {
+        "batch_id": batch_id,
+        "generated_at": datetime.utcnow().isoformat(),
+        "products": len(rows),
+        "status_counts": counts,
+        "scrape_workers": workers,
+        "llm_workers": llm_workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "products_per_minute": round(len(pending) / elapsed * 60, 2) if elapsed else 0.0,
+        "resumed_finished_items": len(finished),
+        "browser_pool": browser_pool.stats(),
+        "emedi_guard": get_emedi_guard().stats(),
+        "evidence_cache": get_evidence_cache().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "openai_client": get_openai_client(step3_to_step4.OPENAI_API_KEY).stats(),
+        "single_flight": get_single_flight().stats(),
+        "evidence_reduction": reduction_stats(),
+        "evidence_archive": get_evidence_archive().report() if ARCHIVE_ENABLED else None,
+        "llm_batching": llm_batcher.stats() if llm_batcher else None,
+        "slowest_stages": summarize_traces(
+            find_trace_files([os.path.join(batch_dir, TRACES_DIR_NAME)])
+        )["stages"][:10],
+        "items": rows
+    }
+
+    with open(os.path.join(batch_dir, "summary_index.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    with open(os.path.join(batch_dir, "summary_index.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["index"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"[OK] Batch finished: {len(pending)} products in {elapsed:.1f}s "
+          f"({summary['products_per_minute']} products/minute) -> {batch_dir}")
+    print(f"[INFO] Evidence cache hit rate: {summary['evidence_cache']['hit_rate']:.0%}, "
+          f"LLM cache hit rate: {summary['llm_cache']['hit_rate']:.0%}, "
+          f"duplicate executions saved: {summary['single_flight']['executions_saved']}")
+    if counts.get("emedi_unavailable") or summary["emedi_guard"]["circuit_opened"]:
+        guard = summary["emedi_guard"]
+        print(f"[WARN] e-Medi unavailable for {counts.get('emedi_unavailable', 0)} products "
+              f"(circuit opened {guard['circuit_opened']}x, {guard['rejected']} requests failed fast); "
+              "rerun them later")
+    if llm_batcher:
+        batching = summary["llm_batching"]
+        print(f"[INFO] LLM packing: {batching['items']} requests in {batching['packed_requests']} calls "
+              f"({batching['mean_items_per_request']} per call), {batching['items_invalid']} sent individually")
+    if summary["evidence_reduction"]["calls"]:
+        print(f"[INFO] LLM evidence reduced by {summary['evidence_reduction']['chars_saved_ratio']:.0%} "
+              f"(~{summary['evidence_reduction']['tokens_saved_est']} tokens saved)")
+    if summary["evidence_archive"]:
+        archive = summary["evidence_archive"]
+        print(f"[INFO] Evidence archive: {archive['reviews']} reviews in {archive['archived_bytes']:,} B "
+              f"({archive['saved_vs_json_ratio']:.0%} smaller than the evidence JSON)")
+    for stage in summary["slowest_stages"][:5]:
+        print(f"[INFO] Slowest stage {stage['name']}: total {stage['total_ms']:.0f}ms, "
+              f"p95 {stage['p95_ms']:.0f}ms over {stage['count']} spans")
+
+    return summary
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", help="CSV, JSONL or plain-text list of product names")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent MFDS lookups (browser pool size)")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent LLM extraction calls")
+    parser.add_argument("--llm-batch-size", type=int, default=0, help="Pack up to N products per LLM request")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached MFDS evidence")
+    parser.add_argument("--fetch-backend", choices=step3_to_step4.FETCH_BACKENDS, default=None)
+    parser.add_argument("--resume", metavar="BATCH_ID", help="Finish an interrupted batch in --output-dir")
+    args, _ = parser.parse_known_args()
+    # Step-3 options (--scrape-profile, --show-browser) pass through
+    step3_to_step4.configure()
+
+    product_names = None
+    if args.resume:
+        if not os.path.exists(os.path.join(args.output_dir, args.resume, PRODUCTS_FILE)):
+            print(f"[ERROR] No resumable batch {args.resume} in {args.output_dir}")
+            sys.exit(1)
+    elif not args.input:
+        parser.error("--input is required (or --resume BATCH_ID)")
+    else:
+        product_names = read_product_names(args.input)
+        if not product_names:
+            print(f"[ERROR] No product names found in {args.input}")
+            sys.exit(1)
+
+    run_batch(
+        product_names,
+        workers=args.workers,
+        llm_workers=args.llm_workers,
+        output_dir=args.output_dir,
+        refresh=args.refresh,
+        fetch_backend=args.fetch_backend,
+        llm_batch_size=args.llm_batch_size,
+        resume_batch_id=args.resume
+    )
+
+
+if __name__ == "__main__":
+    run()
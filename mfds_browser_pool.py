@@ -0,0 +1,244 @@
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from mfds_tracing import bind, span
+
+# ==============================
+# WARM CHROMIUM POOL
+# ==============================
+# Playwright's sync API is bound to the thread that started it, so every
+# pool slot is a worker thread that owns one Chromium process, one browser
+# context and one page kept on the e-Medi search form. Lookups are handed
+# to the next free slot as a callable taking the preloaded page.
+# prepare_page / open_search_page let the caller install request routing
+# and choose how the search form is (re)loaded and waited on.
+# Playwright is imported by the worker threads, so creating a pool that
+# never gets a lookup costs nothing. A worker that cannot start Playwright
+# or launch Chromium stays alive and retries with each lookup it takes,
+# failing that lookup with the error, so no caller waits on a dead worker.
+# run() waits at most LOOKUP_TIMEOUT_SECONDS (queue wait included).
+#
+# profile_name records the scrape profile the hooks prepare pages for;
+# the process-wide pools are kept per profile (get_browser_pool).
+
+POOL_SIZE = int(os.getenv("MFDS_BROWSER_POOL_SIZE", "2"))
+CONTEXT_MAX_USES = int(os.getenv("MFDS_BROWSER_CONTEXT_MAX_USES", "50"))
+LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+PAGE_TIMEOUT_MS = 60000
+LOOKUP_TIMEOUT_SECONDS = float(os.getenv("MFDS_BROWSER_LOOKUP_TIMEOUT_SECONDS", "300"))
+
+
+class BrowserPool:
+    def __init__(self, search_url, max_concurrency=POOL_SIZE, max_uses_per_context=CONTEXT_MAX_USES,
+                 prepare_page=None, open_search_page=None, profile_name=None):
+        self.search_url = search_url
+        self.prepare_page = prepare_page
+        self.open_search_page = open_search_page
+        self.profile_name = profile_name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_uses_per_context = max(1, max_uses_per_context)
+
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "contexts_created": 0,
+            "contexts_recycled": 0,
+            "crashes": 0
+        }
+
+    # ---------- public API ----------
+
+    def start(self):
+        with self._lock:
+            if self._workers or self._closed:
+                return self
+            for i in range(self.max_concurrency):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"mfds-browser-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+        return self
+
+    def submit(self, fn):
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        self.start()
+        future = Future()
+        # Page actions are traced under the submitting review
+        self._jobs.put((bind(fn), future))
+        return future
+
+    def run(self, fn, timeout=LOOKUP_TIMEOUT_SECONDS):
+        future = self.submit(fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Still queued: the worker skips it
+            future.cancel()
+            raise TimeoutError(f"Browser pool lookup did not finish within {timeout:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        served = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / served, 3) if served else 0.0
+        stats["max_concurrency"] = self.max_concurrency
+        stats["queued"] = self._jobs.qsize()
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._jobs.put(None)
+        for worker in workers:
+            worker.join(timeout=30)
+
+    # ---------- worker internals ----------
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _preload(self, page):
+        if self.open_search_page is not None:
+            self.open_search_page(page)
+            return
+        if page.url.split("#")[0] == self.search_url.split("#")[0]:
+            page.reload(timeout=PAGE_TIMEOUT_MS)
+        else:
+            page.goto(self.search_url, timeout=PAGE_TIMEOUT_MS)
+        page.wait_for_load_state("networkidle")
+
+    def _open_slot(self, browser):
+        with span("browser.new_context"):
+            context = browser.new_context()
+            page = context.new_page()
+            if self.prepare_page is not None:
+                self.prepare_page(page)
+        self._count("contexts_created")
+        with span("browser.preload_search_page"):
+            self._preload(page)
+        return {"context": context, "page": page, "uses": 0}
+
+    def _start_playwright(self):
+        from playwright.sync_api import sync_playwright
+
+        with span("browser.start_playwright"):
+            return sync_playwright().start()
+
+    def _launch(self, pw):
+        with span("browser.launch"):
+            return pw.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    def _close_slot(self, slot):
+        if not slot:
+            return
+        try:
+            slot["context"].close()
+        except Exception:
+            pass
+
+    def _worker_loop(self):
+        pw = None
+        browser = None
+        slot = None
+
+        try:
+            # Warm up before the first lookup arrives; whatever fails here
+            # is retried by that lookup
+            try:
+                pw = self._start_playwright()
+                browser = self._launch(pw)
+                slot = self._open_slot(browser)
+            except Exception:
+                slot = None
+
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+
+                fn, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    if pw is None:
+                        pw = self._start_playwright()
+                    if browser is None or not browser.is_connected():
+                        browser = self._launch(pw)
+                        slot = None
+
+                    if slot is None:
+                        slot = self._open_slot(browser)
+                        self._count("misses")
+                    else:
+                        self._count("hits")
+
+                    self._count("lookups")
+                    result = fn(slot["page"])
+
+                except Exception as e:
+                    # Crashed page/context: never hand it to the next lookup
+                    self._count("crashes")
+                    self._close_slot(slot)
+                    slot = None
+                    future.set_exception(e)
+                    continue
+
+                future.set_result(result)
+
+                # Off the critical path: recycle or put the search form back
+                slot["uses"] += 1
+                try:
+                    if slot["uses"] >= self.max_uses_per_context:
+                        self._count("contexts_recycled")
+                        self._close_slot(slot)
+                        slot = None
+                        slot = self._open_slot(browser)
+                    else:
+                        self._preload(slot["page"])
+                except Exception:
+                    self._count("crashes")
+                    self._close_slot(slot)
+                    slot = None
+        finally:
+            self._close_slot(slot)
+            if browser is not None:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+            if pw is not None:
+                pw.stop()
+
+
+# ==============================
+# PROCESS-WIDE POOL
+# ==============================
+_default_pools = {}
+_default_pool_lock = threading.Lock()
+
+
+def get_browser_pool(create_pool, key=None):
+    with _default_pool_lock:
+        if key not in _default_pools:
+            # Workers (and Chromium) start on the first submitted lookup
+            _default_pools[key] = create_pool()
+            atexit.register(_default_pools[key].close)
+        return _default_pools[key]
@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from mfds_emedi_http import HttpFetchError, fetch_listing_page, open_search_form
+from mfds_emedi_parser import parse_detail_text
+from mfds_evidence_cache import normalize_search_term, sha256_hex
+from mfds_sqlite import connect_store, create_store_dir
+
+# ==============================
+# LOCAL E-MEDI CATALOG
+# ==============================
+# SQLite copy of the public e-Medi product listing, filled by an offline
+# crawl that pages through the result list. An FTS5 index covers names,
+# model, class and approval number. It uses the trigram tokenizer, so a
+# Korean item name matches the way the site's substring search does.
+#
+#   python mfds_catalog.py crawl                  # full walk, marks delisted rows stale
+#   python mfds_catalog.py crawl --incremental    # stop after unchanged pages
+#   python mfds_catalog.py search 산소포화도
+#
+# Step 3 resolves a product name here first. On a fresh hit it fetches
+# only that detail page and skips the live search form, which is the
+# "verify" request. Stale or unknown names still go through the live
+# search, and the page they find is written back into the catalog. Each
+# row also records when the listing or a live fetch last confirmed it.
+
+MFDS_BASE_URL = os.getenv("MFDS_BASE_URL", "https://emedi.mfds.go.kr").rstrip("/")
+MFDS_SEARCH_URL = f"{MFDS_BASE_URL}/search/data/MNU20237#list"
+SEARCH_LABEL = "명칭"
+
+CATALOG_PATH = os.getenv("MFDS_CATALOG_PATH", "output/cache/catalog.sqlite3")
+CATALOG_MAX_AGE_HOURS = float(os.getenv("MFDS_CATALOG_MAX_AGE_HOURS", str(7 * 24)))
+CRAWL_DELAY_SECONDS = float(os.getenv("MFDS_CATALOG_CRAWL_DELAY", "1.0"))
+CRAWL_STOP_AFTER_UNCHANGED_PAGES = 2
+
+# Listing column headers -> catalog fields
+LISTING_COLUMNS = {
+    "product_name": ["제품명"],
+    "item_name": ["품목명", "명칭"],
+    "model_name": ["모델명"],
+    "name_en": ["영문명", "영문제품명", "영문 제품명"],
+    "risk_class": ["등급"],
+    "approval_number": ["허가번호", "품목허가번호", "인증번호", "신고번호", "허가/인증/신고번호"]
+}
+FIELDS = list(LISTING_COLUMNS)
+NAME_FIELDS = ["item_name", "product_name", "model_name", "name_en"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url_key          TEXT PRIMARY KEY,
+    detail_url       TEXT NOT NULL,
+    product_name     TEXT NOT NULL DEFAULT '',
+    item_name        TEXT NOT NULL DEFAULT '',
+    model_name       TEXT NOT NULL DEFAULT '',
+    name_en          TEXT NOT NULL DEFAULT '',
+    risk_class       TEXT NOT NULL DEFAULT '',
+    approval_number  TEXT NOT NULL DEFAULT '',
+    row_hash         TEXT NOT NULL,
+    changed_at       REAL NOT NULL,
+    confirmed_at     REAL NOT NULL,
+    stale            INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    product_name, item_name, model_name, name_en, risk_class, approval_number,
+    tokenize = 'trigram'
+);
+"""
+
+
+def row_hash(fields):
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def listing_fields(cells):
+    fields = {}
+    for field, headers in LISTING_COLUMNS.items():
+        fields[field] = next((cells[h] for h in headers if cells.get(h)), "")
+    return fields
+
+
+class Catalog:
+    def __init__(self, path=CATALOG_PATH, max_age_hours=CATALOG_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age_seconds = max_age_hours * 3600
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0}
+
+        create_store_dir(path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                # SQLite without FTS5 / trigram (< 3.34): plain LIKE scans
+                print(f"[WARN] Catalog full-text index unavailable ({e}); using LIKE search")
+                self.fts = False
+
+    def _connect(self):
+        return connect_store(self.path)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    # ---------- writes ----------
+
+    def upsert(self, detail_url, fields, now=None):
+        # Returns "new", "changed" or "unchanged"
+        now = now or time.time()
+        url_key = sha256_hex(detail_url)
+
+        with self._connect() as conn:
+            existing = conn.execute(
+                f"SELECT rowid, {', '.join(FIELDS)} FROM products WHERE url_key = ?", (url_key,)
+            ).fetchone()
+
+            if existing:
+                # Keep known values for fields this source does not carry
+                merged = {f: fields.get(f) or existing[i + 1] for i, f in enumerate(FIELDS)}
+            else:
+                merged = {f: fields.get(f) or "" for f in FIELDS}
+            digest = row_hash(merged)
+
+            if existing and digest == row_hash(dict(zip(FIELDS, existing[1:]))):
+                conn.execute(
+                    "UPDATE products SET confirmed_at = ?, stale = 0 WHERE url_key = ?", (now, url_key)
+                )
+                return "unchanged"
+
+            conn.execute(
+                f"INSERT INTO products (url_key, detail_url, {', '.join(FIELDS)}, row_hash, changed_at, confirmed_at) "
+                f"VALUES (?, ?, {', '.join('?' for _ in FIELDS)}, ?, ?, ?) "
+                "ON CONFLICT (url_key) DO UPDATE SET "
+                + ", ".join(f"{f} = excluded.{f}" for f in FIELDS)
+                + ", detail_url = excluded.detail_url, row_hash = excluded.row_hash, "
+                "changed_at = excluded.changed_at, confirmed_at = excluded.confirmed_at, stale = 0",
+                (url_key, detail_url, *[merged[f] for f in FIELDS], digest, now, now)
+            )
+
+            if self.fts:
+                (rowid,) = conn.execute("SELECT rowid FROM products WHERE url_key = ?", (url_key,)).fetchone()
+                conn.execute("DELETE FROM products_fts WHERE rowid = ?", (rowid,))
+                conn.execute(
+                    f"INSERT INTO products_fts (rowid, {', '.join(FIELDS)}) "
+                    f"VALUES (?, {', '.join('?' for _ in FIELDS)})",
+                    (rowid, *[merged[f] for f in FIELDS])
+                )
+
+        return "changed" if existing else "new"
+
+    def record_evidence(self, raw_evidence):
+        # A live detail page confirms (and refreshes) its catalog row
+        parsed = parse_detail_text(raw_evidence.get("visible_text"))
+        return self.upsert(raw_evidence["source_url"], {
+            "item_name": parsed["product_name_ko"],
+            "model_name": parsed["model_name"],
+            "risk_class": parsed["risk_class"],
+            "approval_number": parsed["approval_number"]
+        })
+
+    def mark_stale(self, detail_url):
+        with self._connect() as conn:
+            conn.execute("UPDATE products SET stale = 1 WHERE url_key = ?", (sha256_hex(detail_url),))
+
+    def mark_unseen_stale(self, seen_since):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE products SET stale = 1 WHERE confirmed_at < ? AND stale = 0", (seen_since,)
+            ).rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM products")
+            if self.fts:
+                conn.execute("DELETE FROM products_fts")
+
+    # ---------- lookups ----------
+
+    def search(self, query, limit=10):
+        term = normalize_search_term(query)
+        if not term:
+            return []
+
+        columns = ", ".join(f"p.{f}" for f in ["detail_url", *FIELDS, "confirmed_at", "stale"])
+        with self._connect() as conn:
+            if self.fts and len(term) >= 3:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM products_fts f JOIN products p ON p.rowid = f.rowid "
+                    "WHERE products_fts MATCH ? ORDER BY f.rank LIMIT ?",
+                    ('"' + term.replace('"', '""') + '"', limit * 4)
+                ).fetchall()
+            else:
+                # Trigrams need three characters; short names scan instead
+                like = f"%{term.replace('%', '').replace('_', '')}%"
+                rows = conn.execute(
+                    f"SELECT {columns} FROM products p WHERE "
+                    + " OR ".join(f"lower(p.{f}) LIKE ?" for f in FIELDS)
+                    + " LIMIT ?",
+                    (*[like] * len(FIELDS), limit * 4)
+                ).fetchall()
+
+        results = [dict(zip(["detail_url", *FIELDS, "confirmed_at", "stale"], row)) for row in rows]
+        # Exact name matches first, then shorter names, then index rank
+        results.sort(key=lambda r: (
+            not any(normalize_search_term(r[f]) == term for f in NAME_FIELDS),
+            bool(r["stale"]),
+            len(r["item_name"] or r["product_name"])
+        ))
+        return results[:limit]
+
+    def lookup(self, query):
+        candidates = [r for r in self.search(query, limit=5) if not r["stale"]]
+        if not candidates:
+            self._count("misses")
+            return None
+
+        entry = candidates[0]
+        entry["fresh"] = time.time() - entry["confirmed_at"] <= self.max_age_seconds
+        self._count("hits" if entry["fresh"] else "stale_hits")
+        return entry
+
+    # ---------- reporting ----------
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        with self._connect() as conn:
+            count, stale, last_confirmed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stale), 0), MAX(confirmed_at) FROM products"
+            ).fetchone()
+        stats["entries"] = count
+        stats["stale_entries"] = stale
+        stats["last_confirmed_at"] = last_confirmed
+        stats["full_text"] = self.fts
+        return stats
+
+
+# ==============================
+# CRAWLER
+# ==============================
+def crawl(catalog, incremental=False, max_pages=None, delay=CRAWL_DELAY_SECONDS,
+          search_url=MFDS_SEARCH_URL, search_label=SEARCH_LABEL):
+    started = time.time()
+    counts = {"pages": 0, "new": 0, "changed": 0, "unchanged": 0, "delisted": 0}
+    seen = set()
+    unchanged_pages = 0
+    complete = False
+
+    # An empty name lists the whole catalogue
+    search_request = open_search_form(search_url, search_label)
+
+    page_index = 1
+    while max_pages is None or page_index <= max_pages:
+        rows = fetch_listing_page(search_request, page_index)
+        new_rows = [row for row in rows if row["detail_url"] not in seen]
+        if not new_rows:
+            # Empty page, or the site repeating its last page
+            complete = True
+            break
+
+        page_changes = 0
+        for row in new_rows:
+            seen.add(row["detail_url"])
+            outcome = catalog.upsert(row["detail_url"], listing_fields(row["cells"]))
+            counts[outcome] += 1
+            page_changes += outcome != "unchanged"
+        counts["pages"] += 1
+        print(f"[INFO] Page {page_index}: {len(new_rows)} rows, {page_changes} new or changed")
+
+        unchanged_pages = 0 if page_changes else unchanged_pages + 1
+        if incremental and unchanged_pages >= CRAWL_STOP_AFTER_UNCHANGED_PAGES:
+            print(f"[INFO] {unchanged_pages} unchanged pages in a row; stopping incremental crawl")
+            break
+
+        page_index += 1
+        if delay:
+            time.sleep(delay)
+
+    # Only a full walk can tell that a product left the listing
+    if complete and not incremental:
+        counts["delisted"] = catalog.mark_unseen_stale(started)
+
+    counts["complete"] = complete
+    counts["elapsed_seconds"] = round(time.time() - started, 2)
+    return counts
+
+
+# ==============================
+# PROCESS-WIDE CATALOG
+# ==============================
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = Catalog()
+        return _default_catalog
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    crawl_cmd = commands.add_parser("crawl", help="Walk the public e-Medi listing into the catalog")
+    crawl_cmd.add_argument("--incremental", action="store_true", help="Stop once listing pages stop changing")
+    crawl_cmd.add_argument("--max-pages", type=int, default=None)
+    crawl_cmd.add_argument("--delay", type=float, default=CRAWL_DELAY_SECONDS, help="Seconds between listing pages")
+
+    search_cmd = commands.add_parser("search", help="Query the local catalog")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--limit", type=int, default=10)
+
+    commands.add_parser("stats", help="Catalog size and freshness")
+
+    args = parser.parse_args()
+    catalog = get_catalog()
+
+    if args.command == "crawl":
+        try:
+            counts = crawl(catalog, incremental=args.incremental, max_pages=args.max_pages, delay=args.delay)
+        except HttpFetchError as e:
+            print(f"[ERROR] Crawl failed: {e}")
+            sys.exit(1)
+        print(
+            f"[OK] Crawled {counts['pages']} pages in {counts['elapsed_seconds']}s: "
+            f"{counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+            f"{counts['delisted']} marked delisted"
+        )
+    elif args.command == "search":
+        started = time.perf_counter()
+        results = catalog.search(args.query, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for r in results:
+            flag = " (stale)" if r["stale"] else ""
+            print(f"{r['item_name']} | {r['product_name']} | {r['model_name']} | "
+                  f"class {r['risk_class']} | {r['approval_number']} | {r['detail_url']}{flag}")
+        print(f"[INFO] {len(results)} result(s) in {elapsed_ms:.1f} ms")
+    else:
+        print(json.dumps(catalog.stats(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    run()
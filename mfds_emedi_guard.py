@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from mfds_tracing import span
+
+# ==============================
+# E-MEDI ADAPTIVE LIMITER + CIRCUIT BREAKER
+# ==============================
+# Every request to e-Medi (plain HTTP or a Playwright lookup) goes
+# through one process-wide guard:
+#   limiter : the number of concurrent e-Medi requests adapts to how the
+#             site responds (AIMD). Fast successes raise the limit by
+#             1/limit. An error or a response slower than
+#             MFDS_EMEDI_SLOW_SECONDS halves it, at most once per
+#             observed round trip, down to MFDS_EMEDI_MIN_CONCURRENCY.
+#   breaker : MFDS_EMEDI_FAILURE_THRESHOLD consecutive failures, or a
+#             failure rate of 50% or more over the last 20 requests,
+#             open the circuit. For MFDS_EMEDI_OPEN_SECONDS every request
+#             fails immediately with EmediUnavailable. After that a
+#             single probe is let through (half-open); success closes the
+#             circuit and failure opens it again.
+# Only site health counts as a failure: timeouts, connection errors,
+# HTTP 429 and 5xx. "No product found" is a normal answer. Callers raise
+# EmediUnavailable inside guard.request() to report a failure, and can
+# serve cached evidence when they get one back.
+#
+#   with get_emedi_guard().request("http.get"):
+#       ...
+
+MAX_CONCURRENCY = int(os.getenv("MFDS_EMEDI_MAX_CONCURRENCY", "8"))
+MIN_CONCURRENCY = int(os.getenv("MFDS_EMEDI_MIN_CONCURRENCY", "1"))
+SLOW_SECONDS = float(os.getenv("MFDS_EMEDI_SLOW_SECONDS", "10"))
+FAILURE_THRESHOLD = int(os.getenv("MFDS_EMEDI_FAILURE_THRESHOLD", "5"))
+OPEN_SECONDS = float(os.getenv("MFDS_EMEDI_OPEN_SECONDS", "60"))
+ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("MFDS_EMEDI_ACQUIRE_TIMEOUT_SECONDS", "120"))
+
+FAILURE_WINDOW = 20
+FAILURE_WINDOW_MIN_CALLS = 10
+FAILURE_RATE_TO_OPEN = 0.5
+LATENCY_SMOOTHING = 0.2
+
+
+class EmediUnavailable(RuntimeError):
+    pass
+
+
+class EmediGuard:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, min_concurrency=MIN_CONCURRENCY,
+                 slow_seconds=SLOW_SECONDS, failure_threshold=FAILURE_THRESHOLD,
+                 open_seconds=OPEN_SECONDS, acquire_timeout=ACQUIRE_TIMEOUT_SECONDS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.slow_seconds = slow_seconds
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._latency = None
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=FAILURE_WINDOW)
+        self._consecutive_failures = 0
+        self._state = "closed"      # closed, open, half_open
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error = None
+        self._stats = {
+            "requests": 0,
+            "failures": 0,
+            "slow": 0,
+            "rejected": 0,
+            "circuit_opened": 0,
+            "limit_decreases": 0
+        }
+
+    # ---------- public API ----------
+
+    @contextmanager
+    def request(self, name="emedi.request"):
+        with span("emedi_guard.acquire", request=name) as attrs:
+            probe = self._acquire()
+            attrs["limit"] = int(self._limit)
+
+        started = time.perf_counter()
+        try:
+            yield
+        except EmediUnavailable as e:
+            self._release(probe, ok=False, elapsed=time.perf_counter() - started, error=e)
+            raise
+        except BaseException:
+            # Layout problems and caller bugs say nothing about site health
+            self._release(probe, ok=None, elapsed=None)
+            raise
+        self._release(probe, ok=True, elapsed=time.perf_counter() - started)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["state"] = self._state
+            stats["concurrency_limit"] = int(self._limit)
+            stats["in_flight"] = self._in_flight
+            stats["latency_ewma_s"] = round(self._latency, 3) if self._latency is not None else None
+            stats["last_error"] = self._last_error
+        return stats
+
+    # ---------- internals ----------
+
+    def _cooldown_over(self):
+        return time.monotonic() - self._opened_at >= self.open_seconds
+
+    def _reject(self, reason):
+        # Caller holds the lock
+        self._stats["rejected"] += 1
+        raise EmediUnavailable(f"MFDS e-Medi unavailable: {reason}")
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._state == "open":
+                    if not self._cooldown_over():
+                        self._reject(f"circuit open after repeated failures ({self._last_error})")
+                    self._state = "half_open"
+                    print("[INFO] e-Medi circuit half-open, sending one probe request")
+
+                if self._state == "half_open":
+                    if self._probe_in_flight:
+                        self._reject("circuit half-open, waiting for the probe request")
+                    self._probe_in_flight = True
+                    self._in_flight += 1
+                    return True
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return False
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject(f"no request slot within {self.acquire_timeout:.0f}s")
+                self._cond.wait(remaining)
+
+    def _release(self, probe, ok, elapsed, error=None):
+        now = time.monotonic()
+        with self._cond:
+            self._in_flight -= 1
+            if probe:
+                self._probe_in_flight = False
+
+            if ok is None:
+                # Inconclusive (a probe included): the next request tries
+                self._cond.notify_all()
+                return
+
+            self._stats["requests"] += 1
+            self._outcomes.append(ok)
+            if elapsed is not None:
+                self._latency = elapsed if self._latency is None else (
+                    LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * self._latency
+                )
+
+            slow = ok and elapsed is not None and elapsed > self.slow_seconds
+            if ok:
+                self._consecutive_failures = 0
+                if probe:
+                    self._close()
+            else:
+                self._stats["failures"] += 1
+                self._consecutive_failures += 1
+                self._last_error = f"{type(error).__name__}: {error}" if error else None
+
+            if slow:
+                self._stats["slow"] += 1
+            if not ok or slow:
+                self._decrease(now)
+            elif self._state == "closed":
+                self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+
+            if not ok and (probe or self._should_open()):
+                self._open(now)
+
+            self._cond.notify_all()
+
+    def _decrease(self, now):
+        # Caller holds the lock; one halving per round trip, not per
+        # request that was already in flight when the site slowed down
+        if now - self._last_decrease < (self._latency or 0):
+            return
+        self._last_decrease = now
+        limit = max(float(self.min_concurrency), self._limit / 2)
+        if int(limit) < int(self._limit):
+            self._stats["limit_decreases"] += 1
+            print(f"[WARN] e-Medi slow or failing; concurrency limit {int(self._limit)} -> {int(limit)}")
+        self._limit = limit
+
+    def _should_open(self):
+        if self._state != "closed":
+            return False
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        failures = self._outcomes.count(False)
+        return (len(self._outcomes) >= FAILURE_WINDOW_MIN_CALLS
+                and failures / len(self._outcomes) >= FAILURE_RATE_TO_OPEN)
+
+    def _open(self, now):
+        # Caller holds the lock
+        self._state = "open"
+        self._opened_at = now
+        self._stats["circuit_opened"] += 1
+        print(f"[WARN] e-Medi circuit opened for {self.open_seconds:.0f}s ({self._last_error})")
+
+    def _close(self):
+        # Caller holds the lock; start again from the minimum and grow
+        self._state = "closed"
+        self._limit = float(self.min_concurrency)
+        self._outcomes.clear()
+        print("[OK] e-Medi circuit closed, probe request succeeded")
+
+
+# ==============================
+# PROCESS-WIDE GUARD
+# ==============================
+_default_guard = None
+_default_guard_lock = threading.Lock()
+
+
+def get_emedi_guard():
+    global _default_guard
+    with _default_guard_lock:
+        if _default_guard is None:
+            _default_guard = EmediGuard()
+        return _default_guard
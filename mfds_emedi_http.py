@@ -0,0 +1,342 @@
+import os
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from mfds_emedi_guard import EmediUnavailable, get_emedi_guard
+from mfds_tracing import span
+
+# ==============================
+# BROWSERLESS E-MEDI FETCH
+# ==============================
+# Reproduces the Playwright lookup with a plain HTTP session:
+#   1. GET the search page and find the form holding the "명칭" field
+#   2. submit that form (hidden inputs included) with the product name
+#   3. follow the link in the first result row
+#   4. GET the detail page and flatten it to text the same way
+#      inner_text() lays out tables (cells tab-separated, one row per line)
+# Anything that does not look like the expected server-rendered markup
+# raises HttpFetchError so the caller can fall back to Playwright.
+# Timeouts, connection errors, HTTP 429 and 5xx mean the site itself is
+# struggling: they raise EmediUnavailable (mfds_emedi_guard) instead,
+# and every request goes through the shared e-Medi guard.
+#
+# open_search_form() / fetch_listing_page() page through the result list
+# (used by the mfds_catalog crawler), and fetch_detail() reads one detail
+# page directly when its URL is already known. requests is imported with
+# the first session, not at module import.
+
+HTTP_TIMEOUT_SECONDS = int(os.getenv("MFDS_HTTP_TIMEOUT_SECONDS", "20"))
+HTTP_POOL_SIZE = int(os.getenv("MFDS_HTTP_POOL_SIZE", "16"))
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/121.0 Safari/537.36"
+)
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "nav", "ul", "ol",
+    "li", "table", "thead", "tbody", "tfoot", "h1", "h2", "h3", "h4", "h5",
+    "h6", "dl", "dt", "dd", "form", "br", "main", "aside"
+}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+NO_RESULT_MARKERS = ["없습니다", "결과가 없"]
+PAGE_INDEX_FIELD = "pageIndex"
+
+
+class HttpFetchError(RuntimeError):
+    pass
+
+
+# ==============================
+# HTML PARSING
+# ==============================
+class EmediPageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.forms = []
+        self.labels = {}
+        self.rows = []
+        self.headers = []
+        self.has_tbody = False
+
+        self._chunks = []
+        self._skip = 0
+        self._in_title = False
+        self._form = None
+        self._label_for = None
+        self._label_text = []
+        self._in_tbody = 0
+        self._in_thead = 0
+        self._header = None
+        self._row = None
+
+    # ---------- tags ----------
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag == "title":
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self._chunks.append("\n")
+
+        if tag == "form":
+            self._form = {
+                "action": attrs.get("action") or "",
+                "method": (attrs.get("method") or "get").lower(),
+                "inputs": []
+            }
+            self.forms.append(self._form)
+        elif tag in ("input", "select", "textarea") and self._form is not None:
+            self._form["inputs"].append({
+                "name": attrs.get("name"),
+                "id": attrs.get("id"),
+                "type": (attrs.get("type") or "text").lower(),
+                "value": attrs.get("value") or "",
+                "checked": "checked" in attrs
+            })
+        elif tag == "label":
+            self._label_for = attrs.get("for")
+            self._label_text = []
+        elif tag == "tbody":
+            self.has_tbody = True
+            self._in_tbody += 1
+        elif tag == "thead":
+            self._in_thead += 1
+        elif tag == "th" and self._in_thead:
+            self._header = []
+        elif tag == "tr" and self._in_tbody:
+            self._row = {"cells": [], "links": [], "text": []}
+        elif tag == "a" and self._row is not None and attrs.get("href"):
+            self._row["links"].append(attrs["href"])
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag == "title":
+            self._in_title = False
+
+        if tag in ("td", "th"):
+            self._chunks.append("\t")
+            if self._header is not None:
+                self.headers.append(" ".join("".join(self._header).split()))
+                self._header = None
+            if self._row is not None:
+                self._row["cells"].append(" ".join("".join(self._row["text"]).split()))
+                self._row["text"] = []
+        elif tag == "tr":
+            self._chunks.append("\n")
+            if self._row is not None:
+                self.rows.append(self._row)
+                self._row = None
+        elif tag == "tbody":
+            self._in_tbody = max(0, self._in_tbody - 1)
+        elif tag == "thead":
+            self._in_thead = max(0, self._in_thead - 1)
+        elif tag == "form":
+            self._form = None
+        elif tag == "label":
+            if self._label_for:
+                self.labels[" ".join("".join(self._label_text).split())] = self._label_for
+            self._label_for = None
+        elif tag in BLOCK_TAGS:
+            self._chunks.append("\n")
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_title:
+            self.title += data.strip()
+            return
+        if self._label_for is not None:
+            self._label_text.append(data)
+        if self._row is not None:
+            self._row["text"].append(data)
+        if self._header is not None:
+            self._header.append(data)
+        self._chunks.append(data)
+
+    # ---------- text ----------
+
+    def visible_text(self):
+        lines = []
+        for line in "".join(self._chunks).split("\n"):
+            cells = [" ".join(cell.split()) for cell in line.split("\t")]
+            line = "\t".join(cell for cell in cells if cell)
+            if line:
+                lines.append(line)
+        return "\n".join(lines)
+
+
+def parse_page(html):
+    parser = EmediPageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+# ==============================
+# HTTP SESSION
+# ==============================
+_session = None
+
+
+def get_session():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "ko-KR,ko;q=0.9"})
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+def _request(session, method, url, **kwargs):
+    import requests
+
+    with get_emedi_guard().request(f"http.{method}"):
+        try:
+            with span(f"http.{method}", url=url) as attrs:
+                response = session.request(method, url, timeout=HTTP_TIMEOUT_SECONDS, **kwargs)
+                attrs["status"] = response.status_code
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise EmediUnavailable(f"e-Medi request failed: {e}")
+        except requests.RequestException as e:
+            raise HttpFetchError(f"e-Medi request failed: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise EmediUnavailable(f"e-Medi returned HTTP {response.status_code} for {url}")
+
+    if response.status_code != 200:
+        raise HttpFetchError(f"e-Medi returned HTTP {response.status_code} for {url}")
+    if not response.encoding or response.encoding.lower() == "iso-8859-1":
+        response.encoding = response.apparent_encoding
+    return response
+
+
+# ==============================
+# LOOKUP
+# ==============================
+def build_search_request(page, page_url, search_label, search_value):
+    field_id = page.labels.get(search_label)
+
+    for form in page.forms:
+        field = next(
+            (i for i in form["inputs"] if i["name"] and (i["id"] == field_id or i["name"] == field_id)),
+            None
+        ) if field_id else None
+        if field is None:
+            continue
+
+        data = {}
+        for i in form["inputs"]:
+            if not i["name"] or i["type"] in ("submit", "button", "image", "reset", "file"):
+                continue
+            if i["type"] in ("checkbox", "radio") and not i["checked"]:
+                continue
+            data[i["name"]] = i["value"]
+        data[field["name"]] = search_value
+
+        return form["method"], urljoin(page_url, form["action"] or page_url), data
+
+    raise HttpFetchError(f"Search form with label '{search_label}' not found in server-rendered page")
+
+
+def _followable(href):
+    return not (href.startswith("#") or href.lower().startswith("javascript:"))
+
+
+def first_result_url(page, page_url):
+    if not page.has_tbody:
+        raise HttpFetchError("Search response has no result table (results are rendered client-side)")
+
+    for row in page.rows:
+        for href in row["links"]:
+            if _followable(href):
+                return urljoin(page_url, href)
+
+    # Only a page that says so means "not found", as in the Playwright
+    # path; an empty table may be filled in by script
+    if any(marker in page.visible_text() for marker in NO_RESULT_MARKERS):
+        return None
+    if not page.rows:
+        raise HttpFetchError("Result table is empty (rows are rendered client-side)")
+    raise HttpFetchError("Result rows have no followable link (navigation is script-driven)")
+
+
+def fetch_raw_evidence(search_url, search_label, search_value):
+    session = get_session()
+    search_page_url = search_url.split("#")[0]
+
+    search_page = parse_page(_request(session, "get", search_page_url).text)
+    method, action_url, data = build_search_request(search_page, search_page_url, search_label, search_value)
+
+    if method == "post":
+        results = _request(session, "post", action_url, data=data)
+    else:
+        results = _request(session, "get", action_url, params=data)
+
+    detail_url = first_result_url(parse_page(results.text), results.url)
+    if detail_url is None:
+        print("[WARN] No valid MFDS product found in public listings")
+        return None
+
+    return fetch_detail(detail_url, session)
+
+
+def fetch_detail(detail_url, session=None):
+    detail = _request(session or get_session(), "get", detail_url)
+    detail_page = parse_page(detail.text)
+
+    return {
+        "source_url": detail.url,
+        "page_title": detail_page.title,
+        "access_date": datetime.utcnow().isoformat(),
+        "visible_text": detail_page.visible_text(),
+        "human_verified": False,
+        "fetch_backend": "http"
+    }
+
+
+# ==============================
+# LISTING
+# ==============================
+def open_search_form(search_url, search_label, search_value=""):
+    search_page_url = search_url.split("#")[0]
+    search_page = parse_page(_request(get_session(), "get", search_page_url).text)
+    return build_search_request(search_page, search_page_url, search_label, search_value)
+
+
+def fetch_listing_page(search_request, page_index):
+    # Rows of one result page as {header: cell} plus the detail URL
+    method, action_url, data = search_request
+    data = {**data, PAGE_INDEX_FIELD: str(page_index)}
+
+    if method == "post":
+        results = _request(get_session(), "post", action_url, data=data)
+    else:
+        results = _request(get_session(), "get", action_url, params=data)
+
+    page = parse_page(results.text)
+    if not page.has_tbody:
+        raise HttpFetchError("Result list has no table (results are rendered client-side)")
+
+    rows = []
+    for row in page.rows:
+        links = [href for href in row["links"] if _followable(href)]
+        if not links:
+            continue
+        rows.append({
+            "cells": dict(zip(page.headers, row["cells"])),
+            "detail_url": urljoin(results.url, links[0])
+        })
+    return rows
@@ -0,0 +1,107 @@
+import re
+
+# ==============================
+# E-MEDI DETAIL PAGE PARSER
+# ==============================
+# Reads the labelled fields of an e-Medi product detail page from its
+# captured text. Table rows come through inner_text() either as
+# "label<TAB>value" on one line or as the label followed by the value on
+# the next line; both are handled. Values are validated so a menu entry
+# that happens to share a label is not mistaken for a field.
+
+FIELD_LABELS = {
+    "product_name_ko": ["품목명", "제품명"],
+    "model_name": ["모델명"],
+    "risk_class": ["등급"],
+    "approval_number": [
+        "품목허가번호", "품목인증번호", "품목신고번호",
+        "허가번호", "인증번호", "신고번호"
+    ],
+    "approval_date": [
+        "품목허가일자", "품목인증일자", "품목신고일자",
+        "허가일자", "인증일자", "신고일자"
+    ],
+    "device_description_ko": ["모양 및 구조", "제품설명", "작용원리"],
+    "intended_use_ko": ["사용목적"]
+}
+
+REQUIRED_FIELDS = ["product_name_ko", "risk_class", "approval_number"]
+# Fields the full LLM extraction fills in (model_name is not asked for)
+SCHEMA_FIELDS = [
+    "product_name_ko", "risk_class", "approval_number", "approval_date",
+    "device_description_ko", "intended_use_ko"
+]
+
+SEPARATOR = r"\s*[:：\t]\s*|\s+"
+HANGUL = re.compile(r"[가-힣]")
+
+
+def _clean_risk_class(value):
+    match = re.search(r"([1-4])\s*등급|^\s*([1-4])\s*$|([IV]{1,3})\b", value)
+    if not match:
+        return ""
+    if match.group(3):
+        return {"I": "1", "II": "2", "III": "3", "IV": "4"}.get(match.group(3), "")
+    return match.group(1) or match.group(2)
+
+
+def _clean_approval_number(value):
+    return value.strip() if re.search(r"\d", value) else ""
+
+
+def _clean_date(value):
+    match = re.search(r"(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})", value)
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+CLEANERS = {
+    "risk_class": _clean_risk_class,
+    "approval_number": _clean_approval_number,
+    "approval_date": _clean_date
+}
+
+
+def _label_value(lines, i, label):
+    line = lines[i]
+    if line == label:
+        # Value on the next non-empty line, unless that is another label
+        for nxt in lines[i + 1:i + 3]:
+            if nxt and not any(nxt.startswith(l) for labels in FIELD_LABELS.values() for l in labels):
+                return nxt
+        return ""
+
+    match = re.match(rf"{re.escape(label)}(?:{SEPARATOR})(.+)$", line)
+    return match.group(1).strip() if match else ""
+
+
+def parse_detail_text(text):
+    lines = [line.strip() for line in (text or "").splitlines()]
+    fields = {key: "" for key in FIELD_LABELS}
+
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        for key, labels in FIELD_LABELS.items():
+            if fields[key]:
+                continue
+            for label in labels:
+                if not line.startswith(label):
+                    continue
+                value = _label_value(lines, i, label)
+                value = CLEANERS.get(key, str.strip)(value)
+                if value:
+                    fields[key] = value
+                    break
+
+    return fields
+
+
+def is_complete(fields):
+    return all(fields.get(key) for key in REQUIRED_FIELDS)
+
+
+def needs_translation(text):
+    return bool(text and HANGUL.search(text))
@@ -0,0 +1,519 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+from mfds_sqlite import connect_store, create_store_dir
+from mfds_tracing import span
+from mfds_workspace import RUN_MANIFEST, RUNS_DIR, load_run_manifest
+
+# ==============================
+# EVIDENCE ARCHIVE
+# ==============================
+# Audit store for the e-Medi evidence behind every review. The evidence
+# is otherwise kept as pretty-printed JSON in each workspace, and most of
+# a captured page is site chrome (menus, footer) that is the same for
+# every product.
+#   chunks        : visible_text split into line-aligned chunks, stored
+#                   once per content hash (sha256), deflate-compressed
+#                   with a preset dictionary of e-Medi field labels
+#   reviews       : (review ID, version) -> evidence metadata, text hash
+#   review_chunks : (review ID, version) -> ordered chunk list
+# Chunk boundaries depend only on line content (a line ends a chunk when
+# its CRC is divisible by CHUNK_TARGET_LINES, or the chunk reaches
+# CHUNK_MAX_BYTES). The same menu block therefore splits into the same
+# chunks wherever it sits on the page.
+#
+# Entries are never overwritten: storing other evidence for a review ID
+# (a --refresh rerun, a resumed batch item) adds a version, so the
+# evidence every earlier report was built on stays in the audit trail.
+# Storing evidence identical to the latest version adds nothing.
+# get(review_id) rebuilds the latest version (or the given one, or the
+# latest with a given text hash) with one indexed query and checks the
+# exact original visible_text against its stored sha256; versions()
+# lists them all. Review IDs are run IDs for single reviews and
+# "<batch_id>/<index>" for batch items.
+#
+# Stage manifests (mfds_incremental stages.json, including checkpoints)
+# do not embed the evidence: StageGraph archives it and records only a
+# reference {"archived_evidence": <review_id>, "version": ..., "text_sha256": ...},
+# which it resolves through this module to that exact version.
+#
+#   python mfds_evidence_archive.py --import output       # existing workspaces
+#   python mfds_evidence_archive.py --show <review_id> [--version N]
+#   python mfds_evidence_archive.py --history <review_id>
+#   python mfds_evidence_archive.py --verify --report
+
+ARCHIVE_PATH = os.getenv("MFDS_EVIDENCE_ARCHIVE_PATH", "output/archive/evidence_archive.sqlite3")
+ARCHIVE_ENABLED = os.getenv("MFDS_EVIDENCE_ARCHIVE", "1") != "0"
+
+CHUNK_TARGET_LINES = 8
+CHUNK_MAX_BYTES = 4096
+COMPRESSION_LEVEL = 9
+SQL_VARIABLES_PER_QUERY = 500
+
+# Stored chunks depend on these exact bytes: never edit them, add a new
+# codec with a new dictionary instead
+DICTIONARY_CODEC = "deflate-dict1"
+COMPRESSION_DICTIONARY = (
+    "제품 상세정보\n품목명\t제품명\t모델명\t등급\t1등급\t2등급\t3등급\t4등급\t"
+    "품목허가번호\t품목인증번호\t품목신고번호\t품목허가일자\t품목인증일자\t품목신고일자\t"
+    "업체명\t제조원\t제조국\t수입업체\t모양 및 구조\t제품설명\t작용원리\t사용목적\t"
+    "사용방법\t사용시 주의사항\t저장방법\t포장단위\t원재료\t성능\t품목분류번호\t"
+    "제허 호\t제인 호\t제신 호\t(주)\t식품의약품안전처 의료기기 측정하는 데 사용\n"
+).encode("utf-8")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id      INTEGER PRIMARY KEY,
+    chunk_hash    TEXT NOT NULL UNIQUE,
+    codec         TEXT NOT NULL,
+    data          BLOB NOT NULL,
+    raw_bytes     INTEGER NOT NULL,
+    stored_bytes  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id     TEXT NOT NULL,
+    version       INTEGER NOT NULL,
+    product_name  TEXT,
+    evidence      TEXT NOT NULL,
+    text_sha256   TEXT NOT NULL,
+    text_bytes    INTEGER NOT NULL,
+    json_bytes    INTEGER NOT NULL,
+    stored_at     REAL NOT NULL,
+    PRIMARY KEY (review_id, version)
+);
+CREATE TABLE IF NOT EXISTS review_chunks (
+    review_id  TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    seq        INTEGER NOT NULL,
+    chunk_id   INTEGER NOT NULL,
+    PRIMARY KEY (review_id, version, seq)
+) WITHOUT ROWID;
+"""
+
+# Archives written before versioning: one entry per review, kept as version 1
+UNVERSIONED_MIGRATION = """
+ALTER TABLE reviews RENAME TO reviews_unversioned;
+ALTER TABLE review_chunks RENAME TO review_chunks_unversioned;
+{schema}
+INSERT INTO reviews
+    SELECT review_id, 1, product_name, evidence, text_sha256, text_bytes, json_bytes, stored_at
+    FROM reviews_unversioned;
+INSERT INTO review_chunks SELECT review_id, 1, seq, chunk_id FROM review_chunks_unversioned;
+DROP TABLE reviews_unversioned;
+DROP TABLE review_chunks_unversioned;
+""".format(schema=SCHEMA)
+
+
+def sha256_hex(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_chunks(text):
+    # keepends: "".join(chunks) == text, whatever the line endings
+    chunks, current, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        encoded = line.encode("utf-8")
+        current.append(line)
+        size += len(encoded)
+        if zlib.crc32(encoded) % CHUNK_TARGET_LINES == 0 or size >= CHUNK_MAX_BYTES:
+            chunks.append("".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def encode_chunk(chunk):
+    raw = chunk.encode("utf-8")
+    # Raw deflate (no header or checksum: chunks are small and hashed)
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=COMPRESSION_DICTIONARY)
+    data = compressor.compress(raw) + compressor.flush()
+    if len(data) < len(raw):
+        return DICTIONARY_CODEC, data
+    return "raw", raw
+
+
+def decode_chunk(codec, data):
+    if codec == DICTIONARY_CODEC:
+        decompressor = zlib.decompressobj(-15, zdict=COMPRESSION_DICTIONARY)
+        data = decompressor.decompress(data) + decompressor.flush()
+    elif codec != "raw":
+        raise ValueError(f"Unknown chunk codec {codec}")
+    return bytes(data).decode("utf-8")
+
+
+def evidence_json_bytes(raw_evidence):
+    # Size of the evidence as written to the workspace (write_json)
+    return len(json.dumps(raw_evidence, indent=2, ensure_ascii=False).encode("utf-8"))
+
+
+class EvidenceArchive:
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._stats = {"stores": 0, "reads": 0, "chunks_new": 0, "chunks_shared": 0}
+
+        create_store_dir(path)
+        with self._connect() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(reviews)")]
+            if columns and "version" not in columns:
+                conn.executescript(UNVERSIONED_MIGRATION)
+            else:
+                conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect_store(self.path)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    # ---------- stores ----------
+
+    def put(self, review_id, raw_evidence, product_name=None):
+        text = raw_evidence.get("visible_text") or ""
+        text_sha256 = sha256_hex(text)
+        # Key order is kept; the text goes back in its place on read
+        evidence = json.dumps(dict(raw_evidence, visible_text=None), ensure_ascii=False)
+        chunks = split_chunks(text)
+        hashes = [sha256_hex(chunk) for chunk in chunks]
+
+        with self._connect() as conn:
+            latest = conn.execute(
+                "SELECT version, evidence, text_sha256 FROM reviews WHERE review_id = ? "
+                "ORDER BY version DESC LIMIT 1",
+                (review_id,)
+            ).fetchone()
+            if latest and latest[1:] == (evidence, text_sha256):
+                return {"chunks": len(chunks), "chunks_new": 0, "version": latest[0]}
+
+            chunk_ids = self._chunk_ids(conn, set(hashes))
+            new = 0
+            for chunk, chunk_hash in zip(chunks, hashes):
+                if chunk_hash in chunk_ids:
+                    continue
+                codec, data = encode_chunk(chunk)
+                # OR IGNORE: another process may store the same chunk first
+                conn.execute(
+                    "INSERT OR IGNORE INTO chunks (chunk_hash, codec, data, raw_bytes, stored_bytes) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (chunk_hash, codec, data, len(chunk.encode("utf-8")), len(data))
+                )
+                chunk_ids.update(self._chunk_ids(conn, {chunk_hash}))
+                new += 1
+
+            # Next version number taken inside the insert: another process
+            # may add a version of the same review at the same time
+            conn.execute(
+                "INSERT INTO reviews "
+                "(review_id, version, product_name, evidence, text_sha256, text_bytes, json_bytes, stored_at) "
+                "SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?, ?, ?, ? FROM reviews WHERE review_id = ?",
+                (
+                    review_id,
+                    product_name,
+                    evidence,
+                    text_sha256,
+                    len(text.encode("utf-8")),
+                    evidence_json_bytes(raw_evidence),
+                    time.time(),
+                    review_id
+                )
+            )
+            (version,) = conn.execute(
+                "SELECT MAX(version) FROM reviews WHERE review_id = ?", (review_id,)
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO review_chunks (review_id, version, seq, chunk_id) VALUES (?, ?, ?, ?)",
+                [(review_id, version, seq, chunk_ids[chunk_hash]) for seq, chunk_hash in enumerate(hashes)]
+            )
+
+        self._count("stores")
+        self._count("chunks_new", new)
+        self._count("chunks_shared", len(chunks) - new)
+        return {"chunks": len(chunks), "chunks_new": new, "version": version}
+
+    def _chunk_ids(self, conn, hashes):
+        hashes = list(hashes)
+        found = {}
+        for i in range(0, len(hashes), SQL_VARIABLES_PER_QUERY):
+            part = hashes[i:i + SQL_VARIABLES_PER_QUERY]
+            found.update(conn.execute(
+                f"SELECT chunk_hash, chunk_id FROM chunks WHERE chunk_hash IN ({','.join('?' * len(part))})",
+                part
+            ).fetchall())
+        return found
+
+    # ---------- lookups ----------
+
+    def get(self, review_id, version=None, text_sha256=None):
+        # Latest version, unless a version number or text hash is given
+        query = "SELECT version, evidence, text_sha256 FROM reviews WHERE review_id = ?"
+        params = [review_id]
+        if version is not None:
+            query += " AND version = ?"
+            params.append(version)
+        if text_sha256 is not None:
+            query += " AND text_sha256 = ?"
+            params.append(text_sha256)
+
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY version DESC LIMIT 1", params).fetchone()
+            if not row:
+                return None
+            chunks = conn.execute(
+                "SELECT c.codec, c.data FROM review_chunks rc JOIN chunks c ON c.chunk_id = rc.chunk_id "
+                "WHERE rc.review_id = ? AND rc.version = ? ORDER BY rc.seq",
+                (review_id, row[0])
+            ).fetchall()
+
+        version, evidence, text_sha256 = row
+        text = "".join(decode_chunk(codec, data) for codec, data in chunks)
+        if sha256_hex(text) != text_sha256:
+            raise ValueError(f"Archived evidence for {review_id} version {version} does not match its sha256")
+
+        self._count("reads")
+        evidence = json.loads(evidence)
+        evidence["visible_text"] = text
+        return evidence
+
+    def versions(self, review_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT version, evidence, text_sha256, stored_at FROM reviews WHERE review_id = ? "
+                "ORDER BY version",
+                (review_id,)
+            ).fetchall()
+        return [
+            {
+                "version": version,
+                "access_date": json.loads(evidence).get("access_date"),
+                "text_sha256": text_sha256,
+                "stored_at": stored_at
+            }
+            for version, evidence, text_sha256, stored_at in rows
+        ]
+
+    def review_ids(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT review_id FROM reviews ORDER BY review_id")]
+
+    # ---------- reporting ----------
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def report(self):
+        with self._connect() as conn:
+            reviews, versions, text_bytes, json_bytes, metadata_bytes = conn.execute(
+                "SELECT COUNT(DISTINCT review_id), COUNT(*), COALESCE(SUM(text_bytes), 0), "
+                "COALESCE(SUM(json_bytes), 0), COALESCE(SUM(LENGTH(CAST(evidence AS BLOB))), 0) FROM reviews"
+            ).fetchone()
+            chunks, unique_bytes, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM chunks"
+            ).fetchone()
+            (chunk_refs,) = conn.execute("SELECT COUNT(*) FROM review_chunks").fetchone()
+
+        # Chunks, metadata and 4 bytes per chunk reference; the SQLite
+        # file itself rounds up to whole pages (small archives look big)
+        archived_bytes = stored_bytes + metadata_bytes + 4 * chunk_refs
+        file_bytes = sum(
+            os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path)
+        )
+        return {
+            "reviews": reviews,
+            "versions": versions,
+            "chunk_refs": chunk_refs,
+            "unique_chunks": chunks,
+            "text_bytes": text_bytes,
+            "workspace_json_bytes": json_bytes,
+            "unique_text_bytes": unique_bytes,
+            "stored_chunk_bytes": stored_bytes,
+            "archived_bytes": archived_bytes,
+            "archive_file_bytes": file_bytes,
+            "dedup_saved_ratio": round(1 - unique_bytes / text_bytes, 3) if text_bytes else 0.0,
+            "compression_saved_ratio": round(1 - stored_bytes / unique_bytes, 3) if unique_bytes else 0.0,
+            "saved_vs_json_ratio": round(1 - archived_bytes / json_bytes, 3) if json_bytes else 0.0
+        }
+
+
+# ==============================
+# PROCESS-WIDE ARCHIVE
+# ==============================
+_default_archive = None
+_default_archive_lock = threading.Lock()
+
+
+def get_evidence_archive():
+    global _default_archive
+    with _default_archive_lock:
+        if _default_archive is None:
+            _default_archive = EvidenceArchive()
+        return _default_archive
+
+
+# ==============================
+# EVIDENCE REFERENCES
+# ==============================
+EVIDENCE_REF_KEY = "archived_evidence"
+
+
+def workspace_review(workspace_dir):
+    # (review_id, product_name) of a run workspace or batch item checkpoint
+    if os.path.exists(os.path.join(workspace_dir, RUN_MANIFEST)):
+        manifest = load_run_manifest(workspace_dir)
+        return manifest["run_id"], manifest.get("product_name")
+    parent = os.path.dirname(os.path.abspath(workspace_dir))
+    if os.path.basename(parent) == "checkpoints":
+        return f"{os.path.basename(os.path.dirname(parent))}/{os.path.basename(workspace_dir)}", None
+    return os.path.basename(os.path.abspath(workspace_dir)), None
+
+
+def archive_evidence(review_id, raw_evidence, product_name=None):
+    # The reference to keep instead of the evidence; None when disabled
+    if not ARCHIVE_ENABLED or not raw_evidence:
+        return None
+    with span("evidence_archive.put", review_id=review_id):
+        stored = get_evidence_archive().put(review_id, raw_evidence, product_name=product_name)
+    return {
+        EVIDENCE_REF_KEY: review_id,
+        "version": stored["version"],
+        "text_sha256": sha256_hex(raw_evidence.get("visible_text") or "")
+    }
+
+
+def is_evidence_ref(output):
+    return isinstance(output, dict) and EVIDENCE_REF_KEY in output
+
+
+def load_archived_evidence(ref):
+    # The version the reference was made for (references written before
+    # versioning carry only the text hash); None if the archive lost it
+    with span("evidence_archive.get", review_id=ref[EVIDENCE_REF_KEY]):
+        return get_evidence_archive().get(
+            ref[EVIDENCE_REF_KEY], version=ref.get("version"), text_sha256=ref["text_sha256"]
+        )
+
+
+# ==============================
+# IMPORT EXISTING WORKSPACES
+# ==============================
+def find_archivable_workspaces(base_dir):
+    # (review_id, product_name, workspace_dir) for run workspaces and
+    # batch item checkpoints under base_dir
+    found = []
+    for root, dirs, files in os.walk(base_dir):
+        dirs.sort()
+        if RUN_MANIFEST in files or os.path.basename(os.path.dirname(root)) == "checkpoints":
+            found.append((*workspace_review(root), root))
+    return found
+
+
+def import_workspaces(base_dir):
+    # Evidence embedded in older stages.json files is replaced by a
+    # reference once it is archived
+    from mfds_incremental import LEGACY_STEP3_FILE, StageGraph
+
+    imported = 0
+    for review_id, product_name, workspace_dir in find_archivable_workspaces(base_dir):
+        graph = StageGraph(workspace_dir)
+        entry = graph.stages.get("step3_evidence")
+        legacy_path = os.path.join(workspace_dir, LEGACY_STEP3_FILE)
+
+        if entry and entry["output"] and not is_evidence_ref(entry["output"]):
+            entry["output"] = archive_evidence(review_id, entry["output"], product_name)
+            graph.save()
+            imported += 1
+        elif not entry and os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                archive_evidence(review_id, json.load(f), product_name)
+            imported += 1
+    return imported
+
+
+def verify_archive(archive=None):
+    archive = archive or get_evidence_archive()
+    failures = []
+    for review_id in archive.review_ids():
+        for entry in archive.versions(review_id):
+            try:
+                archive.get(review_id, version=entry["version"])
+            except (ValueError, UnicodeDecodeError, zlib.error) as e:
+                failures.append(f"{review_id} version {entry['version']}: {e}")
+    return failures
+
+
+def print_report(report):
+    print(f"[INFO] {report['reviews']} reviews ({report['versions']} versions), {report['unique_chunks']} unique chunks "
+          f"({report['chunk_refs']} references)")
+    print(f"[INFO] Page text {report['text_bytes']:,} B -> {report['unique_text_bytes']:,} B after dedup "
+          f"({report['dedup_saved_ratio']:.0%} saved) -> {report['stored_chunk_bytes']:,} B compressed "
+          f"({report['compression_saved_ratio']:.0%} saved)")
+    print(f"[INFO] Archived {report['archived_bytes']:,} B with metadata vs {report['workspace_json_bytes']:,} B "
+          f"of workspace evidence JSON ({report['saved_vs_json_ratio']:.0%} saved); "
+          f"archive file {report['archive_file_bytes']:,} B")
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--import", dest="import_dir", nargs="?", const=RUNS_DIR,
+                        help="Archive the evidence of every workspace and batch item under this directory "
+                             "and keep only a reference in their stages.json")
+    parser.add_argument("--show", metavar="REVIEW_ID", help="Print the archived evidence of one review")
+    parser.add_argument("--version", type=int, help="With --show, the version to print instead of the latest")
+    parser.add_argument("--history", metavar="REVIEW_ID", help="List the archived versions of one review")
+    parser.add_argument("--text", action="store_true", help="With --show, print only the exact visible_text")
+    parser.add_argument("--verify", action="store_true", help="Rebuild every review and check its text hash")
+    parser.add_argument("--report", action="store_true", help="Print the storage savings")
+    args = parser.parse_args()
+
+    if not ARCHIVE_ENABLED:
+        print("[ERROR] The evidence archive is disabled (MFDS_EVIDENCE_ARCHIVE=0)")
+        sys.exit(1)
+    archive = get_evidence_archive()
+
+    if args.import_dir:
+        imported = import_workspaces(args.import_dir)
+        print(f"[OK] Archived the evidence of {imported} reviews from {args.import_dir}")
+
+    if args.show:
+        evidence = archive.get(args.show, version=args.version)
+        if evidence is None:
+            print(f"[ERROR] No archived evidence for {args.show}")
+            sys.exit(1)
+        if args.text:
+            sys.stdout.write(evidence["visible_text"])
+        else:
+            print(json.dumps(evidence, indent=2, ensure_ascii=False))
+
+    if args.history:
+        versions = archive.versions(args.history)
+        if not versions:
+            print(f"[ERROR] No archived evidence for {args.history}")
+            sys.exit(1)
+        for entry in versions:
+            stored_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(entry["stored_at"]))
+            print(f"{entry['version']}\tstored {stored_at}\taccessed {entry['access_date']}\t"
+                  f"sha256 {entry['text_sha256'][:12]}")
+
+    if args.verify:
+        failures = verify_archive(archive)
+        for failure in failures:
+            print(f"[ERROR] {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"[OK] All {len(archive.review_ids())} archived reviews rebuild to their original text")
+
+    if args.report or not (args.import_dir or args.show or args.history or args.verify):
+        print_report(archive.report())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+
+from mfds_sqlite import connect_store, create_store_dir
+
+# ==============================
+# STEP-3 EVIDENCE CACHE
+# ==============================
+# Persistent SQLite cache of captured e-Medi detail pages.
+#   search_terms : normalized search term -> detail-page URL key
+#   evidence     : detail-page URL key    -> captured page (visible_text,
+#                  source_url, access_date, ...)
+# Entries expire CACHE_TTL_HOURS after capture and the least recently
+# used pages are evicted once CACHE_MAX_ENTRIES / CACHE_MAX_BYTES is hit.
+# Expired pages stay on disk until evicted: get_stale() still returns
+# them (marked "stale") while e-Medi is unavailable. It is a fallback
+# after get() already missed, so it counts "stale_served" rather than a
+# second lookup.
+# access_date is always the original capture time, never the cache read.
+
+CACHE_PATH = os.getenv("MFDS_EVIDENCE_CACHE_PATH", "output/cache/evidence_cache.sqlite3")
+CACHE_TTL_HOURS = float(os.getenv("MFDS_EVIDENCE_CACHE_TTL_HOURS", "24"))
+CACHE_MAX_ENTRIES = int(os.getenv("MFDS_EVIDENCE_CACHE_MAX_ENTRIES", "500"))
+CACHE_MAX_BYTES = int(os.getenv("MFDS_EVIDENCE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_terms (
+    term_key   TEXT PRIMARY KEY,
+    term       TEXT NOT NULL,
+    url_key    TEXT NOT NULL,
+    stored_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evidence (
+    url_key       TEXT PRIMARY KEY,
+    source_url    TEXT NOT NULL,
+    page_title    TEXT,
+    access_date   TEXT NOT NULL,
+    visible_text  TEXT NOT NULL,
+    content_hash  TEXT NOT NULL,
+    size_bytes    INTEGER NOT NULL,
+    stored_at     REAL NOT NULL,
+    last_used     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evidence_last_used ON evidence (last_used);
+"""
+
+
+def normalize_search_term(term):
+    term = unicodedata.normalize("NFKC", term or "")
+    return " ".join(term.lower().split())
+
+
+def sha256_hex(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EvidenceCache:
+    def __init__(self, path=CACHE_PATH, ttl_hours=CACHE_TTL_HOURS,
+                 max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stale_served": 0, "stores": 0, "evictions": 0}
+
+        create_store_dir(path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect_store(self.path)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    # ---------- lookups ----------
+
+    def get(self, search_term, allow_stale=False):
+        url_key = self._url_key(search_term)
+        if url_key is None:
+            self._count("misses")
+            return None
+        return self._get_evidence(url_key, allow_stale)
+
+    def get_by_url(self, source_url, allow_stale=False):
+        return self._get_evidence(sha256_hex(source_url), allow_stale)
+
+    def get_stale(self, search_term):
+        # The last capture however old, without counting another lookup
+        url_key = self._url_key(search_term)
+        if url_key is None:
+            return None
+        return self._get_evidence(url_key, allow_stale=True, counted=False)
+
+    def _url_key(self, search_term):
+        term_key = sha256_hex(normalize_search_term(search_term))
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url_key FROM search_terms WHERE term_key = ?", (term_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _get_evidence(self, url_key, allow_stale=False, counted=True):
+        now = time.time()
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source_url, page_title, access_date, visible_text, stored_at "
+                "FROM evidence WHERE url_key = ?",
+                (url_key,)
+            ).fetchone()
+
+            if not row:
+                if counted:
+                    self._count("misses")
+                return None
+
+            source_url, page_title, access_date, visible_text, stored_at = row
+
+            stale = self.ttl_seconds <= 0 or now - stored_at > self.ttl_seconds
+            if stale and not allow_stale:
+                self._count("expired")
+                self._count("misses")
+                return None
+
+            conn.execute("UPDATE evidence SET last_used = ? WHERE url_key = ?", (now, url_key))
+
+        self._count("hits" if counted else "stale_served")
+        return {
+            "source_url": source_url,
+            "page_title": page_title,
+            "access_date": access_date,
+            "visible_text": visible_text,
+            "human_verified": False,
+            "served_from_cache": True,
+            "stale": stale
+        }
+
+    # ---------- stores ----------
+
+    def put(self, search_term, raw_evidence):
+        now = time.time()
+        url_key = sha256_hex(raw_evidence["source_url"])
+        visible_text = raw_evidence["visible_text"]
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO evidence "
+                "(url_key, source_url, page_title, access_date, visible_text, "
+                " content_hash, size_bytes, stored_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url_key,
+                    raw_evidence["source_url"],
+                    raw_evidence.get("page_title"),
+                    raw_evidence["access_date"],
+                    visible_text,
+                    sha256_hex(visible_text),
+                    len(visible_text.encode("utf-8")),
+                    now,
+                    now
+                )
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO search_terms (term_key, term, url_key, stored_at) "
+                "VALUES (?, ?, ?, ?)",
+                (sha256_hex(normalize_search_term(search_term)), search_term, url_key, now)
+            )
+            self._evict(conn)
+
+        self._count("stores")
+
+    def _evict(self, conn):
+        # Least recently used first, until both limits are respected
+        while True:
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM evidence"
+            ).fetchone()
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            if count <= 1:
+                break
+            (url_key,) = conn.execute(
+                "SELECT url_key FROM evidence ORDER BY last_used ASC LIMIT 1"
+            ).fetchone()
+            conn.execute("DELETE FROM evidence WHERE url_key = ?", (url_key,))
+            conn.execute("DELETE FROM search_terms WHERE url_key = ?", (url_key,))
+            self._count("evictions")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_terms")
+            conn.execute("DELETE FROM evidence")
+
+    # ---------- reporting ----------
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+
+        with self._connect() as conn:
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM evidence"
+            ).fetchone()
+        stats["entries"] = count
+        stats["size_bytes"] = total_bytes
+        return stats
+
+
+# ==============================
+# PROCESS-WIDE CACHE
+# ==============================
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_evidence_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EvidenceCache()
+        return _default_cache
@@ -0,0 +1,195 @@
+import re
+import threading
+
+from mfds_emedi_parser import FIELD_LABELS, SCHEMA_FIELDS
+
+# ==============================
+# EVIDENCE REDUCTION
+# ==============================
+# The full-extraction LLM call used to receive the first 12000 characters
+# of the captured page body: navigation menus, footers and unrelated tabs
+# included. On long pages the product fields could be cut off. The
+# reducer splits the captured text into lines and keeps only the blocks
+# the Step-4 schema needs:
+#   - labelled field rows (name, model, class, approval number / date,
+#     description, intended use, manufacturer), plus the value lines
+#     that follow a bare label, up to the next label, and long lines that
+#     continue a multi-line value
+#   - any other line carrying a risk class or an approval-number pattern
+# Site chrome (menus, footer, copyright) is dropped.
+# Reduction to those blocks only applies to the labelled layout: the LLM
+# is called exactly when the parser could not read every field, and on
+# an unknown layout the name and description are unlabelled prose.
+# Unless a label of every extracted field (SCHEMA_FIELDS) is on the page,
+# every line except the site chrome is passed through ("passthrough").
+#
+# With max_chars the result is fitted to the LLM budget here, after
+# reduction: the schema-relevant lines are always kept (in page order),
+# and the other lines fill the remaining room from the top of the page,
+# so a long page no longer loses its product fields to a blind cut.
+#
+# Characters and estimated tokens saved are counted per call and in
+# process-wide totals (reduction_stats()).
+
+# Labels worth keeping besides the fields the parser reads
+EXTRA_LABELS = [
+    "업체명", "제조원", "제조업체", "수입업체", "제조국", "품목분류번호", "분류번호",
+    "원재료", "성능", "사용방법", "사용시 주의사항", "저장방법", "포장단위", "취소/취하"
+]
+RELEVANT_LABELS = sorted(
+    {label for labels in FIELD_LABELS.values() for label in labels} | set(EXTRA_LABELS),
+    key=len,
+    reverse=True
+)
+
+RELEVANT_PATTERNS = [
+    re.compile(r"[1-4]\s*등급"),
+    re.compile(r"제\s*[허인신]\s*\d{2}\s*-\s*\d+\s*호")
+]
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in [
+        r"copyright", r"all rights reserved", r"대표전화", r"개인정보\s*처리방침",
+        r"이용약관", r"바로가기", r"로그인", r"회원가입", r"사이트맵"
+    ]
+]
+
+# e-Medi navigation entries, as whole lines (mfds_mock_emedi.NAV_MENU)
+SITE_MENU_LINES = {
+    "의료기기 검색", "품목허가 정보", "품목인증 정보", "품목신고 정보", "등급분류 정보",
+    "임상시험 정보", "회수·판매중지", "UDI 정보", "공지사항", "자료실", "FAQ", "고객센터",
+    "메뉴", "전체메뉴", "검색", "닫기", "이전", "다음", "목록", "인쇄"
+}
+
+MAX_BLOCK_LINES = 8
+CONTINUATION_MIN_CHARS = 20
+
+
+def estimate_tokens(text):
+    # No tokenizer dependency: ~4 UTF-8 bytes per token holds for mixed
+    # Korean/English text with the GPT-4o family (Hangul is 3 bytes)
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _label_of(line):
+    # "등급" labels a field; "등급분류 정보" is a menu entry
+    return next((
+        label for label in RELEVANT_LABELS
+        if line.startswith(label) and (len(line) == len(label) or line[len(label)] in " \t:：")
+    ), None)
+
+
+def _is_boilerplate(line):
+    return line in SITE_MENU_LINES or any(p.search(line) for p in BOILERPLATE_PATTERNS)
+
+
+def _fit(lines, keep, rest, max_chars):
+    # All of keep, then lines of rest from the top while they fit
+    budget = max_chars - sum(len(lines[i]) + 1 for i in keep)
+    chosen = set(keep)
+    for i in rest:
+        if len(lines[i]) + 1 > budget:
+            break
+        chosen.add(i)
+        budget -= len(lines[i]) + 1
+    return "\n".join(lines[i] for i in sorted(chosen))[:max_chars]
+
+
+def missing_field_labels(lines):
+    labels = {_label_of(line) for line in lines if line}
+    return [
+        field for field in SCHEMA_FIELDS
+        if not any(label in labels for label in FIELD_LABELS[field])
+    ]
+
+
+def reduce_evidence(text, max_chars=None):
+    lines = [line.strip() for line in (text or "").splitlines()]
+    keep = set()
+    missing = missing_field_labels(lines)
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line or _is_boilerplate(line):
+            i += 1
+            continue
+
+        label = _label_of(line)
+        if label:
+            keep.add(i)
+            # A bare label's value is on the next line; any value may
+            # continue on long lines (menus and links are short)
+            needs_value = line == label
+            j = i + 1
+            while j < len(lines) and j <= i + MAX_BLOCK_LINES:
+                following = lines[j]
+                if not following:
+                    j += 1
+                    continue
+                if _label_of(following) or _is_boilerplate(following):
+                    break
+                if not needs_value and len(following) < CONTINUATION_MIN_CHARS:
+                    break
+                keep.add(j)
+                needs_value = False
+                j += 1
+            i = j
+            continue
+
+        if any(p.search(line) for p in RELEVANT_PATTERNS):
+            keep.add(i)
+        i += 1
+
+    keep = {i for i in keep if lines[i]}
+    passthrough = bool(missing) or not keep
+    rest = []
+    if passthrough:
+        rest = [i for i, line in enumerate(lines) if line and i not in keep and not _is_boilerplate(line)]
+    reduced = "\n".join(lines[i] for i in sorted(keep | set(rest)))
+    if max_chars is not None and len(reduced) > max_chars:
+        reduced = _fit(lines, sorted(keep), rest, max_chars)
+
+    stats = {
+        "chars_in": len(text or ""),
+        "chars_out": len(reduced),
+        "tokens_in_est": estimate_tokens(text or ""),
+        "tokens_out_est": estimate_tokens(reduced),
+        "lines_in": sum(1 for line in lines if line),
+        "lines_out": len(reduced.splitlines()),
+        "passthrough": passthrough,
+        "missing_labels": missing
+    }
+    stats["chars_saved"] = stats["chars_in"] - stats["chars_out"]
+    stats["tokens_saved_est"] = stats["tokens_in_est"] - stats["tokens_out_est"]
+    _totals.add(stats)
+    return reduced, stats
+
+
+# ==============================
+# PROCESS-WIDE TOTALS
+# ==============================
+class ReductionTotals:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "passthrough": 0, "chars_in": 0, "chars_saved": 0, "tokens_saved_est": 0}
+
+    def add(self, stats):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["passthrough"] += int(stats["passthrough"])
+            self._stats["chars_in"] += stats["chars_in"]
+            self._stats["chars_saved"] += stats["chars_saved"]
+            self._stats["tokens_saved_est"] += stats["tokens_saved_est"]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["chars_saved_ratio"] = round(stats["chars_saved"] / stats["chars_in"], 3) if stats["chars_in"] else 0.0
+        return stats
+
+
+_totals = ReductionTotals()
+
+
+def reduction_stats():
+    return _totals.stats()
@@ -0,0 +1,480 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from mfds_evidence_archive import archive_evidence, is_evidence_ref, load_archived_evidence, workspace_review
+from mfds_workspace import RUNS_DIR, is_run_active, list_run_workspaces, load_run_manifest, workspace_dir_for
+
+# ==============================
+# INCREMENTAL STAGE GRAPH
+# ==============================
+# Each review workspace keeps a stage manifest (stages.json) with the
+# output of every stage and a fingerprint of what produced it:
+#
+#   step3_evidence      <- product + country              (re-fetched only on --refresh)
+#   step4_understanding <- step3 output + Step-4 code (prompts, model, parser, builders)
+#   step5_8_sections    <- step4 output + step5-8 module (rules, RULES_META)
+#   step9_conclusion    <- step4 output + step9 module
+#   master_document     <- step1-2 static + step4/5-8/9 outputs + master module
+#
+# A stage re-executes only when its fingerprint changes or its output is
+# missing. Fingerprints use output content hashes, so an upstream stage
+# that re-runs and produces the same content does not invalidate the
+# stages after it. A rules edit in build_step5 therefore re-renders
+# Steps 5-8 and the document in milliseconds. It does not touch e-Medi,
+# and it does not call the LLM.
+#
+#   python mfds_incremental.py --archive output/runs
+#   python mfds_incremental.py --run-id <run_id> --force step4_understanding
+#
+# The same manifest doubles as a checkpoint while a review is running
+# (ReviewCheckpoint): the captured evidence and the Step-4 interpretation
+# are saved as soon as they exist. An explicit retry of the same run ID
+# resumes from them in place instead of scraping and calling the LLM
+# again. find_unfinished_review finds the run ID to retry for a product,
+# skipping runs that are still in progress.
+#
+# The evidence itself is not embedded: step3_evidence is stored in the
+# deduplicated evidence archive (mfds_evidence_archive) under the
+# workspace's review ID, and the manifest keeps a reference to it.
+# output_sha256 is still the hash of the full evidence. A reference the
+# archive can no longer resolve counts as a missing output.
+
+STAGES_FILE = "stages.json"
+
+STAGES = [
+    "step3_evidence",
+    "step4_understanding",
+    "step5_8_sections",
+    "step9_conclusion",
+    "master_document"
+]
+
+LEGACY_STEP3_FILE = "step3_raw_evidence.json"
+
+# Stages saved while a review runs; the rest are milliseconds to rebuild
+CHECKPOINT_STAGES = ["step3_evidence", "step4_understanding"]
+RESUME_MAX_AGE_HOURS = float(os.getenv("MFDS_RESUME_MAX_AGE_HOURS", "24"))
+
+
+def content_hash(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def code_fingerprint(*parts):
+    # Modules and functions by source, constants by value
+    digest = hashlib.sha256()
+    for part in parts:
+        if inspect.ismodule(part) or inspect.isfunction(part):
+            digest.update(inspect.getsource(part).encode("utf-8"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def stage_code_versions():
+    # Imported lazily: mfds_review_pipeline imports this module
+    import mfds_emedi_parser
+    import mfds_evidence_reducer
+    import mfds_json_stream
+    import mfds_llm_batcher
+    import mfds_master_review_assembler as master_assembler
+    import mfds_step3_to_step4_poc as step3_to_step4
+    import mfds_step5_to_step8_assembler_poc as step5_to_step8
+    import mfds_step9_conclusion_assembler_poc as step9_conclusion
+
+    return {
+        "step3_evidence": "evidence-v1",
+        "step4_understanding": code_fingerprint(
+            step3_to_step4.LLM_SYSTEM_PROMPT,
+            step3_to_step4.LLM_PROMPT_TEMPLATE,
+            step3_to_step4.LLM_TRANSLATION_PROMPT_TEMPLATE,
+            step3_to_step4.OPENAI_MODEL,
+            step3_to_step4.LLM_TEMPERATURE,
+            step3_to_step4.LLM_MAX_EVIDENCE_CHARS,
+            step3_to_step4.LLM_EXTRACTION_SCHEMA,
+            step3_to_step4.META,
+            mfds_emedi_parser,
+            mfds_evidence_reducer,
+            mfds_json_stream,
+            mfds_llm_batcher,
+            step3_to_step4.request_llm_json,
+            step3_to_step4.send_packed_llm_request,
+            step3_to_step4.safe_json_parse,
+            step3_to_step4.normalize_risk_class,
+            step3_to_step4.call_llm,
+            step3_to_step4.translate_fields,
+            step3_to_step4.interpret_evidence,
+            step3_to_step4.build_about_device,
+            step3_to_step4.build_classification,
+            step3_to_step4.build_classification_section,
+            step3_to_step4.build_fallback_step4,
+            step3_to_step4.build_step4_understanding,
+            step3_to_step4.build_step4
+        ),
+        "step5_8_sections": code_fingerprint(step5_to_step8),
+        "step9_conclusion": code_fingerprint(step9_conclusion),
+        "master_document": code_fingerprint(master_assembler)
+    }
+
+
+def stage_fingerprint(code_version, **inputs):
+    return content_hash({"code": code_version, "inputs": inputs})
+
+
+class StageGraph:
+    def __init__(self, workspace_dir):
+        self.workspace_dir = workspace_dir
+        self.path = os.path.join(workspace_dir, STAGES_FILE)
+        self.stages = {}
+        self.executed = []
+        self.skipped = []
+        self._archived = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stages = json.load(f).get("stages", {})
+
+    def output(self, name):
+        entry = self.stages.get(name)
+        if not entry:
+            return None
+        output = entry["output"]
+        if is_evidence_ref(output):
+            if name not in self._archived:
+                self._archived[name] = load_archived_evidence(output)
+            return self._archived[name]
+        return output
+
+    def output_hash(self, name):
+        entry = self.stages.get(name)
+        return entry["output_sha256"] if entry else None
+
+    def is_fresh(self, name, fingerprint):
+        entry = self.stages.get(name)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        if name == "master_document":
+            return os.path.exists(entry["output"]["output_file"])
+        if is_evidence_ref(entry["output"]):
+            return self.output(name) is not None
+        return True
+
+    def record(self, name, fingerprint, output, output_sha256=None):
+        output_sha256 = output_sha256 or content_hash(output)
+        stored = output
+        if name == "step3_evidence" and output:
+            previous = self.stages.get(name)
+            if previous and is_evidence_ref(previous["output"]) and previous["output_sha256"] == output_sha256:
+                stored = previous["output"]
+            else:
+                review_id, product_name = workspace_review(self.workspace_dir)
+                stored = archive_evidence(review_id, output, product_name) or output
+            self._archived[name] = output
+
+        self.stages[name] = {
+            "fingerprint": fingerprint,
+            "output": stored,
+            "output_sha256": output_sha256,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+
+    def run_stage(self, name, fingerprint, compute, force=False):
+        if not force and self.is_fresh(name, fingerprint):
+            self.skipped.append(name)
+            return self.output(name)
+
+        output, output_sha256 = compute()
+        self.record(name, fingerprint, output, output_sha256)
+        self.executed.append(name)
+        return output
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+
+# ==============================
+# FINGERPRINT CHAIN
+# ==============================
+def _step1_2_hash():
+    import mfds_master_review_assembler as master_assembler
+    return content_hash(master_assembler.load_step1_2())
+
+
+def _document_hash(output_file):
+    with open(output_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def record_review_stages(workspace_dir, review_key, raw_evidence, step4, step5_8, step9, output_file,
+                         versions=None):
+    # Called after a full review so the workspace can be re-rendered later
+    versions = versions or stage_code_versions()
+    graph = StageGraph(workspace_dir)
+
+    fingerprint = stage_fingerprint(versions["step3_evidence"], review_key=review_key)
+    graph.record("step3_evidence", fingerprint, raw_evidence)
+
+    fingerprint = stage_fingerprint(versions["step4_understanding"], step3=graph.output_hash("step3_evidence"))
+    graph.record("step4_understanding", fingerprint, step4)
+
+    for name, output in [("step5_8_sections", step5_8), ("step9_conclusion", step9)]:
+        fingerprint = stage_fingerprint(versions[name], step4=graph.output_hash("step4_understanding"))
+        graph.record(name, fingerprint, output)
+
+    graph.record(
+        "master_document",
+        _master_fingerprint(graph, versions),
+        {"output_file": output_file},
+        _document_hash(output_file)
+    )
+    graph.save()
+    return graph
+
+
+def _master_fingerprint(graph, versions):
+    return stage_fingerprint(
+        versions["master_document"],
+        step1_2=_step1_2_hash(),
+        step4=graph.output_hash("step4_understanding"),
+        step5_8=graph.output_hash("step5_8_sections"),
+        step9=graph.output_hash("step9_conclusion")
+    )
+
+
+# ==============================
+# CHECKPOINTS
+# ==============================
+class ReviewCheckpoint:
+    def __init__(self, workspace_dir, review_key, versions=None):
+        self.graph = StageGraph(workspace_dir)
+        self.review_key = review_key
+        self.versions = versions or stage_code_versions()
+        self.restored = []
+
+    def _fingerprint(self, name):
+        if name == "step3_evidence":
+            return stage_fingerprint(self.versions[name], review_key=self.review_key)
+        return stage_fingerprint(self.versions[name], step3=self.graph.output_hash("step3_evidence"))
+
+    def load(self, name):
+        # Output of a completed stage that is still valid, else None
+        if not self.graph.is_fresh(name, self._fingerprint(name)):
+            return None
+        output = self.graph.output(name)
+        if output is not None and name not in self.restored:
+            self.restored.append(name)
+        return output
+
+    def save(self, name, output):
+        if output is None:
+            return
+        fingerprint = self._fingerprint(name)
+        if self.graph.is_fresh(name, fingerprint) and self.graph.output_hash(name) == content_hash(output):
+            return
+        self.graph.record(name, fingerprint, output)
+        self.graph.save()
+
+
+def find_unfinished_review(product_name, country=None, exclude=None, base_dir=RUNS_DIR,
+                           max_age_hours=RESUME_MAX_AGE_HOURS):
+    # Newest run of this product that saved a checkpoint but no document
+    # and is not still running
+    cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
+
+    for workspace_dir in reversed(list_run_workspaces(base_dir)):
+        if exclude and os.path.abspath(workspace_dir) == os.path.abspath(exclude):
+            continue
+        if is_run_active(workspace_dir):
+            continue
+        try:
+            manifest = load_run_manifest(workspace_dir)
+        except (OSError, ValueError):
+            continue
+        if (manifest.get("created_at") or "") < cutoff:
+            continue
+        if manifest.get("product_name") != product_name or manifest.get("country") != country:
+            continue
+        stages = StageGraph(workspace_dir).stages
+        if "master_document" not in stages and any(name in stages for name in CHECKPOINT_STAGES):
+            return workspace_dir
+    return None
+
+
+# ==============================
+# RE-RUN
+# ==============================
+def rerun_review(workspace_dir, refresh=False, force=(), fetch_backend=None, versions=None):
+    import mfds_master_review_assembler as master_assembler
+    import mfds_step3_to_step4_poc as step3_to_step4
+    import mfds_step5_to_step8_assembler_poc as step5_to_step8
+    import mfds_step9_conclusion_assembler_poc as step9_conclusion
+    from mfds_catalog import get_catalog
+    from mfds_name_resolver import get_name_resolver
+    from mfds_single_flight import review_key
+
+    versions = versions or stage_code_versions()
+    manifest = load_run_manifest(workspace_dir)
+    product_name = manifest["product_name"]
+    graph = StageGraph(workspace_dir)
+
+    # Workspaces written before the manifest existed: seed from debug JSON
+    legacy_step3 = os.path.join(workspace_dir, LEGACY_STEP3_FILE)
+    if "step3_evidence" not in graph.stages and os.path.exists(legacy_step3):
+        with open(legacy_step3, "r", encoding="utf-8") as f:
+            graph.record(
+                "step3_evidence",
+                stage_fingerprint(versions["step3_evidence"], review_key=review_key(product_name, manifest.get("country"))),
+                json.load(f)
+            )
+
+    def fetch_evidence():
+        if not refresh:
+            raise RuntimeError(
+                f"No stored evidence in {workspace_dir}; re-run with --refresh to fetch it from e-Medi"
+            )
+        raw_evidence = step3_to_step4.collect_raw_evidence(
+            product_name,
+            write_output=False,
+            fetch_backend=fetch_backend,
+            catalog=get_catalog(),
+            name_resolver=get_name_resolver()
+        )
+        return raw_evidence, content_hash(raw_evidence)
+
+    raw_evidence = graph.run_stage(
+        "step3_evidence",
+        stage_fingerprint(versions["step3_evidence"], review_key=review_key(product_name, manifest.get("country"))),
+        fetch_evidence,
+        force=refresh or "step3_evidence" in force
+    )
+
+    def build_step4():
+        step4 = step3_to_step4.build_step4(product_name, raw_evidence)
+        return step4, content_hash(step4)
+
+    step4 = graph.run_stage(
+        "step4_understanding",
+        stage_fingerprint(versions["step4_understanding"], step3=graph.output_hash("step3_evidence")),
+        build_step4,
+        force="step4_understanding" in force
+    )
+
+    def build_step5_8():
+        step5_8 = step5_to_step8.assemble_sections(step4)
+        return step5_8, content_hash(step5_8)
+
+    def build_step9():
+        step9 = step9_conclusion.assemble_conclusion(step4)
+        return step9, content_hash(step9)
+
+    step5_8 = graph.run_stage(
+        "step5_8_sections",
+        stage_fingerprint(versions["step5_8_sections"], step4=graph.output_hash("step4_understanding")),
+        build_step5_8,
+        force="step5_8_sections" in force
+    )
+    step9 = graph.run_stage(
+        "step9_conclusion",
+        stage_fingerprint(versions["step9_conclusion"], step4=graph.output_hash("step4_understanding")),
+        build_step9,
+        force="step9_conclusion" in force
+    )
+
+    def build_document():
+        previous = graph.output("master_document")
+        output_file = master_assembler.run(
+            step4,
+            step5_8,
+            step9,
+            output_file=previous["output_file"] if previous else None,
+            output_dir=workspace_dir
+        )
+        return {"output_file": output_file}, _document_hash(output_file)
+
+    graph.run_stage(
+        "master_document",
+        _master_fingerprint(graph, versions),
+        build_document,
+        force="master_document" in force
+    )
+
+    graph.save()
+    return {
+        "run_id": manifest["run_id"],
+        "product_name": product_name,
+        "executed": graph.executed,
+        "skipped": graph.skipped,
+        "output_file": graph.output("master_document")["output_file"]
+    }
+
+
+def rerun_archive(base_dir=RUNS_DIR, refresh=False, force=(), fetch_backend=None):
+    versions = stage_code_versions()
+    results = []
+
+    for workspace_dir in list_run_workspaces(base_dir):
+        try:
+            results.append(rerun_review(
+                workspace_dir, refresh=refresh, force=force, fetch_backend=fetch_backend, versions=versions
+            ))
+        except Exception as e:
+            results.append({
+                "run_id": os.path.basename(workspace_dir),
+                "error": f"{type(e).__name__}: {e}",
+                "executed": [],
+                "skipped": []
+            })
+
+    return results
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--run-id", help="Re-run one review workspace")
+    target.add_argument("--archive", nargs="?", const=RUNS_DIR, help="Re-run every workspace under this directory")
+    parser.add_argument("--refresh", action="store_true", help="Fetch e-Medi evidence again")
+    parser.add_argument("--force", nargs="+", choices=STAGES, default=[], help="Re-execute these stages regardless")
+    parser.add_argument("--fetch-backend", choices=["auto", "http", "playwright"], default=None)
+    args, _ = parser.parse_known_args()
+
+    started = time.perf_counter()
+    if args.run_id:
+        results = [rerun_review(
+            workspace_dir_for(args.run_id), refresh=args.refresh, force=args.force, fetch_backend=args.fetch_backend
+        )]
+    else:
+        results = rerun_archive(args.archive, refresh=args.refresh, force=args.force, fetch_backend=args.fetch_backend)
+    elapsed = time.perf_counter() - started
+
+    counts = {name: 0 for name in STAGES}
+    for result in results:
+        if result.get("error"):
+            print(f"[ERROR] {result['run_id']}: {result['error']}")
+            continue
+        for name in result["executed"]:
+            counts[name] += 1
+        print(f"[OK] {result['run_id']}: re-ran {', '.join(result['executed']) or 'nothing'}")
+
+    failed = sum(1 for r in results if r.get("error"))
+    print(f"\n[INFO] {len(results)} review(s) in {elapsed:.2f}s, {failed} failed")
+    for name in STAGES:
+        print(f"[INFO]   {name}: re-executed {counts[name]}, skipped {len(results) - failed - counts[name]}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
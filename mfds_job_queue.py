@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from mfds_workspace import new_run_id
+
+# ==============================
+# BACKGROUND REVIEW JOBS
+# ==============================
+# Reviews submitted from the Streamlit app run on a bounded worker pool
+# instead of inside the script thread. submit() returns a job ID at once
+# and the UI polls get(job_id) for status and current stage. Every state
+# change is written to output/jobs/<job_id>.json, so a finished job can
+# still be found (and its report downloaded) after a page refresh or by
+# another server thread. The job ID doubles as the run ID, so the report
+# lives in output/runs/<job_id>/. Report sections are stored on the job
+# as the pipeline produces them, so the UI can show them progressively.
+# retry(job_id) runs a failed job again under the same ID; that run
+# resumes from the checkpoints of the failed attempt. New jobs always
+# start from scratch.
+#
+# Only queued and running jobs need to live in memory. A finished job is
+# already on disk, so it is dropped from memory JOB_TTL_SECONDS after it
+# finished and later polls read its record file instead.
+
+JOB_WORKERS = int(os.getenv("MFDS_JOB_WORKERS", "2"))
+JOBS_DIR = os.getenv("MFDS_JOBS_DIR", os.path.join("output", "jobs"))
+JOB_TTL_SECONDS = float(os.getenv("MFDS_JOB_TTL_SECONDS", "300"))
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+def run_review_job(job_id, product_name, country, on_stage, on_section, resume=False):
+    # Imported lazily: the step modules pull in Playwright/requests
+    from mfds_review_pipeline import run_review
+    from mfds_step3_to_step4_poc import get_default_browser_pool
+
+    result = run_review(
+        product_name,
+        browser_pool=get_default_browser_pool(),
+        run_id=job_id,
+        on_stage=on_stage,
+        country=country,
+        on_section=on_section,
+        resume=resume
+    )
+    return {
+        "run_id": result["run_id"],
+        "output_file": result["output_file"],
+        "elapsed_seconds": result["elapsed_seconds"]
+    }
+
+
+class JobQueue:
+    def __init__(self, run_job=run_review_job, max_workers=JOB_WORKERS, jobs_dir=JOBS_DIR, ttl_seconds=JOB_TTL_SECONDS):
+        self.run_job = run_job
+        self.max_workers = max_workers
+        self.jobs_dir = jobs_dir
+        self.ttl_seconds = ttl_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mfds-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._finished = {}
+        self._waits = deque(maxlen=500)
+        self._stats = {"submitted": 0, "done": 0, "failed": 0}
+
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    # ---------- records ----------
+
+    def _job_file(self, job_id):
+        return os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.json")
+
+    def _save(self, job):
+        path = self._job_file(job["job_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            snapshot = dict(job)
+            self._save(snapshot)
+        return snapshot
+
+    def _evict_finished(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        for job_id, finished in list(self._finished.items()):
+            if now - finished >= self.ttl_seconds:
+                del self._finished[job_id]
+                self._jobs.pop(job_id, None)
+
+    def get(self, job_id):
+        with self._lock:
+            self._evict_finished()
+            if job_id in self._jobs:
+                return dict(self._jobs[job_id])
+
+        path = self._job_file(job_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            job = json.load(f)
+
+        # Unfinished on disk but unknown here: the process that ran it is gone
+        if job["status"] not in FINISHED_STATUSES:
+            job["status"] = "failed"
+            job["error"] = "Job was interrupted before it finished (server restarted)"
+        return job
+
+    # ---------- execution ----------
+
+    def submit(self, product_name, country=None):
+        job_id = new_run_id()
+        job = self._new_job(job_id, product_name, country)
+
+        with self._lock:
+            self._evict_finished()
+            self._jobs[job_id] = job
+            self._stats["submitted"] += 1
+            self._save(job)
+
+        self._executor.submit(self._execute, job_id, time.perf_counter())
+        return job_id
+
+    def retry(self, job_id):
+        previous = self.get(job_id)
+        if previous is None or previous["status"] != "failed":
+            return False
+
+        job = self._new_job(job_id, previous["product_name"], previous["country"])
+        job["retries"] = previous.get("retries", 0) + 1
+        with self._lock:
+            if self._jobs.get(job_id, {}).get("status") in ("queued", "running"):
+                return False
+            self._finished.pop(job_id, None)
+            self._jobs[job_id] = job
+            self._stats["submitted"] += 1
+            self._save(job)
+
+        self._executor.submit(self._execute, job_id, time.perf_counter(), True)
+        return True
+
+    def _new_job(self, job_id, product_name, country):
+        return {
+            "job_id": job_id,
+            "product_name": product_name,
+            "country": country,
+            "status": "queued",
+            "stage": "waiting for a worker",
+            "submitted_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "wait_seconds": None,
+            "elapsed_seconds": None,
+            "first_section_seconds": None,
+            "sections": {},
+            "result": None,
+            "error": None,
+            "traceback": None,
+            "retries": 0
+        }
+
+    def _execute(self, job_id, submitted, resume=False):
+        started = time.perf_counter()
+        wait_seconds = started - submitted
+        with self._lock:
+            self._waits.append(wait_seconds)
+
+        job = self._update(
+            job_id,
+            status="running",
+            stage="starting",
+            started_at=datetime.utcnow().isoformat(),
+            wait_seconds=round(wait_seconds, 3)
+        )
+
+        def on_stage(stage):
+            self._update(job_id, stage=stage)
+
+        def on_section(key, markdown):
+            with self._lock:
+                job = self._jobs[job_id]
+                job["sections"] = {**job["sections"], key: markdown}
+                if job["first_section_seconds"] is None:
+                    job["first_section_seconds"] = round(time.perf_counter() - started, 3)
+                self._save(dict(job))
+
+        try:
+            result = self.run_job(job_id, job["product_name"], job["country"], on_stage, on_section, resume)
+            status, fields = "done", {"stage": "finished", "result": result}
+        except Exception as e:
+            traceback.print_exc()
+            status, fields = "failed", {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+
+        self._update(
+            job_id,
+            status=status,
+            finished_at=datetime.utcnow().isoformat(),
+            elapsed_seconds=round(time.perf_counter() - started, 3),
+            **fields
+        )
+        with self._lock:
+            self._stats[status] += 1
+            self._finished[job_id] = time.monotonic()
+            self._evict_finished()
+
+    # ---------- stats ----------
+
+    def stats(self):
+        with self._lock:
+            self._evict_finished()
+            stats = dict(self._stats)
+            statuses = [job["status"] for job in self._jobs.values()]
+            waits = sorted(self._waits)
+
+        stats["workers"] = self.max_workers
+        stats["queue_depth"] = statuses.count("queued")
+        stats["running"] = statuses.count("running")
+        stats["wait_mean_s"] = round(sum(waits) / len(waits), 3) if waits else 0.0
+        stats["wait_p95_s"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+# ==============================
+# PROCESS-WIDE QUEUE
+# ==============================
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue()
+        return _default_queue
@@ -0,0 +1,142 @@
+import json
+
+# ==============================
+# INCREMENTAL JSON PARSING
+# ==============================
+# Parses a JSON object while it is still streaming from the model.
+# feed() takes the next text chunk and returns the top-level (key, value)
+# pairs that became complete in it. Callers can act on early fields (the
+# risk class) while later ones (long translations) are still arriving.
+# Anything before the first "{" (such as a ``` fence) is skipped.
+#
+#   parser = IncrementalJSONObject()
+#   for chunk in chunks:
+#       for key, value in parser.feed(chunk):
+#           ...
+#   result = parser.result()        # the complete object, json.loads'd
+#
+# The prompt's own schema skeleton is used to check the final object:
+# schema_problems() lists missing keys and wrong value types, and
+# conform() fills them with empty values of the expected type.
+
+WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONObject:
+    def __init__(self):
+        self.buffer = ""
+        self.values = {}
+        self.complete = False
+
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._phase = "start"       # start, key, colon, value, after_value
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer) and not self.complete:
+            i = self._pos
+            char = self.buffer[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._phase == "key":
+                        self._key = json.loads(self.buffer[self._key_start:i + 1])
+                        self._phase = "colon"
+                    elif self._depth == 1 and self._phase == "value":
+                        completed.append(self._finish_value(i + 1))
+                continue
+
+            if self._phase == "start":
+                if char == "{":
+                    self._depth = 1
+                    self._phase = "key"
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._phase == "key":
+                    self._key_start = i
+                elif self._depth == 1 and self._phase == "value" and self._value_start is None:
+                    self._value_start = i
+            elif char in "{[":
+                if self._depth == 1 and self._phase == "value" and self._value_start is None:
+                    self._value_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._phase == "value":
+                    completed.append(self._finish_value(i + 1))
+                elif self._depth == 0:
+                    if self._phase == "value" and self._value_start is not None:
+                        completed.append(self._finish_value(i))
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ":" and self._phase == "colon":
+                    self._phase = "value"
+                    self._value_start = None
+                elif char == ",":
+                    if self._phase == "value" and self._value_start is not None:
+                        completed.append(self._finish_value(i))
+                    self._phase = "key"
+                elif char not in WHITESPACE and self._phase == "value" and self._value_start is None:
+                    # Number, true / false / null
+                    self._value_start = i
+
+        return completed
+
+    def _finish_value(self, end):
+        value = json.loads(self.buffer[self._value_start:end].strip())
+        self.values[self._key] = value
+        self._phase = "after_value"
+        self._value_start = None
+        return self._key, value
+
+    def result(self):
+        if not self.complete:
+            raise ValueError("Streamed JSON object is incomplete")
+        start = self.buffer.index("{")
+        return json.loads(self.buffer[start:self._pos])
+
+
+# ==============================
+# SCHEMA CHECKS
+# ==============================
+def schema_problems(value, skeleton, path=""):
+    problems = []
+    if isinstance(skeleton, dict):
+        if not isinstance(value, dict):
+            return [f"{path or 'response'} is not an object"]
+        for key, sub_skeleton in skeleton.items():
+            sub_path = f"{path}.{key}" if path else key
+            if key not in value:
+                problems.append(f"{sub_path} is missing")
+            else:
+                problems += schema_problems(value[key], sub_skeleton, sub_path)
+    elif isinstance(skeleton, str) and not isinstance(value, str):
+        problems.append(f"{path} is not a string")
+    return problems
+
+
+def conform(value, skeleton):
+    if isinstance(skeleton, dict):
+        value = value if isinstance(value, dict) else {}
+        return {**value, **{key: conform(value.get(key), sub) for key, sub in skeleton.items()}}
+    if isinstance(skeleton, str):
+        if value is None:
+            return ""
+        return value if isinstance(value, str) else str(value)
+    return value
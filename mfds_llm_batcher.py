@@ -0,0 +1,164 @@
+import threading
+from concurrent.futures import Future
+
+from mfds_json_stream import schema_problems
+from mfds_tracing import span
+
+# ==============================
+# PACKED LLM REQUESTS
+# ==============================
+# Bulk runs used to send one chat completion per product, each repeating
+# the same long instruction prompt. The batcher collects the requests
+# that concurrent LLM workers make for the same prompt template. It
+# sends them as a single "packed" completion: the instructions once, then
+# one block per item, and the model answers with a JSON object keyed by
+# item ID. A pack is flushed when it reaches max_items or max_chars, or
+# max_wait seconds after its first item.
+#
+# Every item's answer is validated on its own: it must be an object with
+# the template's required keys and, when a schema skeleton is given, match
+# it (mfds_json_stream.schema_problems). Missing or invalid items, or a
+# failed packed request, resolve to None and the caller sends that item
+# alone.
+#
+#   batcher = LLMBatcher(send_packed, max_items=8)
+#   answer = batcher.submit(template, text, required_keys, schema).result()
+#   if answer is not None:
+#       parsed, tokens = answer    # tokens: this item's share of the pack
+
+ITEM_ID_PREFIX = "item_"
+
+PACKED_PROMPT_TEMPLATE = """
+You will receive {count} independent items. Apply the task below to each
+item separately and never carry information from one item to another.
+
+Output STRICT JSON only: one object whose keys are the item ids and whose
+values are the JSON result for that item, for example
+{{"item_1": {{...}}, "item_2": {{...}}}}. Include every item id exactly once.
+
+TASK (apply to each item):
+{task}
+
+ITEMS:
+{items}
+"""
+
+
+def item_block(item_id, text):
+    return f'=== {item_id} ===\n"""{text}"""'
+
+
+def packed_prompt(task, texts):
+    items = [(f"{ITEM_ID_PREFIX}{i}", text) for i, text in enumerate(texts, start=1)]
+    prompt = PACKED_PROMPT_TEMPLATE.format(
+        count=len(items),
+        task=task,
+        items="\n\n".join(item_block(item_id, text) for item_id, text in items)
+    )
+    return prompt, [item_id for item_id, _ in items]
+
+
+def valid_item(result, required_keys, schema=None):
+    if not isinstance(result, dict) or not all(key in result for key in required_keys):
+        return False
+    return not (schema and schema_problems(result, schema))
+
+
+class LLMBatcher:
+    def __init__(self, send_packed, max_items=8, max_wait=0.25, max_chars=24000):
+        # send_packed(prompt_template, texts) -> (dict item_id -> result, total_tokens)
+        self.send_packed = send_packed
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.max_chars = max_chars
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stats = {
+            "packed_requests": 0,
+            "items": 0,
+            "items_invalid": 0,
+            "requests_failed": 0,
+            "total_tokens": 0
+        }
+
+    def submit(self, prompt_template, text, required_keys, schema=None):
+        future = Future()
+        flush_now = None
+
+        with self._lock:
+            pack = self._pending.get(prompt_template)
+            if pack and pack["chars"] + len(text) > self.max_chars:
+                flush_now = self._take(prompt_template)
+                pack = None
+            if pack is None:
+                pack = {"items": [], "chars": 0, "timer": None}
+                self._pending[prompt_template] = pack
+                pack["timer"] = threading.Timer(self.max_wait, self._flush_template, args=(prompt_template, pack))
+                pack["timer"].daemon = True
+                pack["timer"].start()
+            pack["items"].append((text, required_keys, schema, future))
+            pack["chars"] += len(text)
+
+            full = None
+            if len(pack["items"]) >= self.max_items:
+                full = self._take(prompt_template)
+
+        for items in (flush_now, full):
+            if items:
+                self._flush(prompt_template, items)
+        return future
+
+    def _take(self, prompt_template):
+        # Caller holds the lock
+        pack = self._pending.pop(prompt_template, None)
+        if pack is None:
+            return None
+        pack["timer"].cancel()
+        return pack["items"]
+
+    def _flush_template(self, prompt_template, pack):
+        with self._lock:
+            if self._pending.get(prompt_template) is not pack:
+                return
+            items = self._take(prompt_template)
+        self._flush(prompt_template, items)
+
+    def _flush(self, prompt_template, items):
+        texts = [text for text, _, _, _ in items]
+        try:
+            with span("llm_batcher.flush", items=len(items)):
+                results, total_tokens = self.send_packed(prompt_template, texts)
+        except Exception as e:
+            print(f"[WARN] Packed LLM request for {len(items)} items failed ({type(e).__name__}: {e}); "
+                  "sending them individually")
+            with self._lock:
+                self._stats["requests_failed"] += 1
+            for _, _, _, future in items:
+                future.set_result(None)
+            return
+
+        invalid = 0
+        tokens_per_item = total_tokens // len(items)
+        for i, (_, required_keys, schema, future) in enumerate(items, start=1):
+            result = results.get(f"{ITEM_ID_PREFIX}{i}")
+            if valid_item(result, required_keys, schema):
+                future.set_result((result, tokens_per_item))
+            else:
+                invalid += 1
+                future.set_result(None)
+
+        with self._lock:
+            self._stats["packed_requests"] += 1
+            self._stats["items"] += len(items)
+            self._stats["items_invalid"] += invalid
+            self._stats["total_tokens"] += total_tokens
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_items_per_request"] = (
+            round(stats["items"] / stats["packed_requests"], 2) if stats["packed_requests"] else 0.0
+        )
+        stats["requests_saved"] = stats["items"] - stats["packed_requests"] - stats["items_invalid"]
+        return stats
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+
+from mfds_evidence_cache import sha256_hex
+from mfds_sqlite import connect_store, create_store_dir
+
+# ==============================
+# LLM RESPONSE CACHE
+# ==============================
+# Durable cache of parsed Step-4 LLM interpretations. The key hashes the
+# exact evidence sent (after truncation), the full prompt template, the
+# model and the temperature, so editing the prompt or switching models
+# simply misses and the old entries age out through LRU eviction.
+
+CACHE_PATH = os.getenv("MFDS_LLM_CACHE_PATH", "output/cache/llm_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("MFDS_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key     TEXT PRIMARY KEY,
+    model         TEXT NOT NULL,
+    response      TEXT NOT NULL,
+    total_tokens  INTEGER NOT NULL,
+    created_at    REAL NOT NULL,
+    last_used     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class LLMResponseCache:
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "tokens_saved": 0}
+
+        create_store_dir(path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect_store(self.path)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    @staticmethod
+    def make_key(evidence, prompt_template, model, temperature):
+        return sha256_hex(json.dumps({
+            "evidence_sha256": sha256_hex(evidence),
+            "prompt_sha256": sha256_hex(prompt_template),
+            "model": model,
+            "temperature": temperature
+        }, sort_keys=True))
+
+    def get(self, cache_key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, total_tokens FROM responses WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE responses SET last_used = ? WHERE cache_key = ?",
+                    (time.time(), cache_key)
+                )
+
+        if not row:
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        self._count("tokens_saved", row[1])
+        return json.loads(row[0])
+
+    def put(self, cache_key, response, model, total_tokens=0):
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(cache_key, model, response, total_tokens, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, model, json.dumps(response, ensure_ascii=False), total_tokens, now, now)
+            )
+            conn.execute(
+                "DELETE FROM responses WHERE cache_key IN ("
+                " SELECT cache_key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,)
+            )
+
+        self._count("stores")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# ==============================
+# PROCESS-WIDE CACHE
+# ==============================
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
@@ -1,111 +1,138 @@
+import argparse
 import json
-from pathlib import Path
 import os
 
+from mfds_tracing import span, traced
+
 OUTPUT_DIR = "output"
 
 STEP1_2_FILE_OUTPUT = "output/step1_step2_static.json"
 STEP1_2_FILE_ROOT = "step1_step2_static.json"
-STEP4_FILE = f"{OUTPUT_DIR}/step4_product_understanding.json"
-STEP5_8_FILE = f"{OUTPUT_DIR}/step5_to_step8_sections.json"
-STEP9_FILE = f"{OUTPUT_DIR}/step9_conclusion.json"
+STEP4_FILE_NAME = "step4_product_understanding.json"
+STEP5_8_FILE_NAME = "step5_to_step8_sections.json"
+STEP9_FILE_NAME = "step9_conclusion.json"
 
 
 def load_json(path):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Required file not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with span("load_json", file=os.path.basename(path)):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
 
 
 def section_md(title, content):
     return f"## {title}\n\n{content}\n\n"
 
 
-def run():
+def load_step1_2():
     if os.path.exists(STEP1_2_FILE_OUTPUT):
-        step1_2 = load_json(STEP1_2_FILE_OUTPUT)
-    elif os.path.exists(STEP1_2_FILE_ROOT):
+        return load_json(STEP1_2_FILE_OUTPUT)
+    if os.path.exists(STEP1_2_FILE_ROOT):
         print("[INFO] Using Step 1–2 static file from repo root")
-        step1_2 = load_json(STEP1_2_FILE_ROOT)
-    else:
-        raise FileNotFoundError(
-            "Step 1–2 static file not found in output/ or repo root"
-        )
+        return load_json(STEP1_2_FILE_ROOT)
+    raise FileNotFoundError(
+        "Step 1–2 static file not found in output/ or repo root"
+    )
 
-    step4 = load_json(STEP4_FILE)
-    step5_8 = load_json(STEP5_8_FILE)
-    step9 = load_json(STEP9_FILE)
 
-    product_name = step4["product_identity"]["product_name"]
-    output_file = f"{OUTPUT_DIR}/MFDS_Procurement_Review_{product_name.replace(' ', '_')}.md"
+# Sections are built in three groups that become available at different
+# times: Steps 1-2 are static, Classification and Steps 5-9 only need the
+# risk class, and the title and About the Device need the translated
+# product details. build_document() joins them in SECTION_KEYS order;
+# streaming callers (mfds_review_pipeline.stream_review) send each group
+# as soon as it is ready.
+STEP5_8_KEYS = [
+    "step5_regulatory_considerations",
+    "step6_documents_required",
+    "step7_labeling_udi_pms",
+    "step8_procurement_impact"
+]
 
-    doc = []
+SECTION_KEYS = [
+    "title",
+    "step1_regulatory_authority",
+    "step2_key_regulations",
+    "about_device",
+    "classification",
+    *STEP5_8_KEYS,
+    "step9_conclusion"
+]
 
-    # Title
-    doc.append(f"# Regulatory Review for Procuring {product_name} in South Korea\n\n")
 
-    # Step 1
-    doc.append(
-        section_md(
-            step1_2["step1_regulatory_authority"]["section_title"],
-            step1_2["step1_regulatory_authority"]["content"]
-        )
-    )
+def title_md(product_name):
+    return f"# Regulatory Review for Procuring {product_name} in South Korea\n\n"
 
-    # Step 2
-    doc.append(
-        section_md(
-            step1_2["step2_key_regulations"]["section_title"],
-            step1_2["step2_key_regulations"]["content"]
-        )
-    )
 
-    # Step 4 – About Device
-    doc.append(
-        section_md(
-            step4["about_device"]["section_title"],
-            step4["about_device"]["content"]
-        )
-    )
+def static_sections(step1_2):
+    return [
+        (key, section_md(step1_2[key]["section_title"], step1_2[key]["content"]))
+        for key in ["step1_regulatory_authority", "step2_key_regulations"]
+    ]
 
-    # Step 4 – Classification
-    doc.append(
-        section_md(
-            step4["classification"]["section_title"],
-            step4["classification"]["content"]
-        )
-    )
 
-    # Step 5–8
-    for key in [
-        "step5_regulatory_considerations",
-        "step6_documents_required",
-        "step7_labeling_udi_pms",
-        "step8_procurement_impact"
-    ]:
+def device_sections(step4):
+    return [
+        ("title", title_md(step4["product_identity"]["product_name"])),
+        ("about_device", section_md(step4["about_device"]["section_title"], step4["about_device"]["content"]))
+    ]
+
+
+def classification_sections(step4, step5_8, step9):
+    sections = [
+        ("classification", section_md(step4["classification"]["section_title"], step4["classification"]["content"]))
+    ]
+
+    for key in STEP5_8_KEYS:
         section = step5_8.get(key)
         if section:
-            doc.append(
-                section_md(
-                    section["section_title"],
-                    section["content"]
-                )
-            )
-
-    # Step 9 – Conclusion
-    doc.append(
-        section_md(
-            step9["step9_conclusion"]["section_title"],
-            step9["step9_conclusion"]["content"]
-        )
+            sections.append((key, section_md(section["section_title"], section["content"])))
+
+    sections.append((
+        "step9_conclusion",
+        section_md(step9["step9_conclusion"]["section_title"], step9["step9_conclusion"]["content"])
+    ))
+    return sections
+
+
+def build_document(step1_2, step4, step5_8, step9):
+    sections = dict(
+        static_sections(step1_2)
+        + device_sections(step4)
+        + classification_sections(step4, step5_8, step9)
     )
+    return "".join(sections[key] for key in SECTION_KEYS if key in sections)
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("".join(doc))
+
+@traced("master_assembly")
+def run(step4=None, step5_8=None, step9=None, output_file=None, output_dir=OUTPUT_DIR):
+    step1_2 = load_step1_2()
+
+    if step4 is None:
+        step4 = load_json(os.path.join(output_dir, STEP4_FILE_NAME))
+    if step5_8 is None:
+        step5_8 = load_json(os.path.join(output_dir, STEP5_8_FILE_NAME))
+    if step9 is None:
+        step9 = load_json(os.path.join(output_dir, STEP9_FILE_NAME))
+
+    if output_file is None:
+        product_name = step4["product_identity"]["product_name"]
+        output_file = os.path.join(
+            output_dir,
+            f"MFDS_Procurement_Review_{product_name.replace(' ', '_')}.md"
+        )
+
+    with span("write_markdown", file=os.path.basename(output_file)):
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(build_document(step1_2, step4, step5_8, step9))
 
     print(f"Master review document generated: {output_file}")
 
+    return output_file
+
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Run workspace to read from and write to")
+    args, _ = parser.parse_known_args()
+    run(output_dir=args.output_dir)
@@ -0,0 +1,231 @@
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==============================
+# LOCAL E-MEDI STAND-IN
+# ==============================
+# Serves e-Medi style search, result and detail pages rendered from the
+# fixture catalogue in fixtures/emedi/products.json, with the same form
+# labels, result table and labelled detail fields the scrapers rely on.
+# Used by tests and benchmarks through MFDS_BASE_URL.
+#
+# Saved copies of real pages can be served instead of the rendered ones:
+# put them in a pages_dir as search.html, results.html (served for every
+# result list) and detail_<itemSeq>.html (the item_seq values of the
+# catalogue entries they belong to).
+#
+# The result list is paginated by the form's pageIndex field, LIST_PAGE_SIZE
+# rows per page. An empty name lists the whole catalogue, which is how
+# mfds_catalog crawls the public listing.
+#
+# Setting server.outage_status (e.g. 503) makes every request fail with
+# that status until it is reset to None, to exercise mfds_emedi_guard.
+#
+#   server = start_mock_emedi(latency=0.1)
+#   os.environ["MFDS_BASE_URL"] = server.base_url
+#   ...
+#   server.shutdown()
+
+FIXTURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "emedi", "products.json")
+
+SEARCH_PATH = "/search/data/MNU20237"
+LIST_PATH = "/search/data/list"
+DETAIL_PATH = "/search/data/detail"
+LIST_PAGE_SIZE = 10
+
+NAV_MENU = [
+    "의료기기 검색", "품목허가 정보", "품목인증 정보", "품목신고 정보", "등급분류 정보",
+    "임상시험 정보", "회수·판매중지", "UDI 정보", "공지사항", "자료실", "FAQ", "고객센터"
+]
+FOOTER = (
+    "식품의약품안전처 의료기기안심책방 | 충청북도 청주시 흥덕구 오송읍 오송생명2로 187 "
+    "| 대표전화 1577-1255 | Copyright © Ministry of Food and Drug Safety. All rights reserved."
+)
+
+
+def load_products(path=FIXTURES_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def page_shell(title, body):
+    menu = "".join(f'<li><a href="#">{html.escape(m)}</a></li>' for m in NAV_MENU)
+    return (
+        "<!DOCTYPE html><html lang=\"ko\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>"
+        "<link rel=\"stylesheet\" href=\"/static/emedi.css\">"
+        "<script>window.dataLayer = [];</script></head><body>"
+        f"<header><nav class=\"gnb\"><ul>{menu}</ul></nav></header>"
+        f"<main id=\"contents\">{body}</main>"
+        f"<footer><p>{html.escape(FOOTER)}</p></footer>"
+        "</body></html>"
+    )
+
+
+def render_search_page():
+    return page_shell("의료기기 제품 검색 | 의료기기안심책방", (
+        f'<form id="searchForm" action="{LIST_PATH}" method="post">'
+        '<input type="hidden" name="menuId" value="MNU20237">'
+        '<input type="hidden" name="pageIndex" value="1">'
+        '<label for="searchItemName">명칭</label>'
+        '<input type="text" id="searchItemName" name="itemName" value="">'
+        '<button type="submit">검색</button>'
+        '</form>'
+    ))
+
+
+def render_results_page(products, query, page_index=1, page_size=LIST_PAGE_SIZE):
+    query = (query or "").strip().lower()
+    matches = [
+        p for p in products
+        if not query or any(query in (p.get(k) or "").lower() for k in ("item_name", "product_name", "model_name"))
+    ]
+    offset = (max(1, page_index) - 1) * page_size
+    matches = matches[offset:offset + page_size]
+
+    if matches:
+        rows = "".join(
+            "<tr>"
+            f"<td>{i}</td>"
+            f'<td><a href="{DETAIL_PATH}?itemSeq={p["item_seq"]}">{html.escape(p["product_name"])}</a></td>'
+            f"<td>{html.escape(p['item_name'])}</td>"
+            f"<td>{html.escape(p['model_name'])}</td>"
+            f"<td>{p['risk_class']}</td>"
+            f"<td>{html.escape(p['approval_number'])}</td>"
+            "</tr>"
+            for i, p in enumerate(matches, start=offset + 1)
+        )
+    else:
+        rows = '<tr><td colspan="6">검색결과가 없습니다.</td></tr>'
+
+    return page_shell("의료기기 제품 검색 결과 | 의료기기안심책방", (
+        '<table class="list"><thead><tr><th>번호</th><th>제품명</th><th>품목명</th>'
+        "<th>모델명</th><th>등급</th><th>허가번호</th></tr></thead>"
+        f"<tbody>{rows}</tbody></table>"
+    ))
+
+
+def render_detail_page(product):
+    fields = [
+        ("품목명", product["item_name"]),
+        ("제품명", product["product_name"]),
+        ("모델명", product["model_name"]),
+        ("등급", f"{product['risk_class']}등급"),
+        ("품목허가번호", product["approval_number"]),
+        ("허가일자", product["approval_date"]),
+        ("업체명", product["manufacturer"]),
+        ("모양 및 구조", product["device_description"]),
+        ("사용목적", product["intended_use"])
+    ]
+    rows = "".join(
+        f"<tr><th>{html.escape(label)}</th><td>{html.escape(value)}</td></tr>"
+        for label, value in fields
+    )
+    return page_shell(f"{product['product_name']} | 의료기기안심책방", (
+        '<div class="detail_content"><h3>제품 상세정보</h3>'
+        f'<table class="view"><tbody>{rows}</tbody></table></div>'
+    ))
+
+
+class MockEmediHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_html(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _recorded(self, name):
+        pages_dir = self.server.pages_dir
+        path = os.path.join(pages_dir, name) if pages_dir else None
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def _handle(self, params):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        time.sleep(server.latency)
+
+        if server.outage_status:
+            self._send_html(server.outage_status, page_shell("Service Unavailable", "<p>점검 중입니다.</p>"))
+            return
+
+        path = urlparse(self.path).path
+
+        if path == SEARCH_PATH:
+            self._send_html(200, self._recorded("search.html") or render_search_page())
+        elif path == LIST_PATH:
+            page_index = params.get("pageIndex", ["1"])[0]
+            self._send_html(200, self._recorded("results.html") or render_results_page(
+                server.products,
+                params.get("itemName", [""])[0],
+                int(page_index) if page_index.isdigit() else 1
+            ))
+        elif path == DETAIL_PATH:
+            item_seq = params.get("itemSeq", [""])[0]
+            product = next((p for p in server.products if p["item_seq"] == item_seq), None)
+            if product is None:
+                self._send_html(404, page_shell("Not Found", "<p>존재하지 않는 제품입니다.</p>"))
+            else:
+                recorded = self._recorded(f"detail_{os.path.basename(item_seq)}.html")
+                self._send_html(200, recorded or render_detail_page(product))
+        else:
+            self._send_html(404, page_shell("Not Found", "<p>Not Found</p>"))
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        self._handle(parse_qs(self.rfile.read(length).decode("utf-8")))
+
+
+def start_mock_emedi(host="127.0.0.1", port=0, latency=0.0, products=None, pages_dir=None, outage_status=None):
+    server = ThreadingHTTPServer((host, port), MockEmediHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.latency = latency
+    server.products = products if products is not None else load_products()
+    server.pages_dir = pages_dir
+    server.outage_status = outage_status
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--pages-dir", default=None, help="Directory of recorded search/detail pages")
+    args = parser.parse_args()
+
+    server = start_mock_emedi(port=args.port, latency=args.latency, pages_dir=args.pages_dir)
+    print(f"[INFO] Mock e-Medi listening on {server.base_url} (set MFDS_BASE_URL to use it)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
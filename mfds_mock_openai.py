@@ -0,0 +1,210 @@
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================
+# LOCAL OPENAI STAND-IN
+# ==============================
+# Minimal chat-completions server for tests and benchmarks. It answers
+# POST /v1/chat/completions with a schema-shaped extraction (or field
+# translation) built from the MFDS text in the prompt, after a
+# configurable latency. The first `fail_first` requests can be made to
+# return `fail_status` (e.g. 429, sent with a `retry_after` header) to
+# exercise retries. Packed prompts
+# (mfds_llm_batcher) get one answer per item, keyed by item ID; with
+# drop_packed_item set, the last item is left out to exercise the
+# per-item fallback. Requests with "stream": true are answered as
+# server-sent events: the first chunk arrives after a fifth of the
+# latency and the rest are spread over the remainder.
+#
+#   server = start_mock_openai(latency=0.2, fail_first=2)
+#   os.environ["OPENAI_BASE_URL"] = server.base_url
+#   ...
+#   server.shutdown()
+
+STREAM_CHUNKS = 12
+STREAM_FIRST_CHUNK_SHARE = 0.2
+
+
+def build_mock_translation(prompt):
+    source = prompt.split("MFDS FIELDS:", 1)[-1].strip().strip('"')
+    fields = json.loads(source)
+    return {key: f"(EN) {value}" if value else "" for key, value in fields.items()}
+
+
+def build_mock_extraction(prompt):
+    text = prompt.split("MFDS TEXT:", 1)[-1]
+
+    def field(*labels):
+        for label in labels:
+            match = re.search(rf"{label}\s*[:\t ]\s*([^\n\t]+)", text)
+            if match:
+                return match.group(1).strip()
+        return ""
+
+    name_ko = field("품목명", "제품명")
+    use_ko = field("사용목적")
+    risk = re.sub(r"[^0-9]", "", field("등급")) or "2"
+
+    return {
+        "risk_class": risk,
+        "approval_number": field("허가번호", "인증번호", "신고번호"),
+        "approval_date": field("허가일자", "인증일자", "신고일자"),
+        "product_name": {"original_ko": name_ko, "translated_en": "Mock Device" if name_ko else ""},
+        "device_description": {"original_ko": use_ko, "translated_en": "measure a physiological parameter"},
+        "intended_use": {"original_ko": use_ko, "translated_en": "measure a physiological parameter" if use_ko else ""},
+        "confidence_notes": "Generated by the local OpenAI stand-in."
+    }
+
+
+def build_mock_packed(prompt, drop_last=False):
+    task, items = prompt.split("\nITEMS:\n", 1)
+    blocks = re.findall(r'=== (item_\d+) ===\n"""(.*?)"""', items, flags=re.DOTALL)
+    if drop_last:
+        blocks = blocks[:-1]
+
+    if "MFDS FIELDS:" in task:
+        return {item_id: build_mock_translation(f"MFDS FIELDS:\n{text}") for item_id, text in blocks}
+    return {item_id: build_mock_extraction(f"MFDS TEXT:\n{text}") for item_id, text in blocks}
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        with server.lock:
+            server.request_count += 1
+            failing = server.request_count <= server.fail_first
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        stream = bool(payload.get("stream"))
+        time.sleep(server.latency * (STREAM_FIRST_CHUNK_SHARE if stream and not failing else 1))
+
+        if failing:
+            self._send_json(server.fail_status, {"error": {"message": "Injected failure"}})
+            return
+
+        prompt = payload["messages"][-1]["content"]
+        if "\nITEMS:\n" in prompt:
+            answer = build_mock_packed(prompt, drop_last=server.drop_packed_item)
+        elif "MFDS FIELDS:" in prompt:
+            answer = build_mock_translation(prompt)
+        else:
+            answer = build_mock_extraction(prompt)
+        content = json.dumps(answer, ensure_ascii=False)
+        usage = {
+            "prompt_tokens": len(prompt) // 3,
+            "completion_tokens": len(content) // 3,
+            "total_tokens": (len(prompt) + len(content)) // 3
+        }
+
+        if stream:
+            self._send_stream(payload, content, usage)
+            return
+
+        self._send_json(200, {
+            "id": f"mock-{server.request_count}",
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def _send_event(self, body):
+        data = f"data: {body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, payload, content, usage):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        size = max(1, -(-len(content) // STREAM_CHUNKS))
+        pieces = [content[i:i + size] for i in range(0, len(content), size)]
+        pause = server.latency * (1 - STREAM_FIRST_CHUNK_SHARE) / max(1, len(pieces) - 1)
+        base = {"id": f"mock-{server.request_count}", "object": "chat.completion.chunk", "model": payload.get("model")}
+
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(pause)
+            self._send_event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+        self._send_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            self._send_event({**base, "choices": [], "usage": usage})
+        self._send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def start_mock_openai(host="127.0.0.1", port=0, latency=0.0, fail_first=0, fail_status=429,
+                      retry_after="0", drop_packed_item=False):
+    server = ThreadingHTTPServer((host, port), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.latency = latency
+    server.fail_first = fail_first
+    server.fail_status = fail_status
+    server.retry_after = retry_after
+    server.drop_packed_item = drop_packed_item
+    server.base_url = f"http://{host}:{server.server_address[1]}/v1"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fail-first", type=int, default=0, help="Number of initial requests to fail")
+    parser.add_argument("--fail-status", type=int, default=429)
+    args = parser.parse_args()
+
+    server = start_mock_openai(
+        port=args.port,
+        latency=args.latency,
+        fail_first=args.fail_first,
+        fail_status=args.fail_status
+    )
+    print(f"[INFO] Mock OpenAI listening on {server.base_url} (set OPENAI_BASE_URL to use it)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
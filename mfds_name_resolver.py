@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from mfds_emedi_parser import HANGUL
+from mfds_sqlite import connect_store, create_store_dir
+
+# ==============================
+# ENGLISH -> KOREAN NAME RESOLVER
+# ==============================
+# The e-Medi "명칭" field only matches Korean names, so an English query
+# such as "Skin Infrared Thermometer" finds nothing and Step 4 falls back
+# to a generic report. This resolver maps English queries to candidate
+# Korean item names from two sources:
+#   nomenclature : MFDS item names with their common English names
+#                  (mfds_item_nomenclature.json)
+#   confirmed    : English queries that earlier found an e-Medi product,
+#                  mapped to the item name on that product's detail page
+# Names go into an in-memory character-trigram index. Candidates are
+# ranked by Dice similarity of trigram sets, so word order, plurals and
+# small typos still rank the right item first. Confirmed translations
+# rank above nomenclature at equal similarity.
+#
+#   python mfds_name_resolver.py "Skin Infrared Thermometer"
+
+NOMENCLATURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mfds_item_nomenclature.json")
+RESOLVER_PATH = os.getenv("MFDS_NAME_RESOLVER_PATH", "output/cache/name_resolver.sqlite3")
+
+MIN_SCORE = float(os.getenv("MFDS_NAME_RESOLVER_MIN_SCORE", "0.45"))
+MAX_CANDIDATES = 3
+CONFIRMED_BONUS = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS confirmed (
+    english_key   TEXT PRIMARY KEY,
+    english_name  TEXT NOT NULL,
+    item_name_ko  TEXT NOT NULL,
+    confirmations INTEGER NOT NULL,
+    confirmed_at  REAL NOT NULL
+);
+"""
+
+
+def normalize_english(name):
+    name = unicodedata.normalize("NFKC", name or "").lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+def is_english_query(name):
+    return bool(name and name.strip()) and not HANGUL.search(name)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameResolver:
+    def __init__(self, path=RESOLVER_PATH, nomenclature_file=NOMENCLATURE_FILE):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._names = []          # (english_key, item_name_ko, source)
+        self._grams = []          # trigram set per name
+        self._index = {}          # trigram -> name ids
+        self._keys = {}           # (english_key, item_name_ko) -> name id
+        self._stats = {"resolved": 0, "unresolved": 0, "confirmations": 0}
+
+        create_store_dir(path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            confirmed = conn.execute("SELECT english_key, item_name_ko FROM confirmed").fetchall()
+
+        with open(nomenclature_file, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                for english in entry["english_names"]:
+                    self._add(normalize_english(english), entry["item_name_ko"], "nomenclature")
+        for english_key, item_name_ko in confirmed:
+            self._add(english_key, item_name_ko, "confirmed")
+
+    def _connect(self):
+        return connect_store(self.path)
+
+    def _add(self, english_key, item_name_ko, source):
+        # Caller holds the lock (or is __init__)
+        if source == "confirmed":
+            # A newer confirmation of the same query replaces the older one
+            for name_id, (key, name_ko, old_source) in enumerate(self._names):
+                if key == english_key and name_ko != item_name_ko and old_source == "confirmed":
+                    self._names[name_id] = (key, name_ko, "superseded")
+
+        existing = self._keys.get((english_key, item_name_ko))
+        if existing is not None:
+            if source == "confirmed":
+                self._names[existing] = (english_key, item_name_ko, source)
+            return
+
+        name_id = len(self._names)
+        grams = trigrams(english_key)
+        self._names.append((english_key, item_name_ko, source))
+        self._grams.append(grams)
+        self._keys[(english_key, item_name_ko)] = name_id
+        for gram in grams:
+            self._index.setdefault(gram, []).append(name_id)
+
+    # ---------- lookups ----------
+
+    def candidates(self, query, limit=MAX_CANDIDATES, min_score=MIN_SCORE):
+        key = normalize_english(query)
+        if not key:
+            return []
+        query_grams = trigrams(key)
+
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._index.get(gram, ()))
+
+            best = {}
+            for name_id, overlap in shared.items():
+                english_key, item_name_ko, source = self._names[name_id]
+                if source == "superseded":
+                    continue
+                score = 2 * overlap / (len(query_grams) + len(self._grams[name_id]))
+                rank = score + (CONFIRMED_BONUS if source == "confirmed" else 0)
+                if score >= min_score and rank > best.get(item_name_ko, {"rank": 0})["rank"]:
+                    best[item_name_ko] = {
+                        "item_name_ko": item_name_ko,
+                        "matched_name": english_key,
+                        "source": source,
+                        "score": round(score, 3),
+                        "rank": rank
+                    }
+
+        results = sorted(best.values(), key=lambda c: c["rank"], reverse=True)[:limit]
+        self._count("resolved" if results else "unresolved")
+        return results
+
+    def confirm(self, english_name, item_name_ko):
+        english_key = normalize_english(english_name)
+        if not english_key or not item_name_ko:
+            return
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO confirmed (english_key, english_name, item_name_ko, confirmations, confirmed_at) "
+                "VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (english_key) DO UPDATE SET "
+                "item_name_ko = excluded.item_name_ko, english_name = excluded.english_name, "
+                "confirmations = CASE WHEN confirmed.item_name_ko = excluded.item_name_ko "
+                "THEN confirmed.confirmations + 1 ELSE 1 END, "
+                "confirmed_at = excluded.confirmed_at",
+                (english_key, english_name, item_name_ko, time.time())
+            )
+        with self._lock:
+            self._add(english_key, item_name_ko, "confirmed")
+        self._count("confirmations")
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["names"] = len(self._names)
+            stats["confirmed_names"] = sum(1 for _, _, source in self._names if source == "confirmed")
+        return stats
+
+
+def search_terms(search_value, resolver, catalog=None):
+    # Terms to send to e-Medi, best first. Korean input is used as typed;
+    # English input tries the resolved Korean item names, then the query
+    # itself (model names and brands are often Latin).
+    if not is_english_query(search_value):
+        return [search_value]
+
+    names = [c["item_name_ko"] for c in resolver.candidates(search_value)]
+    if catalog is not None:
+        # Names the local catalog knows are listed first (stable sort)
+        names.sort(key=lambda name: not catalog.search(name, limit=1))
+    return names + [search_value]
+
+
+# ==============================
+# PROCESS-WIDE RESOLVER
+# ==============================
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_name_resolver():
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = NameResolver()
+        return _default_resolver
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query", help="English product name")
+    parser.add_argument("--limit", type=int, default=MAX_CANDIDATES)
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE)
+    args = parser.parse_args()
+
+    resolver = get_name_resolver()
+    started = time.perf_counter()
+    results = resolver.candidates(args.query, limit=args.limit, min_score=args.min_score)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    for c in results:
+        print(f"{c['score']:.3f}  {c['item_name_ko']}  ({c['source']}: {c['matched_name']})")
+    print(f"[INFO] {len(results)} candidate(s) in {elapsed_ms:.2f} ms from {resolver.stats()['names']} indexed names")
+
+
+if __name__ == "__main__":
+    run()
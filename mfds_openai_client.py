@@ -0,0 +1,234 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from mfds_tracing import record_span
+
+# ==============================
+# SHARED OPENAI HTTP CLIENT
+# ==============================
+# One keep-alive session for every chat-completions call in the process:
+#   - connection pooling (no TCP+TLS handshake per call)
+#   - exponential backoff with full jitter on 429 / 5xx / connection
+#     errors, honouring Retry-After
+#   - token buckets for requests/minute and tokens/minute
+#   - latency (over the last LATENCY_SAMPLES calls) and retry counters
+#   - streamed completions (server-sent events): retries cover the
+#     request up to the response headers, then deltas go to a callback
+# OPENAI_BASE_URL points the client at a local stand-in
+# (see mfds_mock_openai.py). requests is imported when the first client
+# is created, so importing this module stays cheap.
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "16"))
+OPENAI_TIMEOUT_SECONDS = 60
+LATENCY_SAMPLES = 1000
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+ESTIMATED_CHARS_PER_TOKEN = 3
+DEFAULT_COMPLETION_TOKENS = 800
+
+
+def estimate_tokens(payload):
+    chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+    completion = payload.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // ESTIMATED_CHARS_PER_TOKEN + completion
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(max(1, per_minute))
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        # Requests larger than the whole bucket are clamped so they can still pass
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+
+                delay = (amount - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class OpenAIClient:
+    def __init__(self, api_key, base_url=OPENAI_BASE_URL, max_retries=OPENAI_MAX_RETRIES,
+                 requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+                 pool_size=OPENAI_POOL_SIZE, timeout=OPENAI_TIMEOUT_SECONDS):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._stats = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "throttled_seconds": 0.0
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def post(self, path, payload, stream=False):
+        import requests
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        estimated_tokens = estimate_tokens(payload)
+
+        for attempt in range(self.max_retries + 1):
+            throttled = self.request_bucket.acquire(1) + self.token_bucket.acquire(estimated_tokens)
+            self._count("throttled_seconds", throttled)
+            self._count("requests")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                record_span("openai.http", started, attempt=attempt, error=type(e).__name__)
+                if attempt >= self.max_retries:
+                    self._count("failed")
+                    raise RuntimeError(f"OpenAI API unreachable after {attempt + 1} attempts: {e}")
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+            record_span("openai.http", started, attempt=attempt, status=response.status_code,
+                        throttled_s=round(throttled, 3))
+
+            if response.status_code == 200:
+                self._count("succeeded")
+                return response
+
+            if response.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                # Hand the connection back to the pool before waiting
+                response.close()
+                self._count("retries")
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+
+            self._count("failed")
+            with response:
+                raise RuntimeError(
+                    f"OpenAI API error [{response.status_code}]: {response.text}"
+                )
+
+    def chat_completion(self, payload):
+        return self.post("chat/completions", payload).json()
+
+    def chat_completion_stream(self, payload, on_delta):
+        # Same return shape as chat_completion(); on_delta(text) per chunk
+        response = self.post(
+            "chat/completions",
+            {**payload, "stream": True, "stream_options": {"include_usage": True}},
+            stream=True
+        )
+        content = []
+        usage = None
+        finish_reason = None
+
+        # SSE is UTF-8; without a charset requests would assume Latin-1
+        response.encoding = "utf-8"
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or usage
+                for choice in chunk.get("choices") or []:
+                    delta = (choice.get("delta") or {}).get("content")
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                    if delta:
+                        content.append(delta)
+                        on_delta(delta)
+
+        return {
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(content)},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage or {}
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+
+        stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+        if latencies:
+            stats["latency_mean_s"] = round(sum(latencies) / len(latencies), 3)
+            stats["latency_p50_s"] = round(latencies[len(latencies) // 2], 3)
+            stats["latency_p95_s"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+        return stats
+
+
+# ==============================
+# PROCESS-WIDE CLIENT
+# ==============================
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_openai_client(api_key):
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OpenAIClient(api_key)
+        return _default_client
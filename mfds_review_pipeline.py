@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+
+import mfds_step3_to_step4_poc as step3_to_step4
+import mfds_step5_to_step8_assembler_poc as step5_to_step8
+import mfds_step9_conclusion_assembler_poc as step9_conclusion
+import mfds_master_review_assembler as master_assembler
+from mfds_incremental import ReviewCheckpoint, record_review_stages
+from mfds_single_flight import flight_key, get_single_flight, review_key
+from mfds_tracing import TRACE_FILE, span, traced, traced_review
+from mfds_workspace import RUN_MANIFEST, active_run, create_run_workspace, workspace_dir_for
+
+# ==============================
+# IN-PROCESS REVIEW PIPELINE
+# ==============================
+# Runs every step in the current interpreter and hands the step results
+# to the next step in memory. Each review gets its own run ID and
+# workspace under output/runs/<run_id>/ (mfds_workspace), so concurrent
+# sessions never overwrite each other's JSON or report. Intermediate JSON
+# is only written there when write_json=True (debugging). Identical
+# concurrent requests (same normalized product and country, refresh flag
+# and fetch backend) share one evidence lookup and LLM interpretation
+# through mfds_single_flight; each still gets its own workspace and report.
+# Long-lived callers pass a warm BrowserPool (mfds_browser_pool) so the
+# lookup skips Chromium launch and the search page load.
+#
+# Callers that want the report progressively pass on_section(key, md) or
+# iterate stream_review(). Steps 1-2 are sent at once, Classification and
+# Steps 5-9 as soon as the risk class is parsed, and the title and About
+# the Device when Step 4 is complete (keys may be sent again with final
+# content; see master_assembler.SECTION_KEYS for display order).
+#
+# Every review is traced (mfds_tracing) and writes trace.json into its
+# workspace, including when it fails. Stage outputs and fingerprints are
+# recorded in stages.json so mfds_incremental can re-render the review
+# later without repeating unchanged stages.
+#
+# The evidence and the Step-4 interpretation are checkpointed there as
+# soon as they exist. resume=True with the run_id of an earlier attempt
+# continues that workspace in place and does not repeat them; other runs
+# never read another run's checkpoints. The workspace is locked
+# (mfds_workspace.active_run) while the review runs.
+# Stored evidence goes to the deduplicated audit archive
+# (mfds_evidence_archive) under the run ID; stages.json references it.
+
+
+def emit_sections(on_section, sections):
+    for key, markdown in sections:
+        on_section(key, markdown)
+
+
+def emit_classification_sections(on_section, step4):
+    emit_sections(on_section, master_assembler.classification_sections(
+        step4,
+        step5_to_step8.assemble_sections(step4),
+        step9_conclusion.assemble_conclusion(step4)
+    ))
+
+
+@traced("assemble_review")
+def assemble_review(step4, write_json=False, output_file=None, output_dir=None):
+    output_dir = output_dir or master_assembler.OUTPUT_DIR
+
+    step5_8 = step5_to_step8.run(step4, write_output=write_json, output_dir=output_dir)
+    step9 = step9_conclusion.run(step4, write_output=write_json, output_dir=output_dir)
+    output_file = master_assembler.run(
+        step4, step5_8, step9, output_file=output_file, output_dir=output_dir
+    )
+
+    return {
+        "step4": step4,
+        "step5_8": step5_8,
+        "step9": step9,
+        "output_file": output_file
+    }
+
+
+def run_review(product_name, write_json=False, browser_pool=None, output_file=None, refresh=False,
+               fetch_backend=None, run_id=None, on_stage=None, country=None, on_section=None, resume=False):
+    started = time.perf_counter()
+    key = review_key(product_name, country)
+
+    if resume and run_id and os.path.exists(os.path.join(workspace_dir_for(run_id), RUN_MANIFEST)):
+        output_dir = workspace_dir_for(run_id)
+        print(f"[INFO] Resuming run {run_id}")
+    else:
+        run_id, output_dir = create_run_workspace(product_name, run_id=run_id, country=country)
+    trace_file = os.path.join(output_dir, TRACE_FILE)
+
+    checkpoint = ReviewCheckpoint(output_dir, key)
+    restore = resume and not refresh
+
+    with active_run(output_dir), traced_review(run_id, trace_file, product=product_name):
+        if on_section:
+            emit_sections(
+                on_section,
+                [("title", master_assembler.title_md(product_name))]
+                + master_assembler.static_sections(master_assembler.load_step1_2())
+            )
+
+        with span("step3_to_step4"):
+            step4 = checkpoint.load("step4_understanding") if restore else None
+            if step4 is not None:
+                raw_evidence = checkpoint.load("step3_evidence")
+                print("[OK] Step 4 restored from checkpoint")
+                if on_section:
+                    emit_classification_sections(on_section, step4)
+            else:
+                raw_evidence, step4 = get_single_flight().do(
+                    flight_key(key, refresh, fetch_backend),
+                    lambda: step3_to_step4.run(
+                        product_name,
+                        write_output=write_json,
+                        browser_pool=browser_pool,
+                        refresh=refresh,
+                        fetch_backend=fetch_backend,
+                        output_dir=output_dir,
+                        on_stage=on_stage,
+                        on_classification=(lambda partial: emit_classification_sections(on_section, partial)) if on_section else None,
+                        with_evidence=True,
+                        raw_evidence=checkpoint.load("step3_evidence") if restore else None,
+                        on_evidence=lambda evidence: checkpoint.save("step3_evidence", evidence)
+                    ),
+                    on_attach=(lambda: on_stage("waiting for an identical review already in progress")) if on_stage else None
+                )
+                # Also when this review attached to another one's execution
+                checkpoint.save("step3_evidence", raw_evidence)
+                checkpoint.save("step4_understanding", step4)
+
+        if on_stage:
+            on_stage("assembling review document")
+        result = assemble_review(step4, write_json=write_json, output_file=output_file, output_dir=output_dir)
+
+        with span("record_stages"):
+            record_review_stages(
+                output_dir,
+                key,
+                raw_evidence,
+                step4,
+                result["step5_8"],
+                result["step9"],
+                result["output_file"],
+                versions=checkpoint.versions
+            )
+
+        if on_section:
+            emit_sections(on_section, master_assembler.device_sections(step4))
+            emit_sections(on_section, master_assembler.classification_sections(step4, result["step5_8"], result["step9"]))
+
+    return {
+        "run_id": run_id,
+        "output_dir": output_dir,
+        "product_name": product_name,
+        **result,
+        "trace_file": trace_file,
+        "resumed_stages": checkpoint.restored,
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def stream_review(product_name, **kwargs):
+    # Yields (section_key, markdown) while the review runs, then
+    # ("complete", run_review result). Pipeline errors are re-raised here.
+    events = queue.Queue()
+
+    def worker():
+        try:
+            result = run_review(product_name, on_section=lambda key, md: events.put((key, md)), **kwargs)
+            events.put(("complete", result))
+        except Exception as e:
+            events.put(("error", e))
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    while True:
+        key, value = events.get()
+        if key == "error":
+            raise value
+        yield key, value
+        if key == "complete":
+            return
@@ -0,0 +1,88 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+from mfds_evidence_cache import normalize_search_term
+
+# ==============================
+# SINGLE-FLIGHT COALESCING
+# ==============================
+# When several callers ask for the same review at the same time, only the
+# first one (the leader) runs the work. The others attach to the leader's
+# in-flight call and get the same result, or the same exception, when it
+# finishes. Keys are released once the call completes, so a later request
+# runs again (and normally hits the evidence / LLM caches). Followers get
+# a deep copy so they can never mutate the leader's result.
+#
+# flight_key() adds the fetch options to a review key: a refresh request
+# must never attach to a flight that may answer from the evidence cache,
+# and an HTTP lookup must not stand in for a Playwright one.
+#
+#   flight = get_single_flight()
+#   key = flight_key(review_key("oximeter", country), refresh, fetch_backend)
+#   step4 = flight.do(key, lambda: build(...))
+
+DEFAULT_COUNTRY = "South Korea (MFDS)"
+
+
+def review_key(product_name, country=None):
+    return f"{normalize_search_term(country or DEFAULT_COUNTRY)}|{normalize_search_term(product_name)}"
+
+
+def flight_key(key, refresh=False, fetch_backend=None):
+    return f"{key}|{'refresh' if refresh else 'cached'}|{fetch_backend or 'default'}"
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"executions": 0, "executions_saved": 0}
+
+    def do(self, key, fn, on_attach=None):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats["executions"] += 1
+            else:
+                self._stats["executions_saved"] += 1
+
+        if not leader:
+            if on_attach:
+                on_attach()
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+# ==============================
+# PROCESS-WIDE INSTANCE
+# ==============================
+_default_flight = None
+_default_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    global _default_flight
+    with _default_flight_lock:
+        if _default_flight is None:
+            _default_flight = SingleFlight()
+        return _default_flight
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# ==============================
+# SHARED SQLITE STORES
+# ==============================
+# The evidence and LLM caches, the catalog, the name resolver and the
+# evidence archive each keep one SQLite file that batch workers and the
+# Streamlit app use at the same time. connect_store() opens a short-lived
+# connection in WAL mode (readers never block the writer), waits up to
+# BUSY_TIMEOUT_SECONDS for a lock, commits when the block exits and
+# rolls back if it raises. Connections are never shared between threads.
+
+BUSY_TIMEOUT_SECONDS = 30
+
+
+def create_store_dir(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+@contextmanager
+def connect_store(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -1,54 +1,159 @@
-from playwright.sync_api import sync_playwright
+from mfds_browser_pool import BrowserPool, POOL_SIZE, get_browser_pool
+from mfds_catalog import get_catalog
+from mfds_evidence_cache import get_evidence_cache
+from mfds_llm_batcher import LLMBatcher, packed_prompt
+from mfds_llm_cache import get_llm_cache
+from mfds_name_resolver import get_name_resolver, is_english_query, search_terms
+from mfds_openai_client import get_openai_client
+from mfds_emedi_parser import FIELD_LABELS, parse_detail_text, is_complete, needs_translation
+from mfds_evidence_reducer import reduce_evidence
+from mfds_json_stream import IncrementalJSONObject, conform, schema_problems
+from mfds_emedi_guard import EmediUnavailable, get_emedi_guard
+from mfds_emedi_http import NO_RESULT_MARKERS, HttpFetchError, fetch_detail as fetch_detail_http, fetch_raw_evidence as fetch_raw_evidence_http
+from mfds_tracing import record_span, span, traced
+from contextlib import contextmanager
 from datetime import datetime
 import json
 import os
-import requests
+import time
 import argparse
 import subprocess
 from pathlib import Path
 import sys
+import threading
 
-def ensure_playwright_chromium():
-    browser_root = Path.home() / ".cache" / "ms-playwright"
+# Importing this module has no side effects: Playwright is imported and
+# Chromium installed only when a lookup first needs the browser, requests
+# is imported by the HTTP clients on first use, and the command line is
+# parsed by main() / configure(). The OpenAI key is checked on the first
+# LLM call, so cached reviews run without one.
 
-    if not browser_root.exists():
-        print("[INFO] Chromium not found. Installing Playwright Chromium at runtime...")
-        subprocess.run(
-            [sys.executable, "-m", "playwright", "install", "chromium"],
-            check=True
-        )
-    else:
-        print("[INFO] Playwright Chromium already installed.")
+_chromium_checked = False
+_chromium_lock = threading.Lock()
 
-ensure_playwright_chromium()
 
+@traced("ensure_playwright_chromium")
+def ensure_playwright_chromium():
+    global _chromium_checked
+    with _chromium_lock:
+        if _chromium_checked:
+            return
+        browser_root = Path.home() / ".cache" / "ms-playwright"
+
+        if not browser_root.exists():
+            print("[INFO] Chromium not found. Installing Playwright Chromium at runtime...")
+            subprocess.run(
+                [sys.executable, "-m", "playwright", "install", "chromium"],
+                check=True
+            )
+        else:
+            print("[INFO] Playwright Chromium already installed.")
+        _chromium_checked = True
 
 
 # ================= CONFIG =================
-MFDS_SEARCH_URL = "https://emedi.mfds.go.kr/search/data/MNU20237#list"
+MFDS_BASE_URL = os.getenv("MFDS_BASE_URL", "https://emedi.mfds.go.kr").rstrip("/")
+MFDS_SEARCH_URL = f"{MFDS_BASE_URL}/search/data/MNU20237#list"
 SEARCH_LABEL = "명칭"
 SEARCH_BUTTON_TEXT = "검색"
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--product", required=False, default="oximeter")
-parser.add_argument(
-    "--show-browser",
-    action="store_true",
-    help="Show browser during MFDS data collection (debug only)"
+FETCH_BACKENDS = ["auto", "http", "playwright"]
+
+# Playwright scrape profiles. Both wait until the click on the first result
+# has navigated away from the result list, so that load states belong to
+# the detail document. "fast" then blocks non-essential resources and
+# waits for the detail fields instead of networkidle: the first of a
+# detail-only field label (the labels mfds_emedi_parser reads) showing up
+# in the page text, or the page going network-idle without one (unknown
+# layout). Both are checked in short slices, so an unknown layout costs no
+# more than the standard profile; DETAIL_WAIT_MS caps a page that reaches
+# neither. MFDS_DETAIL_SELECTOR optionally names a container to read
+# instead of the whole body when the page has one. No container selector
+# has been checked against the live site, so none is assumed.
+DETAIL_READY_LABELS = (
+    FIELD_LABELS["approval_date"] + FIELD_LABELS["device_description_ko"] + FIELD_LABELS["intended_use_ko"]
 )
-args, _ = parser.parse_known_args()
+DETAIL_READY_SCRIPT = "labels => !!document.body && labels.some(label => document.body.innerText.includes(label))"
+DETAIL_CONTENT_SELECTOR = os.getenv("MFDS_DETAIL_SELECTOR", "")
+DETAIL_NAVIGATION_MS = 10000
+DETAIL_WAIT_MS = int(os.getenv("MFDS_DETAIL_WAIT_MS", "15000"))
+DETAIL_POLL_MS = 200
+SCRAPE_PROFILES = {
+    "standard": {
+        "block_resource_types": [],
+        "goto_wait_until": "load",
+        "wait_for_selectors": False
+    },
+    "fast": {
+        "block_resource_types": ["image", "font", "stylesheet", "media"],
+        "goto_wait_until": "domcontentloaded",
+        "wait_for_selectors": True
+    }
+}
 
-SEARCH_VALUE = args.product
-SHOW_BROWSER = args.show_browser
+# Library defaults; configure() applies the command line on top
+SEARCH_VALUE = "oximeter"
+SHOW_BROWSER = False
+REFRESH_EVIDENCE = False
+FETCH_BACKEND = os.getenv("MFDS_FETCH_BACKEND", "auto")
+SCRAPE_PROFILE = os.getenv("MFDS_SCRAPE_PROFILE", "standard")
+OUTPUT_DIR = "output"
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = "gpt-4o-mini"
+LLM_TEMPERATURE = 0.1
+LLM_MAX_EVIDENCE_CHARS = 12000
+# Stream the full-extraction completion so the classification fields can
+# be used before the translations finish (MFDS_LLM_STREAM=0 disables)
+LLM_STREAM = os.getenv("MFDS_LLM_STREAM", "1") != "0"
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--product", required=False, default=SEARCH_VALUE)
+    parser.add_argument(
+        "--show-browser",
+        action="store_true",
+        help="Show browser during MFDS data collection (debug only)"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached MFDS evidence and scrape e-Medi again"
+    )
+    parser.add_argument(
+        "--fetch-backend",
+        choices=FETCH_BACKENDS,
+        default=FETCH_BACKEND,
+        help="auto: plain HTTP, Playwright only if that fails; http / playwright: force one backend"
+    )
+    parser.add_argument(
+        "--scrape-profile",
+        choices=list(SCRAPE_PROFILES),
+        default=SCRAPE_PROFILE,
+        help="Playwright scrape profile (fast: blocked assets, selector waits, detail-only text)"
+    )
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Run workspace to write step JSON to")
+    return parser
 
-if not OPENAI_API_KEY:
-    raise RuntimeError("OPENAI_API_KEY environment variable is not set")
 
-OUTPUT_DIR = "output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+def configure(argv=None):
+    # Unknown arguments are ignored so wrapper CLIs can pass theirs through
+    global SEARCH_VALUE, SHOW_BROWSER, REFRESH_EVIDENCE, FETCH_BACKEND, SCRAPE_PROFILE, OUTPUT_DIR
+    args, _ = build_arg_parser().parse_known_args(argv)
+
+    SEARCH_VALUE = args.product
+    SHOW_BROWSER = args.show_browser
+    REFRESH_EVIDENCE = args.refresh
+    FETCH_BACKEND = args.fetch_backend
+    SCRAPE_PROFILE = args.scrape_profile
+    OUTPUT_DIR = args.output_dir
+    return args
+
+
+def openai_client():
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY environment variable is not set")
+    return get_openai_client(OPENAI_API_KEY)
 # ==========================================
 
 
@@ -70,8 +175,9 @@ def normalize_risk_class(raw):
     return f"Class {raw}"
 
 
-def call_llm(raw_text):
-    prompt = f"""
+LLM_SYSTEM_PROMPT = "You are a cautious regulatory analyst who outputs valid JSON only."
+
+LLM_PROMPT_TEMPLATE = """
 You are a regulatory analyst assistant.
 
 The text below is raw evidence from MFDS (South Korea).
@@ -86,51 +192,275 @@ Rules:
 - Clearly flag derived interpretations
 - Output STRICT JSON only (no markdown, no commentary)
 
-Required JSON schema:
+Required JSON schema (keys in this order):
 {{
-  "product_name": {{ "original_ko": "", "translated_en": "" }},
-  "device_description": {{ "original_ko": "", "translated_en": "" }},
-  "intended_use": {{ "original_ko": "", "translated_en": "" }},
   "risk_class": "",
   "approval_number": "",
   "approval_date": "",
+  "product_name": {{ "original_ko": "", "translated_en": "" }},
+  "device_description": {{ "original_ko": "", "translated_en": "" }},
+  "intended_use": {{ "original_ko": "", "translated_en": "" }},
   "confidence_notes": ""
 }}
 
 MFDS TEXT:
-\"\"\"{raw_text[:12000]}\"\"\"
+\"\"\"{raw_text}\"\"\"
 """
 
-    response = requests.post(
-        "https://api.openai.com/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        },
-        json={
+
+LLM_TRANSLATION_PROMPT_TEMPLATE = """
+You are a regulatory translation assistant.
+
+The JSON below holds Korean fields read from an MFDS (South Korea)
+product listing. Translate each value into English.
+
+Rules:
+- Translate faithfully; do NOT add claims that are not in the source
+- Keep empty values empty
+- Output STRICT JSON only (no markdown, no commentary)
+
+Required JSON schema:
+{{
+  "product_name": "",
+  "device_description": "",
+  "intended_use": ""
+}}
+
+MFDS FIELDS:
+\"\"\"{raw_text}\"\"\"
+"""
+
+
+# Keys every answer must carry (also used to validate packed answers)
+LLM_EXTRACTION_KEYS = [
+    "product_name", "device_description", "intended_use",
+    "risk_class", "approval_number", "approval_date"
+]
+LLM_TRANSLATION_KEYS = ["product_name", "device_description", "intended_use"]
+LLM_PAYLOAD_MARKER = "<<ITEM TEXT>>"
+CLASSIFICATION_KEYS = ["risk_class", "approval_number", "approval_date"]
+
+
+def prompt_schema(prompt_template):
+    # The JSON skeleton written in the prompt, for validating answers
+    text = prompt_template.format(raw_text="").split("Required JSON schema", 1)[1]
+    return json.loads(text[text.index("{"):text.rindex("}", 0, text.index("MFDS TEXT")) + 1])
+
+
+LLM_EXTRACTION_SCHEMA = prompt_schema(LLM_PROMPT_TEMPLATE)
+
+
+def request_llm_json(prompt_template, raw_text, llm_cache=None, llm_batcher=None, required_keys=(),
+                     schema=None, on_value=None):
+    cache_key = None
+    if llm_cache is not None:
+        cache_key = llm_cache.make_key(
+            raw_text,
+            LLM_SYSTEM_PROMPT + prompt_template,
+            OPENAI_MODEL,
+            LLM_TEMPERATURE
+        )
+        with span("llm_cache.get") as attrs:
+            cached = llm_cache.get(cache_key)
+            if cached is not None and schema and schema_problems(cached, schema):
+                # Written before packed answers were schema-checked
+                cached = None
+            attrs["hit"] = cached is not None
+        if cached is not None:
+            print("[OK] LLM response served from cache")
+            return cached
+
+    if llm_batcher is not None:
+        answer = llm_batcher.submit(prompt_template, raw_text, required_keys, schema).result()
+        if answer is not None:
+            parsed, total_tokens = answer
+            if llm_cache is not None:
+                llm_cache.put(cache_key, parsed, model=OPENAI_MODEL, total_tokens=total_tokens)
+            return parsed
+        print("[INFO] No valid packed answer for this item; sending it on its own")
+
+    prompt = prompt_template.format(raw_text=raw_text)
+    payload = {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": LLM_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": LLM_TEMPERATURE
+    }
+    stream = on_value is not None and LLM_STREAM
+
+    with span("openai.chat_completion", model=OPENAI_MODEL, prompt_chars=len(prompt), stream=stream) as attrs:
+        if stream:
+            started = time.perf_counter()
+            partial = IncrementalJSONObject()
+
+            def on_delta(text):
+                for key, value in partial.feed(text):
+                    attrs.setdefault("first_value_s", round(time.perf_counter() - started, 3))
+                    on_value(key, value)
+
+            body = openai_client().chat_completion_stream(payload, on_delta)
+        else:
+            body = openai_client().chat_completion(payload)
+        attrs["total_tokens"] = (body.get("usage") or {}).get("total_tokens", 0)
+
+    parsed = safe_json_parse(body["choices"][0]["message"]["content"])
+
+    problems = schema_problems(parsed, schema) if schema else []
+    if problems:
+        # Usable with empty values, but not worth caching
+        print(f"[WARN] LLM answer does not match the prompt schema: {'; '.join(problems)}")
+        return conform(parsed, schema)
+
+    if llm_cache is not None:
+        llm_cache.put(
+            cache_key,
+            parsed,
+            model=OPENAI_MODEL,
+            total_tokens=(body.get("usage") or {}).get("total_tokens", 0)
+        )
+
+    return parsed
+
+
+def send_packed_llm_request(prompt_template, texts):
+    # One completion for several items; the task text is sent once
+    task = prompt_template.format(raw_text=LLM_PAYLOAD_MARKER).split(f'"""{LLM_PAYLOAD_MARKER}"""')[0].strip()
+    prompt, item_ids = packed_prompt(task, texts)
+
+    with span("openai.chat_completion", model=OPENAI_MODEL, prompt_chars=len(prompt), items=len(texts)) as attrs:
+        body = openai_client().chat_completion({
             "model": OPENAI_MODEL,
             "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a cautious regulatory analyst who outputs valid JSON only."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+                {"role": "system", "content": LLM_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
             ],
-            "temperature": 0.1
-        },
-        timeout=60
+            "temperature": LLM_TEMPERATURE
+        })
+        total_tokens = (body.get("usage") or {}).get("total_tokens", 0)
+        attrs["total_tokens"] = total_tokens
+
+    parsed = safe_json_parse(body["choices"][0]["message"]["content"])
+    if not isinstance(parsed, dict):
+        raise ValueError("Packed answer is not a JSON object")
+    return {item_id: parsed.get(item_id) for item_id in item_ids}, total_tokens
+
+
+def make_llm_batcher(max_items=8, max_wait=0.25):
+    return LLMBatcher(send_packed_llm_request, max_items=max_items, max_wait=max_wait)
+
+
+@traced("call_llm")
+def call_llm(raw_text, llm_cache=None, llm_batcher=None, on_fields=None):
+    # Only the schema-relevant blocks of a labelled page go to the model;
+    # other pages lose their site chrome only
+    with span("reduce_evidence") as attrs:
+        evidence, stats = reduce_evidence(raw_text, max_chars=LLM_MAX_EVIDENCE_CHARS)
+        attrs.update(stats)
+    if stats["missing_labels"]:
+        print(
+            f"[INFO] No labels for {', '.join(stats['missing_labels'])}; sending the page text without "
+            f"site chrome ({stats['chars_in']} -> {stats['chars_out']} chars)"
+        )
+    else:
+        print(
+            f"[INFO] Evidence reduced {stats['chars_in']} -> {stats['chars_out']} chars "
+            f"(~{stats['tokens_saved_est']} tokens saved)"
+        )
+
+    # Classification fields come first in the schema; hand them on while
+    # the translations are still streaming
+    early = {}
+
+    def on_value(key, value):
+        if on_fields is None or early.get("sent"):
+            return
+        early[key] = value
+        if all(k in early for k in CLASSIFICATION_KEYS):
+            early["sent"] = True
+            on_fields({k: early[k] or "" for k in CLASSIFICATION_KEYS})
+
+    interpreted = request_llm_json(
+        LLM_PROMPT_TEMPLATE,
+        evidence,
+        llm_cache=llm_cache,
+        llm_batcher=llm_batcher,
+        required_keys=LLM_EXTRACTION_KEYS,
+        schema=LLM_EXTRACTION_SCHEMA,
+        on_value=on_value if on_fields else None
     )
 
-    if response.status_code != 200:
-        raise RuntimeError(
-            f"OpenAI API error [{response.status_code}]: {response.text}"
-        )
+    if on_fields and not early.get("sent"):
+        on_fields({k: interpreted.get(k) or "" for k in CLASSIFICATION_KEYS})
+    return interpreted
+
+
+@traced("translate_fields")
+def translate_fields(fields, llm_cache=None, llm_batcher=None):
+    source = {
+        "product_name": fields["product_name_ko"],
+        "device_description": fields["device_description_ko"],
+        "intended_use": fields["intended_use_ko"]
+    }
+
+    # Nothing Korean to translate: no LLM round-trip at all
+    if not any(needs_translation(v) for v in source.values()):
+        return source
+
+    translated = request_llm_json(
+        LLM_TRANSLATION_PROMPT_TEMPLATE,
+        json.dumps(source, ensure_ascii=False, indent=2),
+        llm_cache=llm_cache,
+        llm_batcher=llm_batcher,
+        required_keys=LLM_TRANSLATION_KEYS
+    )
+    return {key: translated.get(key) or "" for key in source}
+
+
+def interpret_evidence(raw_text, llm_cache=None, on_fields=None, llm_batcher=None):
+    with span("parse_detail_text"):
+        fields = parse_detail_text(raw_text)
+
+    if not is_complete(fields):
+        print("[INFO] Labelled MFDS fields incomplete, using full LLM extraction")
+        return call_llm(raw_text, llm_cache=llm_cache, llm_batcher=llm_batcher, on_fields=on_fields)
 
-    content = response.json()["choices"][0]["message"]["content"]
-    return safe_json_parse(content)
+    print("[OK] MFDS fields parsed from detail page")
+
+    # Classification is final here; let callers use it before translation
+    if on_fields:
+        on_fields(fields)
+
+    translated = translate_fields(fields, llm_cache=llm_cache, llm_batcher=llm_batcher)
+
+    return {
+        "product_name": {
+            "original_ko": fields["product_name_ko"],
+            "translated_en": translated["product_name"]
+        },
+        "device_description": {
+            "original_ko": fields["device_description_ko"],
+            "translated_en": translated["device_description"]
+        },
+        "intended_use": {
+            "original_ko": fields["intended_use_ko"],
+            "translated_en": translated["intended_use"]
+        },
+        "risk_class": fields["risk_class"],
+        "approval_number": fields["approval_number"],
+        "approval_date": fields["approval_date"],
+        "confidence_notes": (
+            "Risk class, approval number and approval date were read directly "
+            "from labelled fields of the MFDS listing."
+        )
+    }
 
 
 META = {
@@ -190,95 +520,397 @@ def build_classification(p):
     return text
 
 
+def build_classification_section(risk_class, approval_number, approval_date):
+    return {
+        "section_title": "Classification",
+        "content": build_classification({"risk_class": risk_class, "approval_number": approval_number}),
+        "risk_class": risk_class,
+        "approval_number": approval_number,
+        "approval_date": approval_date
+    }
+
+
 # ================= MAIN =================
 
-def run():
-    print("MFDS Step 3 to Step 4 started")
+def write_json(path, data):
+    with span("write_json", file=os.path.basename(path)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
-    raw_evidence = None
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True,args=["--no-sandbox", "--disable-dev-shm-usage"])
-        page = browser.new_page()
+def _record_phase(timings, phase, started):
+    finished = time.perf_counter()
+    timings[phase] = round((finished - started) * 1000, 1)
+    record_span(f"page.{phase}", started, finished)
+
+
+def prepare_page(page, profile_name=None):
+    profile = SCRAPE_PROFILES[profile_name or SCRAPE_PROFILE]
+    blocked = set(profile["block_resource_types"])
+    if blocked:
+        page.route(
+            "**/*",
+            lambda route: route.abort()
+            if route.request.resource_type in blocked
+            else route.continue_()
+        )
 
-        page.goto(MFDS_SEARCH_URL, timeout=60000)
+
+@traced("page.open_search")
+def open_search_page(page, profile_name=None):
+    profile = SCRAPE_PROFILES[profile_name or SCRAPE_PROFILE]
+
+    if page.url.split("#")[0] == MFDS_SEARCH_URL.split("#")[0]:
+        response = page.reload(timeout=60000, wait_until=profile["goto_wait_until"])
+    else:
+        response = page.goto(MFDS_SEARCH_URL, timeout=60000, wait_until=profile["goto_wait_until"])
+    if response is not None and (response.status == 429 or response.status >= 500):
+        raise EmediUnavailable(f"e-Medi returned HTTP {response.status} for the search page")
+
+    if profile["wait_for_selectors"]:
+        page.get_by_label(SEARCH_LABEL).wait_for(timeout=60000)
+    else:
         page.wait_for_load_state("networkidle")
 
-        page.get_by_label(SEARCH_LABEL).fill(SEARCH_VALUE)
-        page.get_by_role("button", name=SEARCH_BUTTON_TEXT, exact=True).click()
 
-        try:
-            page.wait_for_selector("table tbody tr", timeout=10000)
-            page.locator("table tbody tr").first.locator("a").first.click()
+def search_and_capture(page, search_value, profile_name=None, timings=None):
+    # Expects the page to already show the e-Medi search form
+    profile_name = profile_name or SCRAPE_PROFILE
+    profile = SCRAPE_PROFILES[profile_name]
+    timings = {} if timings is None else timings
+
+    started = time.perf_counter()
+    page.get_by_label(SEARCH_LABEL).fill(search_value)
+    page.get_by_role("button", name=SEARCH_BUTTON_TEXT, exact=True).click()
+    _record_phase(timings, "search", started)
+
+    try:
+        started = time.perf_counter()
+        page.wait_for_selector("table tbody tr", timeout=10000)
+        _record_phase(timings, "result_wait", started)
+
+        started = time.perf_counter()
+        navigated = open_first_result(page)
+        text_selector = "body"
+        if profile["wait_for_selectors"]:
+            text_selector = wait_for_detail_content(page, navigated)
+        else:
             page.wait_for_load_state("networkidle")
+        _record_phase(timings, "detail_load", started)
 
-            visible_text = page.locator("body").inner_text()
-
-            raw_evidence = {
-                "source_url": page.url,
-                "page_title": page.title(),
-                "access_date": datetime.utcnow().isoformat(),
-                "visible_text": visible_text,
-                "human_verified": False
-            }
+        started = time.perf_counter()
+        visible_text = page.locator(text_selector).first.inner_text()
+        _record_phase(timings, "extract", started)
 
-            with open(f"{OUTPUT_DIR}/step3_raw_evidence.json", "w", encoding="utf-8") as f:
-                json.dump(raw_evidence, f, ensure_ascii=False, indent=2)
+        print(
+            f"[INFO] Scrape timings ({profile_name}): "
+            + ", ".join(f"{phase}={ms:.0f}ms" for phase, ms in timings.items())
+        )
 
-            print("[OK] Step 3 evidence captured")
+        return {
+            "source_url": page.url,
+            "page_title": page.title(),
+            "access_date": datetime.utcnow().isoformat(),
+            "visible_text": visible_text,
+            "human_verified": False,
+            "fetch_backend": "playwright",
+            "scrape_profile": profile_name,
+            "scrape_timings_ms": timings
+        }
 
-        except Exception:
+    except Exception:
+        # Only a result page that says so means "not found"; whether any
+        # other error means e-Medi did not answer is up to page_lookup()
+        if shows_no_results(page):
             print("[WARN] No valid MFDS product found in public listings")
+            return None
+        raise
+
+
+def open_first_result(page):
+    list_url = page.url
+    page.locator("table tbody tr").first.locator("a").first.click()
+    try:
+        page.wait_for_url(lambda url: url != list_url, wait_until="commit", timeout=DETAIL_NAVIGATION_MS)
+        return True
+    except Exception:
+        # Same URL: the detail is rendered into the result page by script
+        return False
+
+
+def wait_for_detail_content(page, navigated=True):
+    # First of: a detail field label is on the page, or the detail
+    # document goes network-idle without one. Without a navigation the
+    # load state is still the result list's, so only labels count.
+    deadline = time.perf_counter() + DETAIL_WAIT_MS / 1000
+    while True:
+        try:
+            page.wait_for_function(DETAIL_READY_SCRIPT, arg=DETAIL_READY_LABELS, timeout=DETAIL_POLL_MS)
+            break
+        except Exception:
+            pass
+        if navigated:
+            try:
+                page.wait_for_load_state("networkidle", timeout=DETAIL_POLL_MS)
+                if not page.evaluate(DETAIL_READY_SCRIPT, DETAIL_READY_LABELS):
+                    print("[WARN] No detail field labels on the loaded page, reading it as is")
+                break
+            except Exception:
+                pass
+        if time.perf_counter() >= deadline:
+            print("[WARN] Detail fields did not show up in time, reading the page as is")
+            break
+
+    if DETAIL_CONTENT_SELECTOR and page.locator(DETAIL_CONTENT_SELECTOR).count():
+        return DETAIL_CONTENT_SELECTOR
+    return "body"
+
+
+# Ready state and HTTP status of the page's current document
+DOCUMENT_STATE_SCRIPT = (
+    "() => { const nav = performance.getEntriesByType('navigation')[0];"
+    " return [document.readyState, (nav && nav.responseStatus) || 0]; }"
+)
+
+
+def is_site_failure(page, error):
+    # Site health, not layout: a network error, a 429/5xx document, or a
+    # timeout while the document itself is still loading. A selector that
+    # times out on a fully loaded page means the layout changed.
+    from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+    if not isinstance(error, PlaywrightError):
+        return False
+    if "net::ERR_" in str(error):
+        return True
+    try:
+        ready_state, status = page.evaluate(DOCUMENT_STATE_SCRIPT)
+    except Exception:
+        return isinstance(error, PlaywrightTimeoutError)
+    if status == 429 or status >= 500:
+        return True
+    return isinstance(error, PlaywrightTimeoutError) and ready_state != "complete"
+
+
+@contextmanager
+def page_lookup(page, name="playwright.lookup"):
+    # Only the page's own navigation and actions are an e-Medi request for
+    # the guard; browser start-up and pool queueing are not
+    with get_emedi_guard().request(name):
+        try:
+            yield
+        except EmediUnavailable:
+            raise
+        except Exception as e:
+            if not is_site_failure(page, e):
+                raise
+            raise EmediUnavailable(f"e-Medi did not answer ({type(e).__name__}: {e})")
+
+
+def lookup_on_page(page, search_value, profile_name=None, timings=None):
+    with page_lookup(page):
+        return search_and_capture(page, search_value, profile_name, timings)
+
+
+def shows_no_results(page):
+    try:
+        text = page.locator("body").first.inner_text(timeout=5000)
+    except Exception:
+        return False
+    return any(marker in text for marker in NO_RESULT_MARKERS)
+
+
+def make_browser_pool(max_concurrency=POOL_SIZE, profile_name=None):
+    profile_name = profile_name or SCRAPE_PROFILE
+    return BrowserPool(
+        MFDS_SEARCH_URL,
+        max_concurrency=max_concurrency,
+        prepare_page=lambda page: prepare_page(page, profile_name),
+        open_search_page=lambda page: open_search_page(page, profile_name),
+        profile_name=profile_name
+    )
+
+
+def get_default_browser_pool(profile_name=None):
+    profile_name = profile_name or SCRAPE_PROFILE
+    return get_browser_pool(lambda: make_browser_pool(profile_name=profile_name), key=profile_name)
+
+
+def capture_with_playwright(search_value, browser_pool=None, profile_name=None):
+    from playwright.sync_api import Error as PlaywrightError
+
+    ensure_playwright_chromium()
+    try:
+        return _capture_with_playwright(search_value, browser_pool, profile_name)
+    except PlaywrightError as e:
+        # A pool slot loading the search form outside a lookup
+        if "net::ERR_" not in str(e):
+            raise
+        raise EmediUnavailable(f"e-Medi could not be reached: {e}")
+
+
+def _capture_with_playwright(search_value, browser_pool=None, profile_name=None):
+    if browser_pool is not None:
+        # The pool's pages are routed and loaded for its own profile
+        profile_name = browser_pool.profile_name or profile_name
+        with span("browser_pool.run"):
+            return browser_pool.run(lambda page: lookup_on_page(page, search_value, profile_name))
+
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        with span("browser.launch"):
+            browser = p.chromium.launch(headless=True,args=["--no-sandbox", "--disable-dev-shm-usage"])
+            page = browser.new_page()
+        prepare_page(page, profile_name)
+
+        timings = {}
+        with page_lookup(page):
+            started = time.perf_counter()
+            open_search_page(page, profile_name)
+            _record_phase(timings, "goto", started)
+
+            raw_evidence = search_and_capture(page, search_value, profile_name, timings)
 
         browser.close()
 
-    if not raw_evidence:
-        print("[WARN] Falling back to conservative Step-4 output")
+    return raw_evidence
 
-        step4_output = {
-            "meta": META,
-            "product_identity": {"product_name": SEARCH_VALUE},
-            "about_device": {
-                "section_title": "About the Device",
-                "content": (
-                    "No publicly available MFDS product listing with normal status was "
-                    "identified for this product designation at the time of review. "
-                    "This description is based on general product understanding and is "
-                    "provided for internal procurement reference only."
-                )
-            },
-            "classification": {
-                "section_title": "Classification",
-                "content": (
-                    "Public MFDS classification information could not be identified "
-                    "from available listings. Risk classification and regulatory "
-                    "pathway should be confirmed through formal regulatory assessment."
-                ),
-                "risk_class": "Unknown",
-                "approval_number": "",
-                "approval_date": ""
-            },
-            "evidence_traceability": {
-                "source_url": MFDS_SEARCH_URL,
-                "accessed_at": datetime.utcnow().isoformat()
-            }
-        }
 
-        with open(f"{OUTPUT_DIR}/step4_product_understanding.json", "w", encoding="utf-8") as f:
-            json.dump(step4_output, f, indent=2, ensure_ascii=False)
+def fetch_from_catalog(search_value, catalog):
+    # Local catalog hit: fetch only the known detail page, no search form
+    with span("catalog.lookup") as attrs:
+        entry = catalog.lookup(search_value)
+        attrs["hit"] = bool(entry and entry["fresh"])
+    if not entry or not entry["fresh"]:
+        return None
 
-        print("[OK] Step 4 generated with conservative fallback")
-        return
+    try:
+        with span("fetch_evidence.catalog"):
+            raw_evidence = fetch_detail_http(entry["detail_url"])
+    except HttpFetchError as e:
+        print(f"[WARN] Catalog entry could not be verified ({e}); using live search")
+        catalog.mark_stale(entry["detail_url"])
+        return None
+
+    raw_evidence["fetch_backend"] = "http+catalog"
+    print(f"[OK] Product resolved from local catalog: {entry['item_name']} / {entry['product_name']}")
+    return raw_evidence
+
+
+def fetch_evidence(search_value, browser_pool=None, fetch_backend="auto", catalog=None):
+    if fetch_backend != "playwright":
+        if catalog is not None:
+            raw_evidence = fetch_from_catalog(search_value, catalog)
+            if raw_evidence:
+                return raw_evidence
+
+        try:
+            with span("fetch_evidence.http"):
+                return fetch_raw_evidence_http(MFDS_SEARCH_URL, SEARCH_LABEL, search_value)
+        except HttpFetchError as e:
+            if fetch_backend == "http":
+                raise
+            print(f"[WARN] Plain HTTP fetch failed ({e}); falling back to Playwright")
+
+    with span("fetch_evidence.playwright"):
+        return capture_with_playwright(search_value, browser_pool=browser_pool)
+
+
+def collect_raw_evidence(search_value, write_output=True, browser_pool=None,
+                         evidence_cache=None, refresh=False, fetch_backend=None,
+                         output_dir=None, catalog=None, name_resolver=None):
+    raw_evidence = None
+
+    if evidence_cache is not None and not refresh:
+        with span("evidence_cache.get") as attrs:
+            raw_evidence = evidence_cache.get(search_value)
+            attrs["hit"] = raw_evidence is not None
+        if raw_evidence:
+            print(f"[OK] Step 3 evidence served from cache (captured {raw_evidence['access_date']})")
+
+    if raw_evidence is None:
+        terms = search_terms(search_value, name_resolver, catalog) if name_resolver else [search_value]
+        if terms[0] != search_value:
+            print(f"[INFO] English query resolved to Korean item names: {', '.join(terms[:-1])}")
+
+        try:
+            for term in terms:
+                raw_evidence = fetch_evidence(
+                    term,
+                    browser_pool=browser_pool,
+                    fetch_backend=fetch_backend or FETCH_BACKEND,
+                    catalog=catalog
+                )
+                if raw_evidence:
+                    break
+        except EmediUnavailable as e:
+            # Never report an outage as "no product found": serve the last
+            # capture, however old, or fail the review
+            stale = evidence_cache.get_stale(search_value) if evidence_cache is not None else None
+            if stale is None:
+                print(f"[ERROR] {e}")
+                raise
+            print(f"[WARN] {e}; using evidence captured {stale['access_date']}")
+            raw_evidence = {**stale, "emedi_unavailable": True}
+        else:
+            if raw_evidence:
+                raw_evidence["search_term"] = term
+                if name_resolver and is_english_query(search_value):
+                    name_resolver.confirm(search_value, parse_detail_text(raw_evidence["visible_text"])["product_name_ko"])
+                if catalog is not None:
+                    catalog.record_evidence(raw_evidence)
+                if evidence_cache is not None:
+                    with span("evidence_cache.put"):
+                        evidence_cache.put(search_value, raw_evidence)
+                print(f"[OK] Step 3 evidence captured ({raw_evidence['fetch_backend']})")
+
+    if raw_evidence and write_output:
+        write_json(os.path.join(output_dir or OUTPUT_DIR, "step3_raw_evidence.json"), raw_evidence)
+
+    return raw_evidence
+
+
+def build_fallback_step4(search_value):
+    return {
+        "meta": META,
+        "product_identity": {"product_name": search_value},
+        "about_device": {
+            "section_title": "About the Device",
+            "content": (
+                "No publicly available MFDS product listing with normal status was "
+                "identified for this product designation at the time of review. "
+                "This description is based on general product understanding and is "
+                "provided for internal procurement reference only."
+            )
+        },
+        "classification": {
+            "section_title": "Classification",
+            "content": (
+                "Public MFDS classification information could not be identified "
+                "from available listings. Risk classification and regulatory "
+                "pathway should be confirmed through formal regulatory assessment."
+            ),
+            "risk_class": "Unknown",
+            "approval_number": "",
+            "approval_date": ""
+        },
+        "evidence_traceability": {
+            "source_url": MFDS_SEARCH_URL,
+            "accessed_at": datetime.utcnow().isoformat()
+        }
+    }
 
-    interpreted = call_llm(raw_evidence["visible_text"])
 
+def build_step4_understanding(search_value, raw_evidence, interpreted):
     derived_intended_use = False
     if not interpreted["intended_use"]["translated_en"]:
         interpreted["intended_use"]["translated_en"] = interpreted["device_description"]["translated_en"]
         derived_intended_use = True
 
     procurement = {
-        "product_name": interpreted["product_name"]["translated_en"] or SEARCH_VALUE,
+        "product_name": interpreted["product_name"]["translated_en"] or search_value,
         "device_description": interpreted["device_description"]["translated_en"],
         "intended_use": interpreted["intended_use"]["translated_en"],
         "risk_class": normalize_risk_class(interpreted["risk_class"]),
@@ -287,7 +919,7 @@ def run():
         "confidence_notes": interpreted.get("confidence_notes")
     }
 
-    step4_understanding = {
+    return {
         "meta": META,
         "product_identity": {"product_name": procurement["product_name"]},
         "about_device": {
@@ -298,25 +930,106 @@ def run():
                 confidence_note=procurement.get("confidence_notes")
             )
         },
-        "classification": {
-            "section_title": "Classification",
-            "content": build_classification(procurement),
-            "risk_class": procurement["risk_class"],
-            "approval_number": procurement["approval_number"],
-            "approval_date": procurement["approval_date"]
-        },
+        "classification": build_classification_section(
+            procurement["risk_class"],
+            procurement["approval_number"],
+            procurement["approval_date"]
+        ),
         "evidence_traceability": {
             "source_url": raw_evidence["source_url"],
-            "accessed_at": raw_evidence["access_date"]
+            "accessed_at": raw_evidence["access_date"],
+            "retrieved_from_cache": bool(raw_evidence.get("served_from_cache"))
         }
     }
 
-    with open(f"{OUTPUT_DIR}/step4_product_understanding.json", "w", encoding="utf-8") as f:
-        json.dump(step4_understanding, f, indent=2, ensure_ascii=False)
+
+@traced("build_step4")
+def build_step4(search_value, raw_evidence, on_classification=None, llm_batcher=None):
+    if not raw_evidence:
+        print("[WARN] Falling back to conservative Step-4 output")
+        step4_output = build_fallback_step4(search_value)
+        print("[OK] Step 4 generated with conservative fallback")
+        return step4_output
+
+    # Partial Step-4 (meta + classification) is enough for Steps 5-9
+    def fields_ready(fields):
+        on_classification({
+            "meta": META,
+            "classification": build_classification_section(
+                normalize_risk_class(fields["risk_class"]),
+                fields["approval_number"],
+                fields["approval_date"]
+            )
+        })
+
+    interpreted = interpret_evidence(
+        raw_evidence["visible_text"],
+        llm_cache=get_llm_cache(),
+        on_fields=fields_ready if on_classification else None,
+        llm_batcher=llm_batcher
+    )
+
+    step4_understanding = build_step4_understanding(search_value, raw_evidence, interpreted)
 
     print("[OK] Step 4 product understanding generated")
+    return step4_understanding
+
+
+def run(product_name=None, write_output=True, browser_pool=None, refresh=None, fetch_backend=None,
+        output_dir=None, on_stage=None, on_classification=None, with_evidence=False,
+        raw_evidence=None, on_evidence=None):
+    # raw_evidence: evidence restored from a checkpoint (no fetch)
+    # on_evidence(raw_evidence): called before the LLM stage, to checkpoint it
+    print("MFDS Step 3 to Step 4 started")
+
+    search_value = product_name or SEARCH_VALUE
+
+    if raw_evidence is not None:
+        print(f"[OK] Step 3 evidence restored from checkpoint (captured {raw_evidence['access_date']})")
+    else:
+        if on_stage:
+            on_stage("fetching MFDS evidence")
+
+        evidence_cache = get_evidence_cache()
+        raw_evidence = collect_raw_evidence(
+            search_value,
+            write_output=write_output,
+            browser_pool=browser_pool,
+            evidence_cache=evidence_cache,
+            refresh=REFRESH_EVIDENCE if refresh is None else refresh,
+            fetch_backend=fetch_backend,
+            output_dir=output_dir,
+            catalog=get_catalog(),
+            name_resolver=get_name_resolver()
+        )
+
+        cache_stats = evidence_cache.stats()
+        print(
+            f"[INFO] Evidence cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"(hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['entries']} entries)"
+        )
+        if on_evidence and raw_evidence:
+            on_evidence(raw_evidence)
+
+    if on_stage:
+        on_stage("interpreting evidence")
+
+    step4 = build_step4(search_value, raw_evidence, on_classification=on_classification)
+
+    if write_output:
+        write_json(os.path.join(output_dir or OUTPUT_DIR, "step4_product_understanding.json"), step4)
+
     print("[OK] Script completed cleanly")
 
+    if with_evidence:
+        return raw_evidence, step4
+    return step4
 
-if __name__ == "__main__":
+
+def main(argv=None):
+    configure(argv)
     run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import argparse
 import json
 import os
 
-INPUT_FILE = "output/step4_product_understanding.json"
-OUTPUT_FILE = "output/step5_to_step8_sections.json"
+from mfds_tracing import span, traced
+
+OUTPUT_DIR = "output"
+INPUT_FILE_NAME = "step4_product_understanding.json"
+OUTPUT_FILE_NAME = "step5_to_step8_sections.json"
 
 # ==============================
 # REGULATORY RULE VERSIONING
@@ -29,6 +33,7 @@ def normalize_risk_class(risk_class):
 # ==============================
 # STEP-5: REGULATORY CONSIDERATIONS
 # ==============================
+@traced("build_step5")
 def build_step5(product_type, risk_class):
     if product_type != "medical_device":
         return None
@@ -92,6 +97,7 @@ def build_step5(product_type, risk_class):
 # ==============================
 # STEP-6: DOCUMENTATION REQUIRED
 # ==============================
+@traced("build_step6")
 def build_step6(product_type, risk_class):
     if product_type != "medical_device":
         return None
@@ -137,6 +143,7 @@ def build_step6(product_type, risk_class):
 # ==============================
 # STEP-7: LABELING / UDI / PMS
 # ==============================
+@traced("build_step7")
 def build_step7(product_type):
     if product_type != "medical_device":
         return None
@@ -163,6 +170,7 @@ def build_step7(product_type):
 # ==============================
 # STEP-8: PROCUREMENT IMPACT
 # ==============================
+@traced("build_step8")
 def build_step8(product_type, risk_class):
     if product_type != "medical_device":
         return None
@@ -199,18 +207,12 @@ def build_step8(product_type, risk_class):
 # ==============================
 # MAIN ASSEMBLER
 # ==============================
-def run():
-    if not os.path.exists(INPUT_FILE):
-        raise FileNotFoundError("step4_product_understanding.json not found")
-
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    product_type = data["meta"]["regulated_product_type"]
-    risk_class_raw = data["classification"]["risk_class"]
+def assemble_sections(step4):
+    product_type = step4["meta"]["regulated_product_type"]
+    risk_class_raw = step4["classification"]["risk_class"]
     risk_class = normalize_risk_class(risk_class_raw)
 
-    output = {
+    return {
         **RULES_META,
         "step5_regulatory_considerations": build_step5(product_type, risk_class),
         "step6_documents_required": build_step6(product_type, risk_class),
@@ -218,11 +220,30 @@ def run():
         "step8_procurement_impact": build_step8(product_type, risk_class)
     }
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+
+def run(step4=None, write_output=True, output_dir=OUTPUT_DIR):
+    if step4 is None:
+        input_file = os.path.join(output_dir, INPUT_FILE_NAME)
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"{input_file} not found")
+
+        with open(input_file, "r", encoding="utf-8") as f:
+            step4 = json.load(f)
+
+    output = assemble_sections(step4)
+
+    if write_output:
+        with span("write_json", file=OUTPUT_FILE_NAME):
+            with open(os.path.join(output_dir, OUTPUT_FILE_NAME), "w", encoding="utf-8") as f:
+                json.dump(output, f, indent=2, ensure_ascii=False)
 
     print("[OK] Step-5 to Step-8 (procurement-focused) sections assembled successfully")
 
+    return output
+
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Run workspace to read from and write to")
+    args, _ = parser.parse_known_args()
+    run(output_dir=args.output_dir)
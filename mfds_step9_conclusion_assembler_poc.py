@@ -1,9 +1,13 @@
+import argparse
 import json
 import os
 
-STEP4_FILE = "output/step4_product_understanding.json"
-STEP5_8_FILE = "output/step5_to_step8_sections.json"
-OUTPUT_FILE = "output/step9_conclusion.json"
+from mfds_tracing import span, traced
+
+OUTPUT_DIR = "output"
+STEP4_FILE_NAME = "step4_product_understanding.json"
+STEP5_8_FILE_NAME = "step5_to_step8_sections.json"
+OUTPUT_FILE_NAME = "step9_conclusion.json"
 
 
 def normalize_risk_class(risk_class):
@@ -16,6 +20,7 @@ def normalize_risk_class(risk_class):
     return mapping.get(risk_class, risk_class)
 
 
+@traced("build_step9")
 def build_step9_conclusion(product_type, risk_class, approval_number=None):
     disclaimer_required = False
 
@@ -94,22 +99,13 @@ def build_step9_conclusion(product_type, risk_class, approval_number=None):
     }
 
 
-def run():
-    if not os.path.exists(STEP4_FILE):
-        raise FileNotFoundError("step4_product_understanding.json not found")
-
-    if not os.path.exists(STEP5_8_FILE):
-        raise FileNotFoundError("step5_to_step8_sections.json not found")
-
-    with open(STEP4_FILE, "r", encoding="utf-8") as f:
-        step4 = json.load(f)
-
+def assemble_conclusion(step4):
     product_type = step4["meta"]["regulated_product_type"]
     risk_class_raw = step4["classification"]["risk_class"]
     risk_class = normalize_risk_class(risk_class_raw)
     approval_number = step4["classification"].get("approval_number")
 
-    output = {
+    return {
         "step9_conclusion": build_step9_conclusion(
             product_type,
             risk_class,
@@ -117,11 +113,35 @@ def run():
         )
     }
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+
+def run(step4=None, write_output=True, output_dir=OUTPUT_DIR):
+    if step4 is None:
+        step4_file = os.path.join(output_dir, STEP4_FILE_NAME)
+        step5_8_file = os.path.join(output_dir, STEP5_8_FILE_NAME)
+
+        if not os.path.exists(step4_file):
+            raise FileNotFoundError(f"{step4_file} not found")
+
+        if not os.path.exists(step5_8_file):
+            raise FileNotFoundError(f"{step5_8_file} not found")
+
+        with open(step4_file, "r", encoding="utf-8") as f:
+            step4 = json.load(f)
+
+    output = assemble_conclusion(step4)
+
+    if write_output:
+        with span("write_json", file=OUTPUT_FILE_NAME):
+            with open(os.path.join(output_dir, OUTPUT_FILE_NAME), "w", encoding="utf-8") as f:
+                json.dump(output, f, indent=2, ensure_ascii=False)
 
     print("[OK] Step-9 conclusion assembled successfully")
 
+    return output
+
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Run workspace to read from and write to")
+    args, _ = parser.parse_known_args()
+    run(output_dir=args.output_dir)
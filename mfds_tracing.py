@@ -0,0 +1,253 @@
+import argparse
+import contextvars
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ==============================
+# PIPELINE TRACING
+# ==============================
+# Lightweight spans around each pipeline stage, exported per review as a
+# Chrome trace-event file (open in chrome://tracing or ui.perfetto.dev).
+#
+#   with traced_review(run_id, "output/runs/<run_id>/trace.json"):
+#       with span("call_llm", chars=len(text)):
+#           ...
+#
+# The active review is held in a context variable. Work handed to another
+# thread keeps it only when the callable is wrapped with bind() (the
+# browser pool and batch executors do this). Spans recorded outside any
+# review, such as the Chromium install check at import or pool warm-up,
+# go to a process-level trace. The next review export takes them, so a
+# cold start shows up in the first review's trace.
+#
+#   python mfds_tracing.py output/batch_<id>/traces --top 15
+
+TRACE_FILE = "trace.json"
+TRACE_GLOB = "*.trace.json"
+
+REVIEW_PID = 1
+PROCESS_PID = 0
+
+_EPOCH = time.perf_counter()
+_current_tracer = contextvars.ContextVar("mfds_tracer", default=None)
+
+
+class Tracer:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._events = []
+
+    def add(self, name, started, finished, attrs=None):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": round((started - _EPOCH) * 1e6, 1),
+            "dur": round((finished - started) * 1e6, 1),
+            "tid": thread.ident,
+            "thread_name": thread.name,
+            "args": dict(attrs or {})
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self):
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+
+_process_tracer = Tracer("process")
+
+
+def current_tracer():
+    return _current_tracer.get() or _process_tracer
+
+
+@contextmanager
+def trace_review(name):
+    tracer = Tracer(name)
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def traced_review(name, path, **attrs):
+    # trace_review + a top-level "review" span, exported to path on exit
+    with trace_review(name) as tracer:
+        try:
+            with span("review", **attrs):
+                yield tracer
+        finally:
+            write_trace(tracer, path)
+
+
+@contextmanager
+def span(name, **attrs):
+    tracer = current_tracer()
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        tracer.add(name, started, time.perf_counter(), attrs)
+
+
+def record_span(name, started, finished=None, **attrs):
+    current_tracer().add(name, started, finished or time.perf_counter(), attrs)
+
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(fn):
+    # Run fn, possibly on another thread, inside the caller's trace context
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return wrapper
+
+
+# ==============================
+# EXPORT
+# ==============================
+def _chrome_events(events, pid):
+    threads = {}
+    out = []
+    for event in events:
+        event = dict(event)
+        threads[event["tid"]] = event.pop("thread_name")
+        out.append({**event, "pid": pid})
+
+    out += [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in threads.items()
+    ]
+    return out
+
+
+def write_trace(tracer, path):
+    events = _chrome_events(tracer.events(), REVIEW_PID)
+    process_events = _process_tracer.drain()
+    if process_events:
+        events += _chrome_events(process_events, PROCESS_PID)
+
+    events += [
+        {"name": "process_name", "ph": "M", "pid": REVIEW_PID, "tid": 0, "args": {"name": f"review {tracer.name}"}},
+        {"name": "process_name", "ph": "M", "pid": PROCESS_PID, "tid": 0, "args": {"name": "process (shared)"}}
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"review": tracer.name}}, f)
+
+    return path
+
+
+# ==============================
+# SUMMARY CLI
+# ==============================
+def find_trace_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "**", TRACE_GLOB), recursive=True))
+            files += sorted(glob.glob(os.path.join(path, "**", TRACE_FILE), recursive=True))
+        else:
+            files.append(path)
+    return files
+
+
+def summarize_traces(files, top=10):
+    spans = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            trace = json.load(f)
+        review = trace.get("otherData", {}).get("review", os.path.basename(path))
+        for event in trace["traceEvents"]:
+            if event.get("ph") == "X":
+                spans.append((event["dur"] / 1000.0, event["name"], review, event.get("args", {})))
+
+    by_name = {}
+    for duration, name, _, _ in spans:
+        by_name.setdefault(name, []).append(duration)
+
+    stages = []
+    for name, durations in by_name.items():
+        durations.sort()
+        stages.append({
+            "name": name,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "mean_ms": round(sum(durations) / len(durations), 1),
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1),
+            "max_ms": round(durations[-1], 1)
+        })
+    stages.sort(key=lambda s: s["total_ms"], reverse=True)
+
+    slowest = [
+        {"name": name, "review": review, "duration_ms": round(duration, 1), "args": args}
+        for duration, name, review, args in sorted(spans, key=lambda s: s[0], reverse=True)[:top]
+    ]
+
+    return {"traces": len(files), "spans": len(spans), "stages": stages, "slowest": slowest}
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="Trace files or directories (e.g. a batch traces/ folder)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest individual spans to list")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    files = find_trace_files(args.paths)
+    if not files:
+        print(f"[ERROR] No trace files found in {', '.join(args.paths)}")
+        raise SystemExit(1)
+
+    summary = summarize_traces(files, top=args.top)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+
+    print(f"[INFO] {summary['spans']} spans from {summary['traces']} trace file(s)\n")
+    print(f"{'stage':40} {'count':>6} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for s in summary["stages"]:
+        print(f"{s['name'][:40]:40} {s['count']:>6} {s['total_ms']:>10.1f} "
+              f"{s['mean_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+    print(f"\nSlowest {len(summary['slowest'])} spans:")
+    for s in summary["slowest"]:
+        print(f"  {s['duration_ms']:>9.1f} ms  {s['name']:32} {s['review']}")
+
+
+if __name__ == "__main__":
+    run()
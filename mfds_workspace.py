@@ -0,0 +1,108 @@
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==============================
+# PER-RUN WORKSPACES
+# ==============================
+# Every review gets its own run ID and directory under output/runs/, and
+# every step reads and writes only inside that directory. Concurrent
+# reviews therefore never share intermediate files or reports.
+#
+# While a review runs, its workspace holds run.lock with the process ID
+# (active_run). Resuming or taking over checkpoints skips active runs;
+# a lock left by a process that no longer exists is ignored.
+
+OUTPUT_DIR = "output"
+RUNS_DIR = os.getenv("MFDS_RUNS_DIR", os.path.join(OUTPUT_DIR, "runs"))
+RUN_MANIFEST = "run.json"
+RUN_LOCK = "run.lock"
+
+
+def new_run_id():
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+
+
+def create_run_workspace(product_name=None, run_id=None, base_dir=RUNS_DIR, country=None):
+    run_id = run_id or new_run_id()
+    workspace_dir = os.path.join(base_dir, run_id)
+    os.makedirs(workspace_dir, exist_ok=True)
+
+    with open(os.path.join(workspace_dir, RUN_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({
+            "run_id": run_id,
+            "product_name": product_name,
+            "country": country,
+            "created_at": datetime.utcnow().isoformat()
+        }, f, indent=2, ensure_ascii=False)
+
+    return run_id, workspace_dir
+
+
+def workspace_dir_for(run_id, base_dir=RUNS_DIR):
+    return os.path.join(base_dir, run_id)
+
+
+def load_run_manifest(workspace_dir):
+    with open(os.path.join(workspace_dir, RUN_MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_run_active(workspace_dir):
+    path = os.path.join(workspace_dir, RUN_LOCK)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            pid = int(f.read().strip())
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        # Lock file still being written
+        return True
+    return _pid_alive(pid)
+
+
+@contextmanager
+def active_run(workspace_dir):
+    path = os.path.join(workspace_dir, RUN_LOCK)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if is_run_active(workspace_dir):
+            raise RuntimeError(f"Run {os.path.basename(workspace_dir)} is already in progress")
+        # Left behind by a process that died
+        os.remove(path)
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def list_run_workspaces(base_dir=RUNS_DIR):
+    if not os.path.isdir(base_dir):
+        return []
+    return [
+        os.path.join(base_dir, name)
+        for name in sorted(os.listdir(base_dir))
+        if os.path.exists(os.path.join(base_dir, name, RUN_MANIFEST))
+    ]
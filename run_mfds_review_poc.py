@@ -11,13 +11,13 @@ SCRIPTS = [
 ]
 
 
-def run_script(script_name, product_name):
+def run_script(script_name, product_name, extra_args=None):
     print(f"\n>> Running {script_name}...")
     result = subprocess.run(
-        [sys.executable, script_name, "--product", product_name],
+        [sys.executable, script_name, "--product", product_name] + (extra_args or []),
         capture_output=True,
         text=True,
-        cwd=os.getcwd() 
+        cwd=os.getcwd()
     )
 
     if result.returncode != 0:
@@ -28,15 +28,8 @@ def run_script(script_name, product_name):
     print(result.stdout)
 
 
-def run():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--product", required=True, help="Medical device name to search in MFDS")
-    args = parser.parse_args()
-
-    product_name = args.product
-
-    print("Starting MFDS Procurement Review Pipeline")
-    print(f"Product selected: {product_name}")
+def run_subprocess_pipeline(product_name, refresh=False, fetch_backend=None):
+    from mfds_workspace import create_run_workspace
 
     # Sanity check
     for script in SCRIPTS:
@@ -44,9 +37,118 @@ def run():
             print(f"[ERROR] Missing script: {script}")
             sys.exit(1)
 
+    # Every script of this run reads and writes the same private workspace
+    run_id, output_dir = create_run_workspace(product_name)
+    print(f"[INFO] Run {run_id}: workspace {output_dir}")
+
     # Execute pipeline
+    extra_args = ["--output-dir", output_dir]
+    if refresh:
+        extra_args.append("--refresh")
+    if fetch_backend:
+        extra_args += ["--fetch-backend", fetch_backend]
+
     for script in SCRIPTS:
-        run_script(script, product_name)
+        run_script(script, product_name, extra_args)
+
+
+def run_inprocess_pipeline(product_name, write_json=False, refresh=False, fetch_backend=None, resume=None):
+    from mfds_review_pipeline import run_review
+    from mfds_workspace import new_run_id
+
+    # resume: the run ID of a failed run to continue in place
+    run_id = resume or new_run_id()
+
+    try:
+        result = run_review(
+            product_name,
+            write_json=write_json,
+            refresh=refresh,
+            fetch_backend=fetch_backend,
+            run_id=run_id,
+            resume=bool(resume)
+        )
+    except Exception as e:
+        print(f"[ERROR] Pipeline failed: {e}")
+        print(f"[INFO] Completed stages are checkpointed; continue with "
+              f"python run_mfds_review_poc.py --resume {run_id}")
+        sys.exit(1)
+
+    if result["resumed_stages"]:
+        print(f"[INFO] Resumed from checkpoint: {', '.join(result['resumed_stages'])}")
+    print(f"[INFO] Run {result['run_id']}: workspace {result['output_dir']}")
+    print(f"[INFO] Trace written to {result['trace_file']} (summary: python mfds_tracing.py {result['trace_file']})")
+    print(f"[INFO] In-process pipeline finished in {result['elapsed_seconds']}s")
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--product", help="Medical device name to search in MFDS")
+    parser.add_argument(
+        "--mode",
+        choices=["inprocess", "subprocess"],
+        default="inprocess",
+        help="Run steps in this interpreter (default) or one subprocess per script"
+    )
+    parser.add_argument(
+        "--write-json",
+        action="store_true",
+        help="Also write intermediate step JSON to the run workspace (debug only, in-process mode)"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached MFDS evidence and scrape e-Medi again"
+    )
+    parser.add_argument(
+        "--fetch-backend",
+        choices=["auto", "http", "playwright"],
+        default=None,
+        help="How e-Medi is fetched (default: MFDS_FETCH_BACKEND or auto)"
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const=True,
+        default=None,
+        metavar="RUN_ID",
+        help="Continue a failed run in place from its checkpoints "
+             "(default: the latest unfinished run of --product that is not still running)"
+    )
+    args, _ = parser.parse_known_args()
+
+    product_name = args.product
+    if args.resume and args.mode == "subprocess":
+        parser.error("--resume needs --mode inprocess")
+    resume = args.resume
+    if isinstance(resume, str):
+        from mfds_workspace import load_run_manifest, workspace_dir_for
+        try:
+            product_name = load_run_manifest(workspace_dir_for(resume))["product_name"]
+        except OSError:
+            parser.error(f"Run {resume} not found")
+    if not product_name:
+        parser.error("--product is required (or --resume RUN_ID)")
+    if resume is True:
+        from mfds_incremental import find_unfinished_review
+        previous = find_unfinished_review(product_name)
+        resume = os.path.basename(previous) if previous else None
+        if not resume:
+            print(f"[INFO] No unfinished run of {product_name} to resume; starting a new one")
+
+    print("Starting MFDS Procurement Review Pipeline")
+    print(f"Product selected: {product_name}")
+
+    if args.mode == "subprocess":
+        run_subprocess_pipeline(product_name, refresh=args.refresh, fetch_backend=args.fetch_backend)
+    else:
+        run_inprocess_pipeline(
+            product_name,
+            write_json=args.write_json,
+            refresh=args.refresh,
+            fetch_backend=args.fetch_backend,
+            resume=resume
+        )
 
     print("\n[OK] MFDS Procurement Review Document generated successfully")
 
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakePlaywright:
+    def stop(self):
+        pass
+
+
+def fake_pool(monkeypatch, start_playwright, **kwargs):
+    monkeypatch.setattr(BrowserPool, "_start_playwright", lambda self: start_playwright())
+    monkeypatch.setattr(BrowserPool, "_launch", lambda self, pw: FakeBrowser())
+    monkeypatch.setattr(
+        BrowserPool, "_open_slot", lambda self, browser: {"context": FakeBrowser(), "page": "page", "uses": 0}
+    )
+    monkeypatch.setattr(BrowserPool, "_preload", lambda self, page: None)
+    return BrowserPool("http://emedi.test/search", max_concurrency=1, **kwargs)
+
+
+def test_lookups_fail_instead_of_hanging_when_playwright_cannot_start(monkeypatch):
+    def start_playwright():
+        raise RuntimeError("playwright driver missing")
+
+    pool = fake_pool(monkeypatch, start_playwright)
+    try:
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="driver missing"):
+                pool.run(lambda page: page, timeout=5)
+        assert pool.stats()["crashes"] == 2
+    finally:
+        pool.close()
+
+
+def test_worker_recovers_once_playwright_starts(monkeypatch):
+    attempts = []
+
+    def start_playwright():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("playwright driver missing")
+        return FakePlaywright()
+
+    pool = fake_pool(monkeypatch, start_playwright)
+    try:
+        with pytest.raises(RuntimeError):
+            pool.run(lambda page: page, timeout=5)
+        assert pool.run(lambda page: page, timeout=5) == "page"
+    finally:
+        pool.close()
+
+
+def test_run_is_bounded(monkeypatch):
+    pool = fake_pool(monkeypatch, FakePlaywright)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.run(lambda page: time.sleep(1), timeout=0.1)
+    finally:
+        pool.close()
+
+
+def test_lookups_use_the_pools_profile(monkeypatch):
+    profiles = []
+    monkeypatch.setattr(
+        step3_to_step4, "search_and_capture",
+        lambda page, search_value, profile_name=None, timings=None: profiles.append(profile_name)
+    )
+    pool = fake_pool(monkeypatch, FakePlaywright, profile_name="fast")
+    try:
+        step3_to_step4._capture_with_playwright("맥박산소측정기", pool, profile_name="standard")
+    finally:
+        pool.close()
+
+    assert profiles == ["fast"]
+
+
+def test_default_pools_are_kept_per_profile():
+    fast = step3_to_step4.get_default_browser_pool("fast")
+
+    assert fast is step3_to_step4.get_default_browser_pool("fast")
+    assert fast is not step3_to_step4.get_default_browser_pool("standard")
+    assert fast.profile_name == "fast"
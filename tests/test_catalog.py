@@ -0,0 +1,85 @@
+import time
+
+from mfds_catalog import Catalog
+
+DETAIL_URL = "https://emedi.mfds.go.kr/search/data/detail?itemSeq={}"
+
+
+def catalog_with_products(tmp_path, **options):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"), **options)
+    for item_seq, item_name, product_name, model_name in [
+        (1, "휴대용맥박산소측정기", "포켓 옥시미터", "PX-2"),
+        (2, "맥박산소측정기", "옥시미터", "PX-1"),
+        (3, "적외선체온계", "써모 체온계", "IR-200"),
+        (4, "귀적외선체온계", "이어 체온계", "EAR-9")
+    ]:
+        catalog.upsert(DETAIL_URL.format(item_seq), {
+            "item_name": item_name,
+            "product_name": product_name,
+            "model_name": model_name,
+            "risk_class": "2",
+            "approval_number": f"제인 20-{item_seq:04d} 호"
+        })
+    return catalog
+
+
+def names(results):
+    return [r["item_name"] for r in results]
+
+
+def test_korean_exact_match_ranks_first(tmp_path):
+    catalog = catalog_with_products(tmp_path)
+    assert catalog.fts
+
+    results = catalog.search("맥박산소측정기")
+    assert names(results) == ["맥박산소측정기", "휴대용맥박산소측정기"]
+    assert catalog.lookup("맥박산소측정기")["detail_url"] == DETAIL_URL.format(2)
+
+
+def test_substrings_match_like_the_site_search(tmp_path):
+    catalog = catalog_with_products(tmp_path)
+
+    assert names(catalog.search("적외선체온")) == ["적외선체온계", "귀적외선체온계"]
+    assert names(catalog.search("ir-200")) == ["적외선체온계"]
+    assert names(catalog.search("20-0004")) == ["귀적외선체온계"]
+
+
+def test_queries_shorter_than_a_trigram_still_match(tmp_path):
+    catalog = catalog_with_products(tmp_path)
+
+    assert sorted(names(catalog.search("체온"))) == ["귀적외선체온계", "적외선체온계"]
+    assert names(catalog.search("귀")) == ["귀적외선체온계"]
+    assert catalog.search("  ") == []
+    assert catalog.lookup("혈압") is None
+
+
+def test_like_search_without_full_text_index(tmp_path):
+    catalog = catalog_with_products(tmp_path)
+    catalog.fts = False
+
+    assert names(catalog.search("맥박산소측정기")) == ["맥박산소측정기", "휴대용맥박산소측정기"]
+
+
+def test_upsert_reports_changes_and_keeps_known_fields(tmp_path):
+    catalog = catalog_with_products(tmp_path)
+    url = DETAIL_URL.format(2)
+
+    assert catalog.upsert(url, {"item_name": "맥박산소측정기"}) == "unchanged"
+    assert catalog.upsert(url, {"item_name": "맥박산소측정기", "risk_class": "3"}) == "changed"
+
+    entry = catalog.lookup("맥박산소측정기")
+    assert (entry["risk_class"], entry["model_name"]) == ("3", "PX-1")
+    # The index follows the update instead of keeping the old row
+    assert len(catalog.search("PX-1")) == 1
+
+
+def test_stale_and_old_rows(tmp_path):
+    catalog = catalog_with_products(tmp_path, max_age_hours=1)
+    catalog.mark_stale(DETAIL_URL.format(2))
+
+    assert catalog.lookup("맥박산소측정기")["detail_url"] == DETAIL_URL.format(1)
+    assert catalog.lookup("적외선체온계")["fresh"]
+
+    assert catalog.mark_unseen_stale(time.time() + 1) == 3
+    assert catalog.lookup("체온계") is None
+    assert catalog.stats()["stale_entries"] == 4
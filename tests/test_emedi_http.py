@@ -0,0 +1,89 @@
+import pytest
+
+import mfds_emedi_http
+from mfds_emedi_guard import EmediGuard, EmediUnavailable
+from mfds_emedi_http import HttpFetchError, build_search_request, fetch_detail, fetch_raw_evidence, parse_page
+from mfds_mock_emedi import (
+    DETAIL_PATH, LIST_PATH, SEARCH_PATH, load_products, page_shell, render_detail_page, render_search_page,
+    start_mock_emedi
+)
+
+PRODUCT = load_products()[0]
+
+
+@pytest.fixture(autouse=True)
+def fresh_guard(monkeypatch):
+    # Failures here must not open the process-wide circuit breaker
+    guard = EmediGuard()
+    monkeypatch.setattr(mfds_emedi_http, "get_emedi_guard", lambda: guard)
+
+
+@pytest.fixture
+def emedi(tmp_path):
+    servers = []
+
+    def start(**kwargs):
+        server = start_mock_emedi(pages_dir=str(tmp_path), **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def search_url(server):
+    return f"{server.base_url}{SEARCH_PATH}#list"
+
+
+def test_detail_page_text_is_laid_out_like_inner_text():
+    page = parse_page(render_detail_page(PRODUCT))
+    lines = page.visible_text().split("\n")
+
+    assert page.title == f"{PRODUCT['product_name']} | 의료기기안심책방"
+    assert f"품목허가번호\t{PRODUCT['approval_number']}" in lines
+    assert f"사용목적\t{PRODUCT['intended_use']}" in lines
+
+
+def test_search_form_is_submitted_with_its_hidden_fields():
+    page = parse_page(render_search_page())
+    method, action_url, data = build_search_request(page, "http://emedi.test" + SEARCH_PATH, "명칭", "맥박산소측정기")
+
+    assert (method, action_url) == ("post", "http://emedi.test" + LIST_PATH)
+    assert data == {"menuId": "MNU20237", "pageIndex": "1", "itemName": "맥박산소측정기"}
+    with pytest.raises(HttpFetchError):
+        build_search_request(page, "http://emedi.test" + SEARCH_PATH, "업체명", "x")
+
+
+def test_hit_returns_the_detail_page(emedi):
+    server = emedi()
+    evidence = fetch_raw_evidence(search_url(server), "명칭", PRODUCT["item_name"])
+
+    assert evidence["source_url"].endswith(f"{DETAIL_PATH}?itemSeq={PRODUCT['item_seq']}")
+    assert f"품목허가번호\t{PRODUCT['approval_number']}" in evidence["visible_text"]
+    assert evidence["fetch_backend"] == "http"
+
+
+def test_no_result_page_means_not_found(emedi):
+    assert fetch_raw_evidence(search_url(emedi()), "명칭", "존재하지않는제품") is None
+
+
+def test_empty_result_table_falls_back_instead_of_not_found(emedi, tmp_path):
+    # Rows filled in by script: the server-rendered table is empty
+    (tmp_path / "results.html").write_text(page_shell("의료기기 제품 검색 결과", (
+        '<table class="list"><thead><tr><th>번호</th><th>제품명</th></tr></thead>'
+        '<tbody id="resultList"></tbody></table>'
+    )), encoding="utf-8")
+
+    with pytest.raises(HttpFetchError):
+        fetch_raw_evidence(search_url(emedi()), "명칭", PRODUCT["item_name"])
+
+
+def test_http_errors(emedi):
+    server = emedi(outage_status=503)
+    with pytest.raises(EmediUnavailable):
+        fetch_raw_evidence(search_url(server), "명칭", PRODUCT["item_name"])
+
+    server.outage_status = None
+    with pytest.raises(HttpFetchError):
+        fetch_detail(f"{server.base_url}{DETAIL_PATH}?itemSeq=missing")
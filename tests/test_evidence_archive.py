@@ -0,0 +1,111 @@
+import json
+import os
+
+import mfds_evidence_archive
+from mfds_evidence_archive import EvidenceArchive, split_chunks
+from mfds_incremental import StageGraph, content_hash
+from mfds_mock_emedi import FOOTER, NAV_MENU
+from mfds_workspace import create_run_workspace
+
+
+def evidence(body):
+    return {
+        "source_url": "https://emedi.mfds.go.kr/search/data/detail?itemSeq=1",
+        "page_title": "제품 상세정보",
+        "access_date": "2026-01-01T00:00:00",
+        "visible_text": "\n".join(NAV_MENU) + "\n" + body + "\n" + FOOTER,
+        "human_verified": False
+    }
+
+
+def test_chunks_rebuild_the_exact_text():
+    for text in ["", "a", "a\r\nb\rc\n\n", "x\x0by z", "한글\n" * 3000]:
+        assert "".join(split_chunks(text)) == text
+
+
+def test_round_trip_and_shared_chunks(tmp_path):
+    archive = EvidenceArchive(str(tmp_path / "archive.sqlite3"))
+    first = evidence("품목명\t맥박산소측정기\r\n등급\t2등급")
+    second = evidence("품목명\t적외선체온계\n등급\t2등급")
+
+    archive.put("run-1", first)
+    stored = archive.put("run-2", second)
+
+    assert archive.get("run-1") == first
+    assert list(archive.get("run-2")) == list(second)
+    assert stored["chunks_new"] < stored["chunks"]
+    assert archive.get("missing") is None
+
+
+def test_stage_graph_keeps_a_reference(tmp_path, monkeypatch):
+    monkeypatch.setattr(mfds_evidence_archive, "ARCHIVE_ENABLED", True)
+    monkeypatch.setattr(mfds_evidence_archive, "_default_archive", EvidenceArchive(str(tmp_path / "a.sqlite3")))
+    run_id, workspace_dir = create_run_workspace("맥박산소측정기", base_dir=str(tmp_path / "runs"))
+    raw_evidence = evidence("품목명\t맥박산소측정기")
+
+    graph = StageGraph(workspace_dir)
+    graph.record("step3_evidence", "fingerprint", raw_evidence)
+    graph.save()
+
+    with open(os.path.join(workspace_dir, "stages.json"), "r", encoding="utf-8") as f:
+        entry = json.load(f)["stages"]["step3_evidence"]
+    assert entry["output"]["archived_evidence"] == run_id
+    assert entry["output_sha256"] == content_hash(raw_evidence)
+
+    reloaded = StageGraph(workspace_dir)
+    assert reloaded.output("step3_evidence") == raw_evidence
+    assert reloaded.is_fresh("step3_evidence", "fingerprint")
+
+    # An archive that lost the review means the stage has to run again
+    monkeypatch.setattr(mfds_evidence_archive, "_default_archive", EvidenceArchive(str(tmp_path / "b.sqlite3")))
+    assert not StageGraph(workspace_dir).is_fresh("step3_evidence", "fingerprint")
+
+
+def test_refresh_adds_a_version(tmp_path):
+    archive = EvidenceArchive(str(tmp_path / "archive.sqlite3"))
+    first = evidence("품목명\t맥박산소측정기\n등급\t2등급")
+    refreshed = dict(evidence("품목명\t맥박산소측정기\n등급\t3등급"), access_date="2026-02-01T00:00:00")
+
+    assert archive.put("run-1", first)["version"] == 1
+    assert archive.put("run-1", first)["version"] == 1
+    assert archive.put("run-1", refreshed)["version"] == 2
+
+    assert archive.get("run-1") == refreshed
+    assert archive.get("run-1", version=1) == first
+    assert [entry["access_date"] for entry in archive.versions("run-1")] == [
+        "2026-01-01T00:00:00", "2026-02-01T00:00:00"
+    ]
+    assert archive.review_ids() == ["run-1"]
+    assert archive.report()["versions"] == 2
+    assert mfds_evidence_archive.verify_archive(archive) == []
+
+
+def test_reference_resolves_its_own_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(mfds_evidence_archive, "ARCHIVE_ENABLED", True)
+    monkeypatch.setattr(mfds_evidence_archive, "_default_archive", EvidenceArchive(str(tmp_path / "a.sqlite3")))
+    first = evidence("품목명\t맥박산소측정기")
+    ref = mfds_evidence_archive.archive_evidence("run-1", first)
+    mfds_evidence_archive.archive_evidence("run-1", evidence("품목명\t적외선체온계"))
+
+    assert mfds_evidence_archive.load_archived_evidence(ref) == first
+    # References written before versioning carry only the text hash
+    del ref["version"]
+    assert mfds_evidence_archive.load_archived_evidence(ref) == first
+
+
+def test_unversioned_archive_is_migrated(tmp_path):
+    path = str(tmp_path / "archive.sqlite3")
+    archive = EvidenceArchive(path)
+    raw_evidence = evidence("품목명\t맥박산소측정기")
+    archive.put("run-1", raw_evidence)
+    with archive._connect() as conn:
+        conn.executescript(
+            "CREATE TABLE r AS SELECT review_id, product_name, evidence, text_sha256, text_bytes, json_bytes, "
+            "stored_at FROM reviews; DROP TABLE reviews; ALTER TABLE r RENAME TO reviews; "
+            "CREATE TABLE rc AS SELECT review_id, seq, chunk_id FROM review_chunks; DROP TABLE review_chunks; "
+            "ALTER TABLE rc RENAME TO review_chunks;"
+        )
+
+    migrated = EvidenceArchive(path)
+    assert migrated.get("run-1") == raw_evidence
+    assert migrated.put("run-1", evidence("품목명\t적외선체온계"))["version"] == 2
@@ -0,0 +1,94 @@
+import pytest
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_emedi_http import EmediUnavailable
+from mfds_evidence_cache import EvidenceCache
+
+
+def evidence(item_seq, text="품목명\t맥박산소측정기"):
+    return {
+        "source_url": f"https://emedi.mfds.go.kr/search/data/detail?itemSeq={item_seq}",
+        "page_title": "제품 상세정보",
+        "access_date": "2026-01-01T00:00:00",
+        "visible_text": text
+    }
+
+
+def age(cache, hours):
+    with cache._connect() as conn:
+        conn.execute("UPDATE evidence SET stored_at = stored_at - ?", (hours * 3600,))
+
+
+def counters(cache):
+    stats = cache.stats()
+    return {key: stats[key] for key in ("hits", "misses", "expired", "stale_served")}
+
+
+def test_hit_within_ttl_and_miss_after(tmp_path):
+    cache = EvidenceCache(str(tmp_path / "cache.sqlite3"), ttl_hours=24)
+    cache.put("Pulse  OXIMETER", evidence(1))
+
+    hit = cache.get("pulse oximeter")
+    assert hit["visible_text"] == "품목명\t맥박산소측정기"
+    assert hit["access_date"] == "2026-01-01T00:00:00"
+    assert not hit["stale"]
+
+    age(cache, 25)
+    assert cache.get("pulse oximeter") is None
+    assert cache.get("unknown") is None
+    assert counters(cache) == {"hits": 1, "misses": 2, "expired": 1, "stale_served": 0}
+
+
+def test_stale_fallback_is_not_a_second_lookup(tmp_path):
+    cache = EvidenceCache(str(tmp_path / "cache.sqlite3"), ttl_hours=24)
+    cache.put("맥박산소측정기", evidence(1))
+    age(cache, 48)
+
+    assert cache.get("맥박산소측정기") is None
+    stale = cache.get_stale("맥박산소측정기")
+
+    assert stale["stale"] and stale["visible_text"] == "품목명\t맥박산소측정기"
+    assert cache.get_stale("unknown") is None
+    assert counters(cache) == {"hits": 0, "misses": 1, "expired": 1, "stale_served": 1}
+
+
+def test_outage_serves_the_stale_capture_once(tmp_path, monkeypatch):
+    cache = EvidenceCache(str(tmp_path / "cache.sqlite3"), ttl_hours=24)
+    cache.put("맥박산소측정기", evidence(1))
+    age(cache, 48)
+
+    def unavailable(term, **kwargs):
+        raise EmediUnavailable("e-Medi returned 503")
+
+    monkeypatch.setattr(step3_to_step4, "fetch_evidence", unavailable)
+    raw_evidence = step3_to_step4.collect_raw_evidence("맥박산소측정기", write_output=False, evidence_cache=cache)
+
+    assert raw_evidence["emedi_unavailable"] and raw_evidence["stale"]
+    assert counters(cache) == {"hits": 0, "misses": 1, "expired": 1, "stale_served": 1}
+
+    with pytest.raises(EmediUnavailable):
+        step3_to_step4.collect_raw_evidence("적외선체온계", write_output=False, evidence_cache=cache)
+
+
+def test_least_recently_used_page_is_evicted(tmp_path):
+    cache = EvidenceCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("first", evidence(1))
+    cache.put("second", evidence(2))
+    cache.get("first")
+    cache.put("third", evidence(3))
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_size_limit_keeps_the_newest_page(tmp_path):
+    cache = EvidenceCache(str(tmp_path / "cache.sqlite3"), max_bytes=100)
+    cache.put("first", evidence(1, "가" * 30))
+    cache.put("second", evidence(2, "나" * 30))
+
+    assert cache.get("first") is None
+    assert cache.get("second") is not None
+    assert cache.stats()["size_bytes"] == 90
@@ -0,0 +1,74 @@
+from mfds_evidence_reducer import reduce_evidence
+from mfds_mock_emedi import FOOTER, NAV_MENU
+
+LABELLED_PAGE = "\n".join(NAV_MENU + [
+    "제품 상세정보",
+    "품목명\t맥박산소측정기",
+    "모델명\tOX-100",
+    "등급\t2등급",
+    "품목허가번호\t제인 20-1234 호",
+    "허가일자\t2020-03-17",
+    "모양 및 구조\t광센서를 손가락에 착용하여 맥박수와 경피적 산소포화도를 측정하는 기기",
+    "사용목적\t혈중 산소포화도(SpO2)와 맥박수를 비침습적으로 측정하는 데 사용",
+    FOOTER
+])
+
+# Schema labels only partly present: name and description as unlabelled
+# prose, class and approval number labelled
+PARTLY_LABELLED_PAGE = "\n".join(NAV_MENU + [
+    "옥시체크 펄스 맥박산소측정기",
+    "광센서를 손가락에 착용하여 맥박수와 산소포화도를 측정하는 기기입니다.",
+    "등급",
+    "2등급",
+    "품목허가번호",
+    "제허 20-123 호",
+    FOOTER
+])
+
+
+def test_labelled_page_drops_site_chrome():
+    reduced, stats = reduce_evidence(LABELLED_PAGE)
+
+    assert not stats["passthrough"]
+    assert "품목명\t맥박산소측정기" in reduced
+    assert "사용목적" in reduced
+    assert FOOTER not in reduced
+    assert NAV_MENU[0] not in reduced
+
+
+def test_partly_labelled_page_keeps_the_prose_but_not_the_chrome():
+    reduced, stats = reduce_evidence(PARTLY_LABELLED_PAGE)
+
+    assert stats["passthrough"]
+    assert "product_name_ko" in stats["missing_labels"]
+    assert "device_description_ko" in stats["missing_labels"]
+    assert reduced.split("\n") == [
+        "옥시체크 펄스 맥박산소측정기",
+        "광센서를 손가락에 착용하여 맥박수와 산소포화도를 측정하는 기기입니다.",
+        "등급",
+        "2등급",
+        "품목허가번호",
+        "제허 20-123 호"
+    ]
+    assert stats["chars_saved"] > 0
+
+
+def test_long_page_is_cut_to_the_budget_without_losing_fields():
+    notice = "사용 전 반드시 사용설명서를 읽고 주의사항을 확인하십시오. 이 안내문은 제품과 무관합니다."
+    page = "\n".join([PARTLY_LABELLED_PAGE.split("\n")[len(NAV_MENU)]] + [notice] * 400 + [
+        "등급", "2등급", "품목허가번호", "제허 20-123 호", FOOTER
+    ])
+
+    reduced, stats = reduce_evidence(page, max_chars=2000)
+
+    assert len(reduced) <= 2000
+    assert reduced.startswith("옥시체크 펄스 맥박산소측정기")
+    assert reduced.endswith("등급\n2등급\n품목허가번호\n제허 20-123 호")
+    assert stats["chars_out"] == len(reduced)
+
+
+def test_empty_text():
+    reduced, stats = reduce_evidence("")
+
+    assert reduced == ""
+    assert stats["passthrough"]
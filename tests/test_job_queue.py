@@ -0,0 +1,72 @@
+import json
+import os
+
+from mfds_job_queue import JobQueue
+
+
+def run_job(job_id, product_name, country, on_stage, on_section, resume=False):
+    on_stage("looking up " + product_name)
+    on_section("title", "# " + product_name)
+    if product_name == "broken":
+        raise RuntimeError("e-Medi unavailable")
+    return {"run_id": job_id, "output_file": None, "elapsed_seconds": 0.0}
+
+
+def test_jobs_run_in_the_background_and_are_persisted(tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+    queue = JobQueue(run_job=run_job, max_workers=1, jobs_dir=jobs_dir)
+    done_id = queue.submit("맥박산소측정기")
+    failed_id = queue.submit("broken")
+    queue.shutdown(wait=True)
+
+    done = queue.get(done_id)
+    assert done["status"] == "done"
+    assert done["stage"] == "finished"
+    assert done["result"]["run_id"] == done_id
+    assert done["sections"] == {"title": "# 맥박산소측정기"}
+
+    failed = queue.get(failed_id)
+    assert failed["status"] == "failed"
+    assert failed["error"] == "RuntimeError: e-Medi unavailable"
+
+    stats = queue.stats()
+    assert (stats["submitted"], stats["done"], stats["failed"]) == (2, 1, 1)
+    assert stats["queue_depth"] == stats["running"] == 0
+
+    # Another server thread reads the record from disk
+    assert JobQueue(run_job=run_job, jobs_dir=jobs_dir).get(done_id)["status"] == "done"
+
+
+def test_unfinished_job_on_disk_reads_as_interrupted(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    with open(os.path.join(jobs_dir, "run-1.json"), "w", encoding="utf-8") as f:
+        json.dump({"job_id": "run-1", "status": "running", "error": None}, f)
+
+    queue = JobQueue(run_job=run_job, jobs_dir=str(jobs_dir))
+    job = queue.get("run-1")
+
+    assert job["status"] == "failed"
+    assert "interrupted" in job["error"]
+    assert queue.get("missing") is None
+
+
+def test_finished_jobs_leave_memory_and_are_served_from_disk(tmp_path):
+    queue = JobQueue(run_job=run_job, max_workers=1, jobs_dir=str(tmp_path / "jobs"), ttl_seconds=0)
+    job_id = queue.submit("맥박산소측정기")
+    queue.shutdown(wait=True)
+
+    assert job_id not in queue._jobs
+    job = queue.get(job_id)
+    assert job["status"] == "done"
+    assert job["sections"] == {"title": "# 맥박산소측정기"}
+    assert queue.stats()["done"] == 1
+
+
+def test_finished_jobs_stay_in_memory_until_the_ttl(tmp_path):
+    queue = JobQueue(run_job=run_job, max_workers=1, jobs_dir=str(tmp_path / "jobs"), ttl_seconds=3600)
+    job_id = queue.submit("맥박산소측정기")
+    queue.shutdown(wait=True)
+
+    assert queue.get(job_id)["status"] == "done"
+    assert job_id in queue._jobs
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_json_stream import IncrementalJSONObject, conform, schema_problems
+from mfds_mock_emedi import FOOTER, NAV_MENU
+from mfds_mock_openai import start_mock_openai
+from mfds_openai_client import OpenAIClient
+
+ANSWER = {
+    "risk_class": 2,
+    "approval_number": "제인 20-1234 호",
+    "approval_date": None,
+    "verified": True,
+    "product_name": {"original_ko": "맥박산소측정기", "translated_en": "Pulse \"oximeter\"\\n"},
+    "intended_use": {"original_ko": "산소포화도 {측정}", "translated_en": "[measure] SpO₂ 😀"},
+    "codes": [[1, 2], {"a": []}],
+    "score": -1.5e3
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONObject()
+    pairs = []
+    for i in range(0, len(text), size):
+        pairs += parser.feed(text[i:i + size])
+    return parser, pairs
+
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+def test_every_chunk_boundary_gives_the_same_values(ensure_ascii):
+    # ensure_ascii=True splits \uXXXX and surrogate-pair escapes too
+    text = "```json\n" + json.dumps(ANSWER, ensure_ascii=ensure_ascii) + "\n```"
+
+    for size in range(1, 12):
+        parser, pairs = feed_in_chunks(text, size)
+        assert pairs == list(ANSWER.items())
+        assert parser.result() == ANSWER
+
+
+def test_values_arrive_as_soon_as_they_are_complete():
+    parser = IncrementalJSONObject()
+
+    assert parser.feed('{"risk_class": "2", "approval_number": "제인') == [("risk_class", "2")]
+    assert parser.feed(' 20-1234 호", "product_name": {"original_ko": ') == [("approval_number", "제인 20-1234 호")]
+    assert parser.feed('"}"}, "score": 1') == [("product_name", {"original_ko": "}"})]
+    assert parser.feed('2}') == [("score", 12)]
+    assert parser.complete
+
+
+def test_incomplete_object_has_no_result():
+    parser, pairs = feed_in_chunks('{"risk_class": "2", "intended_use": {"original_ko": "', 4)
+
+    assert pairs == [("risk_class", "2")]
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+def test_schema_problems_and_conform():
+    schema = step3_to_step4.LLM_EXTRACTION_SCHEMA
+    answer = {"risk_class": 2, "product_name": "맥박산소측정기"}
+
+    problems = schema_problems(answer, schema)
+    assert "risk_class is not a string" in problems
+    assert "product_name is not an object" in problems
+    assert "approval_number is missing" in problems
+
+    conformed = conform(answer, schema)
+    assert schema_problems(conformed, schema) == []
+    assert conformed["risk_class"] == "2"
+    assert conformed["product_name"] == {"original_ko": "", "translated_en": ""}
+
+
+def test_streamed_extraction_matches_the_plain_request(monkeypatch):
+    server = start_mock_openai()
+    client = OpenAIClient("test-key", base_url=server.base_url)
+    monkeypatch.setattr(step3_to_step4, "openai_client", lambda: client)
+    monkeypatch.setattr(step3_to_step4, "LLM_STREAM", True)
+    page = "\n".join(NAV_MENU + ["품목명\t맥박산소측정기", "등급\t2등급", "허가번호\t제인 20-1234 호",
+                                  "사용목적\t산소포화도 측정", FOOTER])
+    streamed_values = []
+
+    try:
+        plain = step3_to_step4.request_llm_json(
+            step3_to_step4.LLM_PROMPT_TEMPLATE, page, schema=step3_to_step4.LLM_EXTRACTION_SCHEMA
+        )
+        streamed = step3_to_step4.request_llm_json(
+            step3_to_step4.LLM_PROMPT_TEMPLATE, page, schema=step3_to_step4.LLM_EXTRACTION_SCHEMA,
+            on_value=lambda key, value: streamed_values.append((key, value))
+        )
+    finally:
+        server.shutdown()
+
+    assert plain["product_name"]["original_ko"] == "맥박산소측정기"
+    assert streamed == plain
+    assert dict(streamed_values) == plain
+    assert server.request_count == 2
@@ -0,0 +1,137 @@
+import json
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_llm_batcher import LLMBatcher, packed_prompt, valid_item
+from mfds_llm_cache import LLMResponseCache
+
+SCHEMA = step3_to_step4.LLM_EXTRACTION_SCHEMA
+KEYS = step3_to_step4.LLM_EXTRACTION_KEYS
+REQUIRED_KEYS = ("risk_class", "approval_number")
+
+
+def answer(risk_class="2"):
+    return {"risk_class": risk_class, "approval_number": "제인 20-1234 호"}
+
+
+def test_packed_prompt_lists_every_item_once():
+    prompt, item_ids = packed_prompt("Extract the fields.", ["first page", "second page"])
+
+    assert item_ids == ["item_1", "item_2"]
+    assert prompt.count("Extract the fields.") == 1
+    assert '=== item_2 ===\n"""second page"""' in prompt
+
+
+def test_full_pack_is_sent_as_one_request():
+    sent = []
+
+    def send_packed(prompt_template, texts):
+        sent.append(texts)
+        return {"item_1": answer("1"), "item_2": answer("2"), "item_3": answer("3")}, 90
+
+    batcher = LLMBatcher(send_packed, max_items=3, max_wait=5)
+    futures = [batcher.submit("template", text, REQUIRED_KEYS) for text in ("a", "b", "c")]
+
+    assert [future.result(timeout=5) for future in futures] == [(answer("1"), 30), (answer("2"), 30), (answer("3"), 30)]
+    assert sent == [["a", "b", "c"]]
+    assert batcher.stats()["requests_saved"] == 2
+
+
+def test_missing_items_and_failed_packs_resolve_to_none():
+    def send_packed(prompt_template, texts):
+        if texts == ["boom"]:
+            raise RuntimeError("LLM unavailable")
+        return {"item_1": answer(), "item_2": {"risk_class": "2"}}, 20
+
+    batcher = LLMBatcher(send_packed, max_items=2, max_wait=0.05)
+    good = batcher.submit("template", "a", REQUIRED_KEYS)
+    incomplete = batcher.submit("template", "b", REQUIRED_KEYS)
+    failed = batcher.submit("other template", "boom", REQUIRED_KEYS)
+
+    assert good.result(timeout=5) == (answer(), 10)
+    assert incomplete.result(timeout=5) is None
+    # Flushed by the max_wait timer, not by reaching max_items
+    assert failed.result(timeout=5) is None
+    stats = batcher.stats()
+    assert (stats["items_invalid"], stats["requests_failed"]) == (1, 1)
+
+
+def extraction_answer(product_name="맥박산소측정기"):
+    return {
+        "risk_class": "2",
+        "approval_number": "제인 20-1234 호",
+        "approval_date": "2020-03-17",
+        "product_name": {"original_ko": product_name, "translated_en": "Pulse oximeter"},
+        "device_description": {"original_ko": "", "translated_en": ""},
+        "intended_use": {"original_ko": "", "translated_en": ""},
+        "confidence_notes": ""
+    }
+
+
+def flat_name_answer():
+    # Right keys, but product_name is a string instead of an object
+    return dict(extraction_answer(), product_name="맥박산소측정기")
+
+
+def test_valid_item_checks_the_schema():
+    assert valid_item(extraction_answer(), KEYS, SCHEMA)
+    assert valid_item(flat_name_answer(), KEYS)
+    assert not valid_item(flat_name_answer(), KEYS, SCHEMA)
+
+
+def test_batcher_rejects_items_that_do_not_match_the_schema():
+    def send_packed(prompt_template, texts):
+        return {"item_1": extraction_answer(), "item_2": flat_name_answer()}, 100
+
+    batcher = LLMBatcher(send_packed, max_items=2)
+    good = batcher.submit("template", "a", KEYS, SCHEMA)
+    bad = batcher.submit("template", "b", KEYS, SCHEMA)
+
+    assert good.result(timeout=5)[0] == extraction_answer()
+    assert bad.result(timeout=5) is None
+    assert batcher.stats()["items_invalid"] == 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def chat_completion(self, payload):
+        self.calls += 1
+        content = json.dumps(extraction_answer(), ensure_ascii=False)
+        return {"choices": [{"message": {"content": content}}], "usage": {"total_tokens": 10}}
+
+
+def test_bad_packed_item_is_retried_alone_and_not_cached(tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(step3_to_step4, "openai_client", lambda: client)
+    llm_cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    batcher = LLMBatcher(lambda template, texts: ({"item_1": flat_name_answer()}, 50), max_items=1)
+
+    def request():
+        return step3_to_step4.request_llm_json(
+            step3_to_step4.LLM_PROMPT_TEMPLATE, "page text", llm_cache=llm_cache, llm_batcher=batcher,
+            required_keys=KEYS, schema=SCHEMA
+        )
+
+    assert request() == extraction_answer()
+    assert client.calls == 1
+    # The single-call answer was cached, not the packed one
+    assert request() == extraction_answer()
+    assert client.calls == 1
+
+
+def test_cached_answer_that_does_not_match_the_schema_is_ignored(tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(step3_to_step4, "openai_client", lambda: client)
+    llm_cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    template = step3_to_step4.LLM_PROMPT_TEMPLATE
+    cache_key = llm_cache.make_key(
+        "page text", step3_to_step4.LLM_SYSTEM_PROMPT + template,
+        step3_to_step4.OPENAI_MODEL, step3_to_step4.LLM_TEMPERATURE
+    )
+    llm_cache.put(cache_key, flat_name_answer(), model=step3_to_step4.OPENAI_MODEL)
+
+    answer = step3_to_step4.request_llm_json(template, "page text", llm_cache=llm_cache, schema=SCHEMA)
+
+    assert answer == extraction_answer()
+    assert client.calls == 1
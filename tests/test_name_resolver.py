@@ -0,0 +1,61 @@
+from mfds_catalog import Catalog
+from mfds_name_resolver import NameResolver, is_english_query, normalize_english, search_terms
+
+
+def first_name(resolver, query):
+    candidates = resolver.candidates(query)
+    return candidates[0]["item_name_ko"] if candidates else None
+
+
+def test_english_aliases_resolve_to_korean_item_names(tmp_path):
+    resolver = NameResolver(str(tmp_path / "resolver.sqlite3"))
+
+    assert first_name(resolver, "Skin Infrared Thermometer") == "피부적외선체온계"
+    assert first_name(resolver, "tympanic thermometer") == "귀적외선체온계"
+    assert first_name(resolver, "SpO2 monitor") == "맥박산소측정기"
+
+
+def test_word_order_and_typos_still_rank_the_item_first(tmp_path):
+    resolver = NameResolver(str(tmp_path / "resolver.sqlite3"))
+
+    assert first_name(resolver, "Oximeter, pulse") == "맥박산소측정기"
+    assert first_name(resolver, "thermometr infrared skin") == "피부적외선체온계"
+
+
+def test_short_and_unrelated_queries_resolve_to_nothing(tmp_path):
+    resolver = NameResolver(str(tmp_path / "resolver.sqlite3"))
+
+    assert resolver.candidates("ab") == []
+    assert resolver.candidates("") == []
+    assert resolver.candidates("quantum flux capacitor") == []
+    assert resolver.stats()["unresolved"] == 2
+
+
+def test_confirmed_translation_outranks_and_persists(tmp_path):
+    path = str(tmp_path / "resolver.sqlite3")
+    NameResolver(path).confirm("Infrared Thermometer", "피부적외선체온계")
+
+    resolver = NameResolver(path)
+    best = resolver.candidates("infrared thermometer")[0]
+    assert (best["item_name_ko"], best["source"]) == ("피부적외선체온계", "confirmed")
+    assert resolver.stats()["confirmed_names"] == 1
+
+
+def test_search_terms(tmp_path):
+    resolver = NameResolver(str(tmp_path / "resolver.sqlite3"))
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"))
+    catalog.upsert("https://emedi.mfds.go.kr/search/data/detail?itemSeq=1", {"item_name": "귀적외선체온계"})
+
+    assert search_terms("맥박산소측정기", resolver) == ["맥박산소측정기"]
+    assert search_terms("pulse oximeter", resolver) == ["맥박산소측정기", "pulse oximeter"]
+    # Names the catalog can find go first, in resolver order
+    assert search_terms("skin infrared thermometer", resolver, catalog) == [
+        "적외선체온계", "귀적외선체온계", "피부적외선체온계", "skin infrared thermometer"
+    ]
+
+
+def test_query_helpers():
+    assert normalize_english("  Pulse-Oximeter (SpO₂) ") == "pulse oximeter spo2"
+    assert is_english_query("IR-200")
+    assert not is_english_query("적외선 thermometer")
+    assert not is_english_query("  ")
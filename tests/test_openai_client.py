@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from mfds_mock_openai import start_mock_openai
+from mfds_openai_client import LATENCY_SAMPLES, OpenAIClient, TokenBucket
+
+PAYLOAD = {
+    "model": "mock",
+    "messages": [{"role": "user", "content": "MFDS TEXT:\n품목명\t맥박산소측정기\n등급\t2등급"}],
+    "max_tokens": 100
+}
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**options):
+        server = start_mock_openai(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_injected_failures_succeed_after_retries(mock_server):
+    server = mock_server(fail_first=2)
+    client = OpenAIClient("test-key", base_url=server.base_url, max_retries=2)
+
+    answer = json.loads(client.chat_completion(PAYLOAD)["choices"][0]["message"]["content"])
+
+    assert answer["product_name"]["original_ko"] == "맥박산소측정기"
+    stats = client.stats()
+    assert (stats["requests"], stats["retries"], stats["succeeded"], stats["failed"]) == (3, 2, 1, 0)
+    assert server.request_count == 3
+
+
+def test_retries_run_out(mock_server):
+    server = mock_server(fail_first=3, fail_status=503)
+    client = OpenAIClient("test-key", base_url=server.base_url, max_retries=2)
+
+    with pytest.raises(RuntimeError, match="503"):
+        client.chat_completion(PAYLOAD)
+    assert client.stats()["failed"] == 1
+
+
+def test_other_errors_are_not_retried(mock_server):
+    server = mock_server()
+    client = OpenAIClient("test-key", base_url=server.base_url)
+
+    with pytest.raises(RuntimeError, match="404"):
+        client.post("embeddings", PAYLOAD)
+    assert client.stats()["retries"] == 0
+
+
+def test_retry_after_is_honoured(mock_server):
+    server = mock_server(fail_first=1, retry_after="0.6")
+    client = OpenAIClient("test-key", base_url=server.base_url)
+    delays = []
+    backoff = client._backoff
+
+    def recorded_backoff(attempt, retry_after=None):
+        delays.append(backoff(attempt, retry_after))
+        return delays[-1]
+
+    client._backoff = recorded_backoff
+    client.chat_completion(PAYLOAD)
+
+    # Jitter alone stays under BACKOFF_BASE_SECONDS on the first retry
+    assert delays and delays[0] >= 0.6
+
+
+def test_latencies_are_bounded(mock_server):
+    server = mock_server()
+    client = OpenAIClient("test-key", base_url=server.base_url)
+    client._latencies.extend([1.0] * (LATENCY_SAMPLES + 10))
+
+    client.chat_completion(PAYLOAD)
+
+    assert len(client._latencies) == LATENCY_SAMPLES
+    assert client.stats()["latency_p50_s"] == 1.0
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(600)
+
+    assert bucket.acquire(600) == 0
+    assert bucket.acquire(5) > 0.3
+
+
+def test_token_bucket_clamps_oversized_requests():
+    bucket = TokenBucket(60)
+
+    assert bucket.acquire(10000) == 0
+    assert bucket.tokens < 1
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_emedi_guard import EmediGuard, EmediUnavailable
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    guard = EmediGuard()
+    monkeypatch.setattr(step3_to_step4, "get_emedi_guard", lambda: guard)
+    return guard
+
+
+class FakePage:
+    def __init__(self, ready_state="complete", status=200):
+        self.document_state = [ready_state, status]
+
+    def evaluate(self, script):
+        return self.document_state
+
+
+def lookup(page, error):
+    with step3_to_step4.page_lookup(page):
+        raise error
+
+
+@pytest.mark.parametrize("page, error", [
+    (FakePage(ready_state="loading"), PlaywrightTimeoutError("Timeout 10000ms exceeded")),
+    (FakePage(status=503), PlaywrightTimeoutError("Timeout 10000ms exceeded")),
+    (FakePage(), PlaywrightError("net::ERR_CONNECTION_REFUSED at https://emedi.mfds.go.kr/")),
+])
+def test_site_failures_count_against_e_medi(guard, page, error):
+    with pytest.raises(EmediUnavailable):
+        lookup(page, error)
+    assert guard.stats()["failures"] == 1
+
+
+@pytest.mark.parametrize("error", [
+    PlaywrightTimeoutError("waiting for locator('table tbody tr')"),
+    KeyError("visible_text")
+])
+def test_layout_errors_propagate_as_they_are(guard, error):
+    with pytest.raises(type(error)):
+        lookup(FakePage(), error)
+    assert guard.stats()["failures"] == 0
+    assert guard.stats()["requests"] == 0
+
+
+def test_pool_queueing_is_not_e_medi_latency(guard, monkeypatch):
+    class SlowPool:
+        profile_name = "fast"
+
+        def run(self, fn):
+            time.sleep(0.3)
+            return fn(FakePage())
+
+    monkeypatch.setattr(step3_to_step4, "search_and_capture", lambda page, *args: {"visible_text": ""})
+
+    assert step3_to_step4._capture_with_playwright("맥박산소측정기", SlowPool()) == {"visible_text": ""}
+    assert guard.stats()["requests"] == 1
+    assert guard.stats()["latency_ewma_s"] < 0.3
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+import mfds_evidence_archive
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_batch_review import ITEMS_LOG, append_item_log, load_finished_items
+from mfds_evidence_archive import EvidenceArchive
+from mfds_incremental import ReviewCheckpoint, StageGraph, find_unfinished_review, stage_code_versions
+from mfds_job_queue import JobQueue
+from mfds_single_flight import review_key
+from mfds_workspace import RUN_LOCK, active_run, create_run_workspace, is_run_active
+
+
+@pytest.fixture(autouse=True)
+def evidence_archive(tmp_path, monkeypatch):
+    # Checkpointed evidence goes to the archive; keep it out of output/
+    monkeypatch.setattr(mfds_evidence_archive, "_default_archive", EvidenceArchive(str(tmp_path / "archive.sqlite3")))
+
+
+def unfinished_run(base_dir, product_name="맥박산소측정기"):
+    _, workspace_dir = create_run_workspace(product_name, base_dir=base_dir)
+    graph = StageGraph(workspace_dir)
+    graph.stages["step4_understanding"] = {"fingerprint": "f", "output": {}, "output_sha256": "h"}
+    graph.save()
+    return workspace_dir
+
+
+def test_checkpoints_survive_a_restart(tmp_path):
+    _, workspace_dir = create_run_workspace("맥박산소측정기", base_dir=str(tmp_path / "runs"))
+    key = review_key("맥박산소측정기")
+    evidence = {"visible_text": "품목명\t맥박산소측정기"}
+
+    checkpoint = ReviewCheckpoint(workspace_dir, key)
+    checkpoint.save("step3_evidence", evidence)
+    checkpoint.save("step4_understanding", {"risk_class": "2"})
+
+    restored = ReviewCheckpoint(workspace_dir, key)
+    assert restored.load("step3_evidence") == evidence
+    assert restored.load("step4_understanding") == {"risk_class": "2"}
+    assert restored.restored == ["step3_evidence", "step4_understanding"]
+
+    # Another product's checkpoint is never reused
+    assert ReviewCheckpoint(workspace_dir, review_key("적외선체온계")).load("step3_evidence") is None
+
+    # New evidence invalidates the interpretation built on the old one
+    checkpoint.save("step3_evidence", {"visible_text": "품목명\t맥박산소측정기 (개정)"})
+    assert ReviewCheckpoint(workspace_dir, key).load("step4_understanding") is None
+
+
+def test_unfinished_runs_are_found_by_product(tmp_path):
+    base_dir = str(tmp_path / "runs")
+    workspace_dir = unfinished_run(base_dir)
+
+    assert find_unfinished_review("맥박산소측정기", base_dir=base_dir) == workspace_dir
+    assert find_unfinished_review("적외선체온계", base_dir=base_dir) is None
+    assert find_unfinished_review("맥박산소측정기", exclude=workspace_dir, base_dir=base_dir) is None
+
+
+def test_batch_resume_skips_only_finished_items(tmp_path):
+    batch_dir = str(tmp_path)
+    with open(os.path.join(batch_dir, "0001_report.md"), "w", encoding="utf-8") as f:
+        f.write("# report")
+
+    append_item_log(batch_dir, {"index": 1, "status": "ok", "report_file": "0001_report.md"})
+    append_item_log(batch_dir, {"index": 2, "status": "error", "report_file": None})
+    append_item_log(batch_dir, {"index": 3, "status": "ok", "report_file": "0003_report.md"})
+    with open(os.path.join(batch_dir, ITEMS_LOG), "a", encoding="utf-8") as f:
+        f.write('{"index": 4, "sta')
+
+    assert list(load_finished_items(batch_dir)) == [1]
+
+
+def test_active_runs_are_not_resumed(tmp_path):
+    base_dir = str(tmp_path / "runs")
+    workspace_dir = unfinished_run(base_dir)
+
+    with active_run(workspace_dir):
+        assert is_run_active(workspace_dir)
+        assert find_unfinished_review("맥박산소측정기", base_dir=base_dir) is None
+        with pytest.raises(RuntimeError):
+            with active_run(workspace_dir):
+                pass
+
+    assert not is_run_active(workspace_dir)
+    assert find_unfinished_review("맥박산소측정기", base_dir=base_dir) == workspace_dir
+
+
+def test_lock_of_a_dead_process_is_ignored(tmp_path):
+    workspace_dir = unfinished_run(str(tmp_path / "runs"))
+    with open(os.path.join(workspace_dir, RUN_LOCK), "w", encoding="utf-8") as f:
+        f.write("999999999")
+
+    assert not is_run_active(workspace_dir)
+    with active_run(workspace_dir):
+        assert is_run_active(workspace_dir)
+
+
+def test_only_a_retry_resumes(tmp_path):
+    calls = []
+
+    def run_job(job_id, product_name, country, on_stage, on_section, resume=False):
+        calls.append((job_id, resume))
+        if len(calls) == 1:
+            raise RuntimeError("LLM unavailable")
+        return {"run_id": job_id, "output_file": None, "elapsed_seconds": 0.0}
+
+    queue = JobQueue(run_job=run_job, max_workers=1, jobs_dir=str(tmp_path / "jobs"))
+    job_id = queue.submit("맥박산소측정기")
+    queue.shutdown(wait=True)
+    assert queue.get(job_id)["status"] == "failed"
+
+    queue = JobQueue(run_job=run_job, max_workers=1, jobs_dir=str(tmp_path / "jobs"))
+    assert queue.retry(job_id)
+    queue.shutdown(wait=True)
+
+    assert calls == [(job_id, False), (job_id, True)]
+    assert queue.get(job_id)["status"] == "done"
+    assert queue.get(job_id)["retries"] == 1
+    assert not queue.retry(job_id)
+
+
+def test_step4_checkpoint_follows_the_answer_schema(monkeypatch):
+    before = stage_code_versions()
+    schema = dict(step3_to_step4.LLM_EXTRACTION_SCHEMA, udi_code="")
+    monkeypatch.setattr(step3_to_step4, "LLM_EXTRACTION_SCHEMA", schema)
+    after = stage_code_versions()
+
+    assert after["step4_understanding"] != before["step4_understanding"]
+    assert after["step3_evidence"] == before["step3_evidence"]
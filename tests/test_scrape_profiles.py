@@ -0,0 +1,88 @@
+import time
+
+import mfds_step3_to_step4_poc as step3_to_step4
+from mfds_emedi_http import parse_page
+from mfds_mock_emedi import load_products, render_detail_page, render_results_page
+
+
+def has_ready_label(text):
+    return any(label in text for label in step3_to_step4.DETAIL_READY_LABELS)
+
+
+class FakeLocator:
+    def __init__(self, present):
+        self.present = present
+
+    def count(self):
+        return 1 if self.present else 0
+
+
+class FakePage:
+    # Detail labels show up after labels_after seconds (None: never); the
+    # page goes network-idle after idle_after seconds
+    def __init__(self, labels_after=None, idle_after=0.0):
+        self.started = time.perf_counter()
+        self.labels_after = labels_after
+        self.idle_after = idle_after
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def evaluate(self, script, arg):
+        return self.labels_after is not None and self.elapsed() >= self.labels_after
+
+    def wait_for_function(self, script, arg, timeout):
+        if not self.evaluate(script, arg):
+            time.sleep(timeout / 1000)
+            raise TimeoutError(script)
+
+    def wait_for_load_state(self, state, timeout):
+        if self.elapsed() < self.idle_after:
+            time.sleep(timeout / 1000)
+            raise TimeoutError(state)
+
+    def locator(self, selector):
+        return FakeLocator(selector == "div.detail_content")
+
+
+def test_ready_labels_are_on_detail_pages_only():
+    products = load_products()
+
+    assert has_ready_label(parse_page(render_detail_page(products[0])).visible_text())
+    assert not has_ready_label(parse_page(render_results_page(products, "")).visible_text())
+
+
+def test_detail_is_read_as_soon_as_its_fields_appear(monkeypatch):
+    monkeypatch.setattr(step3_to_step4, "DETAIL_WAIT_MS", 15000)
+    page = FakePage(labels_after=0.0, idle_after=60)
+    started = time.perf_counter()
+
+    assert step3_to_step4.wait_for_detail_content(page) == "body"
+    assert time.perf_counter() - started < 1
+
+
+def test_unknown_layout_costs_no_more_than_networkidle(monkeypatch):
+    monkeypatch.setattr(step3_to_step4, "DETAIL_WAIT_MS", 15000)
+    page = FakePage(labels_after=None, idle_after=0.3)
+    started = time.perf_counter()
+
+    assert step3_to_step4.wait_for_detail_content(page) == "body"
+    assert time.perf_counter() - started < 2
+
+
+def test_idle_result_list_does_not_count_without_a_navigation(monkeypatch):
+    monkeypatch.setattr(step3_to_step4, "DETAIL_WAIT_MS", 15000)
+    page = FakePage(labels_after=0.6, idle_after=0.0)
+    started = time.perf_counter()
+
+    step3_to_step4.wait_for_detail_content(page, navigated=False)
+    assert time.perf_counter() - started >= 0.6
+
+
+def test_configured_container_is_read_when_present(monkeypatch):
+    page = FakePage(labels_after=0.0)
+
+    monkeypatch.setattr(step3_to_step4, "DETAIL_CONTENT_SELECTOR", "div.detail_content")
+    assert step3_to_step4.wait_for_detail_content(page) == "div.detail_content"
+    monkeypatch.setattr(step3_to_step4, "DETAIL_CONTENT_SELECTOR", "div.other")
+    assert step3_to_step4.wait_for_detail_content(page) == "body"
@@ -0,0 +1,102 @@
+import threading
+
+from mfds_single_flight import SingleFlight, flight_key, review_key
+
+
+def run_together(flight, key, fn, followers):
+    # The leader blocks in fn until the followers have attached
+    attached = threading.Semaphore(0)
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn, on_attach=attached.release))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    while flight.stats()["in_flight"] == 0:
+        pass
+    threads += [threading.Thread(target=call) for _ in range(followers)]
+    for thread in threads[1:]:
+        thread.start()
+    for _ in range(followers):
+        attached.acquire(timeout=5)
+    return threads, results, errors
+
+
+def test_identical_requests_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return {"risk_class": "2"}
+
+    threads, results, errors = run_together(flight, review_key("맥박산소측정기"), build, followers=3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"risk_class": "2"}] * 4 and not errors
+    # Followers get copies of the leader's result
+    assert len({id(result) for result in results}) == 4
+    assert flight.stats() == {"executions": 1, "executions_saved": 3, "in_flight": 0}
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def build():
+        release.wait(5)
+        raise RuntimeError("e-Medi unavailable")
+
+    threads, results, errors = run_together(flight, review_key("맥박산소측정기"), build, followers=2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert not results
+    assert [str(e) for e in errors] == ["e-Medi unavailable"] * 3
+    # The key is released, so the next request runs again
+    assert flight.do(review_key("맥박산소측정기"), lambda: "again") == "again"
+
+
+def test_review_key_normalizes_product_and_country():
+    assert review_key(" Oximeter ") == review_key("oximeter", "South Korea (MFDS)")
+    assert review_key("oximeter", "Japan (PMDA)") != review_key("oximeter")
+
+
+def test_refresh_requests_do_not_attach_to_cached_flights():
+    flight = SingleFlight()
+    key = review_key("맥박산소측정기")
+    started = threading.Event()
+    release = threading.Event()
+    results = {}
+
+    def cached_lookup():
+        started.set()
+        release.wait(5)
+        return "cached"
+
+    leader = threading.Thread(target=lambda: results.update(cached=flight.do(flight_key(key), cached_lookup)))
+    leader.start()
+    started.wait(5)
+
+    results["refresh"] = flight.do(flight_key(key, refresh=True), lambda: "fresh")
+    results["http"] = flight.do(flight_key(key, fetch_backend="http"), lambda: "http")
+    release.set()
+    leader.join(5)
+
+    assert results == {"cached": "cached", "refresh": "fresh", "http": "http"}
+    assert flight.stats()["executions_saved"] == 0
+
+
+def test_identical_requests_share_one_flight_key():
+    assert flight_key(review_key("Oximeter"), True, "http") == flight_key(review_key(" oximeter "), True, "http")